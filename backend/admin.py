@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, request, render_template
 from backend.authorization import db, User
+from backend.cache import bump_version
+from backend.catalogue_views import HOUSE_KINDS, refresh_catalogue
+from backend.db_routing import read_only
+from backend.provider_cards import refresh_provider_cards
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -41,6 +45,7 @@ class HouseListing(db.Model):
     type = db.Column(db.String(20), nullable=False)
     status = db.Column(db.String(20), nullable=False, default='pending')
     approved_at = db.Column(db.DateTime)
+    save_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     provider = db.relationship('ProviderProfile', backref=db.backref('house_listings', lazy=True))
@@ -115,7 +120,15 @@ class TiffinListing(db.Model):
     approved_at = db.Column(db.DateTime)
     diet_type = db.Column(db.String(20), nullable=False)
     available_days = db.Column(db.Text, nullable=False)
+    available_days_mask = db.Column(db.SmallInteger)
     kitchen_open = db.Column(db.Boolean, nullable=False, default=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    slot_capacity = db.Column(db.Integer)
+    menu_json = db.Column(db.Text)
+    provider_name = db.Column(db.String(150))
+    provider_image = db.Column(db.Text)
+    provider_status = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     provider = db.relationship('ProviderProfile', backref=db.backref('tiffin_listings', lazy=True))
@@ -139,6 +152,15 @@ class ServiceListing(db.Model):
     base_price = db.Column(db.Numeric(10, 2), nullable=False)
     service_radius = db.Column(db.Numeric(5, 2))
     availability_days = db.Column(db.Text, nullable=False)
+    available_days_mask = db.Column(db.SmallInteger)
+    slot_minutes = db.Column(db.Integer, nullable=False, default=60, server_default='60')
+    available_from = db.Column(db.Time, nullable=False, server_default='09:00')
+    available_to = db.Column(db.Time, nullable=False, server_default='18:00')
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    provider_name = db.Column(db.String(150))
+    provider_image = db.Column(db.Text)
+    provider_status = db.Column(db.String(20))
     status = db.Column(db.String(20), nullable=False, default='pending')
     approved_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -172,6 +194,8 @@ class Order(db.Model):
     order_status = db.Column(db.String(30), default='placed', nullable=False)
     delivery_address = db.Column(db.Text, nullable=False)
     order_date = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now())
+    checkout_id = db.Column(db.String(32))
 
     customer = db.relationship('User', foreign_keys=[customer_id])
     tiffin_listing = db.relationship('TiffinListing', foreign_keys=[tiffin_listing_id])
@@ -179,6 +203,15 @@ class Order(db.Model):
 
 
 
+class KitchenSlotUsage(db.Model):
+    __tablename__ = 'kitchen_slot_usage'
+    tiffin_listing_id = db.Column(db.Integer, db.ForeignKey('tiffin_listings.id'), primary_key=True)
+    slot_date = db.Column(db.Date, primary_key=True)
+    meal_category = db.Column(db.String(20), primary_key=True)
+    used = db.Column(db.Integer, nullable=False, default=0)
+
+
+
 class SavedService(db.Model):
     __tablename__ = 'saved_services'
     id = db.Column(db.Integer, primary_key=True)
@@ -204,6 +237,24 @@ class SavedKitchen(db.Model):
     customer = db.relationship('User', backref=db.backref('saved_kitchens', lazy=True))
     tiffin_listing = db.relationship('TiffinListing', backref=db.backref('saved_by', lazy=True))
 
+
+# One row per saved house, kitchen or service. saved_houses, saved_kitchens,
+# saved_services and saved_restaurants are merged into it once (see schema.py)
+# and are no longer written.
+class SavedItem(db.Model):
+    __tablename__ = 'saved_items'
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+    __table_args__ = (
+        db.UniqueConstraint('customer_id', 'kind', 'item_id', name='unique_customer_saved_item'),
+        db.Index('idx_saved_items_customer_kind_created', 'customer_id', 'kind', 'created_at', 'id',
+                 postgresql_include=['item_id']),
+    )
+
 class ServiceBooking(db.Model):
     __tablename__ = 'service_bookings'
     id = db.Column(db.Integer, primary_key=True)
@@ -221,6 +272,7 @@ class ServiceBooking(db.Model):
     service_listing = db.relationship('ServiceListing', foreign_keys=[service_listing_id])
 
 @admin_bp.route('/admin/api/pending-providers/count', methods=['GET'])
+@read_only
 def get_pending_providers_count():
     try:
         count = ProviderProfile.query.filter_by(verification_status='pending').count()
@@ -230,6 +282,7 @@ def get_pending_providers_count():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-providers', methods=['GET'])
+@read_only
 def get_pending_providers():
     try:
         pending_profiles = ProviderProfile.query.filter_by(verification_status='pending').all()
@@ -247,6 +300,7 @@ def get_pending_providers():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-houses/count', methods=['GET'])
+@read_only
 def get_pending_houses_count():
     try:
         count = HouseListing.query.filter_by(status='pending').count()
@@ -256,6 +310,7 @@ def get_pending_houses_count():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-houses', methods=['GET'])
+@read_only
 def get_pending_houses():
     try:
         listings = db.session.query(HouseListing, ProviderProfile)\
@@ -277,6 +332,7 @@ def get_pending_houses():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-tiffins/count', methods=['GET'])
+@read_only
 def get_pending_tiffins_count():
     try:
         count = TiffinListing.query.filter_by(status='pending').count()
@@ -286,6 +342,7 @@ def get_pending_tiffins_count():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-tiffins', methods=['GET'])
+@read_only
 def get_pending_tiffins():
     try:
         listings = db.session.query(TiffinListing, ProviderProfile)\
@@ -307,6 +364,7 @@ def get_pending_tiffins():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-services/count', methods=['GET'])
+@read_only
 def get_pending_services_count():
     try:
         count = ServiceListing.query.filter_by(status='pending').count()
@@ -316,6 +374,7 @@ def get_pending_services_count():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/pending-services', methods=['GET'])
+@read_only
 def get_pending_services():
     try:
         listings = db.session.query(ServiceListing, ProviderProfile)\
@@ -338,6 +397,7 @@ def get_pending_services():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/provider-profiles', methods=['GET'])
+@read_only
 def get_provider_profiles():
     try:
         profiles = db.session.query(ProviderProfile, User)\
@@ -364,6 +424,7 @@ def get_provider_profiles():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/users', methods=['GET'])
+@read_only
 def get_users():
     try:
         users = User.query.all()
@@ -407,6 +468,7 @@ def suspend_user(user_id):
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @admin_bp.route('/admin/api/house-listings', methods=['GET'])
+@read_only
 def get_house_listings():
     try:
         listings = db.session.query(HouseListing, ProviderProfile, User)\
@@ -436,6 +498,7 @@ def get_house_listings():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/tiffin-listings', methods=['GET'])
+@read_only
 def get_tiffin_listings():
     try:
         listings = db.session.query(TiffinListing, ProviderProfile, User)\
@@ -465,6 +528,7 @@ def get_tiffin_listings():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/service-listings', methods=['GET'])
+@read_only
 def get_service_listings():
     try:
         listings = db.session.query(ServiceListing, ProviderProfile, User)\
@@ -495,6 +559,7 @@ def get_service_listings():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/orders', methods=['GET'])
+@read_only
 def get_orders():
     try:
         orders = db.session.query(Order, User, ProviderProfile, Meal)\
@@ -529,6 +594,7 @@ def get_orders():
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 @admin_bp.route('/admin/api/service-bookings', methods=['GET'])
+@read_only
 def get_service_bookings():
     try:
         bookings = db.session.query(ServiceBooking, User, ServiceListing, ProviderProfile)\
@@ -600,7 +666,10 @@ def approve_provider(provider_id):
         
         provider.verification_status = 'verified'
         provider.verified_at = db.func.now()
+        refresh_provider_cards(provider.id)
         db.session.commit()
+        bump_version('providers')
+        refresh_catalogue('kitchen', 'service')
         
         return jsonify({'success': True, 'message': 'Provider approved successfully'}), 200
         
@@ -618,7 +687,10 @@ def reject_provider(provider_id):
         
         provider.verification_status = 'rejected'
         provider.verified_at = None
+        refresh_provider_cards(provider.id)
         db.session.commit()
+        bump_version('providers')
+        refresh_catalogue('kitchen', 'service')
         
         return jsonify({'success': True, 'message': 'Provider rejected successfully'}), 200
         
@@ -669,6 +741,8 @@ def approve_service(service_id):
         service.status = 'approved'
         service.approved_at = db.func.now()
         db.session.commit()
+        bump_version('services')
+        refresh_catalogue('service')
         
         return jsonify({'success': True, 'message': 'Service approved successfully'}), 200
         
@@ -687,6 +761,8 @@ def reject_service(service_id):
         service.status = 'rejected'
         service.approved_at = None
         db.session.commit()
+        bump_version('services')
+        refresh_catalogue('service')
         
         return jsonify({'success': True, 'message': 'Service rejected successfully'}), 200
         
@@ -736,6 +812,8 @@ def approve_tiffin(tiffin_id):
         tiffin.status = 'approved'
         tiffin.approved_at = db.func.now()
         db.session.commit()
+        bump_version(f"tiffin:{tiffin_id}")
+        refresh_catalogue('kitchen')
         
         return jsonify({'success': True, 'message': 'Tiffin approved successfully'}), 200
         
@@ -754,6 +832,8 @@ def reject_tiffin(tiffin_id):
         tiffin.status = 'rejected'
         tiffin.approved_at = None
         db.session.commit()
+        bump_version(f"tiffin:{tiffin_id}")
+        refresh_catalogue('kitchen')
         
         return jsonify({'success': True, 'message': 'Tiffin rejected successfully'}), 200
         
@@ -808,6 +888,10 @@ def approve_house(house_id):
         house.status = 'approved'
         house.approved_at = db.func.now()
         db.session.commit()
+        bump_version(f"house:{house_id}")
+        bump_version('housing')
+        if house.type in HOUSE_KINDS:
+            refresh_catalogue(HOUSE_KINDS[house.type])
         
         return jsonify({'success': True, 'message': 'House approved successfully'}), 200
         
@@ -826,6 +910,10 @@ def reject_house(house_id):
         house.status = 'rejected'
         house.approved_at = None
         db.session.commit()
+        bump_version(f"house:{house_id}")
+        bump_version('housing')
+        if house.type in HOUSE_KINDS:
+            refresh_catalogue(HOUSE_KINDS[house.type])
         
         return jsonify({'success': True, 'message': 'House rejected successfully'}), 200
         
@@ -0,0 +1,153 @@
+# Service listing availability and free booking slots
+#
+# A service listing works on the weekdays of its available_days_mask (parsed
+# from availability_days, see weekdays.py), from available_from to
+# available_to, in slots of slot_minutes. Slot i of a day starts at
+# available_from + i * slot_minutes. Bookings in the requested or accepted
+# state take the slot their booking_time falls in.
+#
+# Taken slots are kept as one int bitmap per day (bit i set = slot i taken),
+# read for a whole date range in a single query off
+# idx_service_bookings_listing_date and cached per listing under the
+# service:{listing_id} version, which booking writes bump.
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import cache_get, cache_set, get_version
+from backend.weekdays import listing_days_mask
+
+SLOT_LENGTHS = (30, 60, 90, 120)
+DEFAULT_SLOT_MINUTES = 60
+
+# Longest date range one free-slots request may cover
+SLOTS_MAX_DAYS = 31
+TAKEN_SLOTS_TTL = 60
+
+
+def parse_slot_time(value):
+    """'HH:MM' -> time, or None when missing or invalid"""
+    try:
+        return datetime.strptime((value or '').strip(), '%H:%M').time()
+    except ValueError:
+        return None
+
+
+def schedule_error(slot_minutes, available_from, available_to):
+    """Why a provider's slot length and hours cannot be saved, or None"""
+    if slot_minutes not in SLOT_LENGTHS:
+        return 'Invalid slot length'
+    if available_from is None or available_to is None:
+        return 'Invalid working hours'
+    if _minutes(available_to) - _minutes(available_from) < slot_minutes:
+        return 'Working hours must fit at least one slot'
+    return None
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def day_slots(listing):
+    """Start times ('HH:MM') of every slot in one working day of the listing"""
+    start, end = _minutes(listing.available_from), _minutes(listing.available_to)
+    return [f"{m // 60:02d}:{m % 60:02d}"
+            for m in range(start, end - listing.slot_minutes + 1, listing.slot_minutes)]
+
+
+def slot_index(listing, booking_time):
+    """Index of the slot booking_time starts, or None when it is not on the slot grid"""
+    offset = _minutes(booking_time) - _minutes(listing.available_from)
+    if offset < 0 or offset % listing.slot_minutes or booking_time.second:
+        return None
+    index = offset // listing.slot_minutes
+    return index if index < len(day_slots(listing)) else None
+
+
+def taken_slots(listing, start, end, cached=True):
+    """{date: bitmap of taken slots} for bookings of the listing from start to end inclusive"""
+    key = ('taken_slots', listing.id, get_version(f"service:{listing.id}"),
+           listing.slot_minutes, listing.available_from, start, end)
+    if cached:
+        taken = cache_get(key)
+        if taken is not None:
+            return taken
+
+    rows = db.session.execute(text("""
+        SELECT booking_date, booking_time
+        FROM service_bookings
+        WHERE service_listing_id = :listing_id
+        AND booking_date BETWEEN :start AND :end
+        AND booking_status IN ('requested', 'accepted')
+    """), {'listing_id': listing.id, 'start': start, 'end': end}).fetchall()
+
+    first = _minutes(listing.available_from)
+    taken = {}
+    for booking_date, booking_time in rows:
+        # bookings made before the grid existed take whichever slot they fall in
+        offset = _minutes(booking_time) - first
+        if offset >= 0:
+            taken[booking_date] = taken.get(booking_date, 0) | (1 << (offset // listing.slot_minutes))
+    return cache_set(key, taken, ttl=TAKEN_SLOTS_TTL)
+
+
+def free_slots(listing, start, end, now=None):
+    """[{'date': 'YYYY-MM-DD', 'slots': ['HH:MM', ...]}] for each working day from start to end.
+
+    Days off are left out; a working day with every slot taken has an empty
+    slots list. Slots already started today are not offered.
+    """
+    now = now or datetime.now()
+    start = max(start, now.date())
+    if end < start:
+        return []
+
+    days_mask = listing_days_mask(listing)
+    slots = day_slots(listing)
+    taken = taken_slots(listing, start, end)
+
+    days = []
+    day = start
+    while day <= end:
+        if days_mask & (1 << day.weekday()):
+            bits = taken.get(day, 0)
+            free = [s for i, s in enumerate(slots) if not bits & (1 << i)]
+            if day == now.date():
+                free = [s for s in free if s > now.strftime('%H:%M')]
+            days.append({'date': day.isoformat(), 'slots': free})
+        day += timedelta(days=1)
+    return days
+
+
+def booking_slot_error(listing, booking_date, booking_time, now=None):
+    """Why booking_date at booking_time cannot be booked, or None if the slot is free.
+
+    Reads the bookings uncached; call it with the listing row locked so two
+    customers cannot both take the same slot.
+    """
+    now = now or datetime.now()
+    if booking_date < now.date() or (booking_date == now.date() and booking_time <= now.time()):
+        return 'Booking time is in the past'
+    if not listing_days_mask(listing) & (1 << booking_date.weekday()):
+        return 'Provider is not available on this day'
+    index = slot_index(listing, booking_time)
+    if index is None:
+        return 'Please pick one of the available time slots'
+    taken = taken_slots(listing, booking_date, booking_date, cached=False)
+    if taken.get(booking_date, 0) & (1 << index):
+        return 'This time slot is already booked'
+    return None
+
+
+def parse_range(start_value, end_value, today=None):
+    """(start, end) dates for ?from=&to=, defaulting to the next 7 days; None when invalid"""
+    today = today or date.today()
+    try:
+        start = date.fromisoformat(start_value) if start_value else today
+        end = date.fromisoformat(end_value) if end_value else start + timedelta(days=6)
+    except ValueError:
+        return None
+    if end < start or (end - start).days >= SLOTS_MAX_DAYS:
+        return None
+    return start, end
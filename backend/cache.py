@@ -0,0 +1,65 @@
+# In-process TTL cache with versioned invalidation
+#
+# Every gunicorn worker keeps its own copy, so writes bump a version on the
+# worker that handled them and the TTL bounds how long other workers can serve
+# an older entry. Nothing is stored from a request reading a lagging replica
+# (see backend.db_routing).
+import threading
+import time
+
+from backend.db_routing import replica_read_cacheable
+
+DEFAULT_TTL = 300
+MAX_ENTRIES = 10000
+
+_store = {}
+_versions = {}
+_lock = threading.Lock()
+
+
+def cache_get(key):
+    entry = _store.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+        _store.pop(key, None)
+        return None
+    return value
+
+
+def cache_set(key, value, ttl=DEFAULT_TTL):
+    if not replica_read_cacheable():
+        return value
+    with _lock:
+        if len(_store) >= MAX_ENTRIES:
+            _evict()
+        _store[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def _evict():
+    """Drop expired entries, then the soonest-expiring half if the cache is still full"""
+    now = time.monotonic()
+    for key in [k for k, (expires_at, _) in _store.items() if expires_at < now]:
+        del _store[key]
+    if len(_store) >= MAX_ENTRIES:
+        by_expiry = sorted(_store, key=lambda k: _store[k][0])
+        for key in by_expiry[:len(by_expiry) // 2]:
+            del _store[key]
+
+
+def cache_delete(key):
+    with _lock:
+        _store.pop(key, None)
+
+
+def get_version(name):
+    return _versions.get(name, 0)
+
+
+def bump_version(name):
+    """Invalidate every cache key built with get_version(name)"""
+    with _lock:
+        _versions[name] = _versions.get(name, 0) + 1
+        return _versions[name]
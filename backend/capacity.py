@@ -0,0 +1,85 @@
+# Per-kitchen, per-slot order capacity
+#
+# A kitchen with tiffin_listings.slot_capacity set accepts at most that many
+# meals per meal category (breakfast, lunch, dinner) per day. The running
+# totals live in kitchen_slot_usage and are claimed by the order insert itself
+# (see menu.py), so two customers can never both take the last meal.
+#
+# Reads go through a short-lived per-worker snapshot of today's remaining
+# capacity: the tiffin browse page shows it, and orders for a slot the
+# snapshot shows as full are re-checked against a fresh snapshot (another
+# worker may have freed it) before they are rejected.
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import cache_delete, cache_get, cache_set
+
+MEAL_SLOTS = ('breakfast', 'lunch', 'dinner')
+
+SNAPSHOT_KEY = ('slot_snapshot',)
+SNAPSHOT_TTL = 15
+
+
+def capacity_snapshot():
+    """{listing_id: {'capacity': n, 'used': {meal_category: n}}} for today, capped kitchens only"""
+    snapshot = cache_get(SNAPSHOT_KEY)
+    if snapshot is not None:
+        return snapshot
+
+    rows = db.session.execute(text("""
+        SELECT tl.id, tl.slot_capacity, u.meal_category, u.used
+        FROM tiffin_listings tl
+        LEFT JOIN kitchen_slot_usage u
+            ON u.tiffin_listing_id = tl.id
+            AND u.slot_date = CURRENT_DATE
+        WHERE tl.slot_capacity IS NOT NULL
+        AND tl.status = 'approved'
+    """)).fetchall()
+
+    snapshot = {}
+    for listing_id, capacity, meal_category, used in rows:
+        kitchen = snapshot.setdefault(listing_id, {'capacity': capacity, 'used': {}})
+        if meal_category is not None:
+            kitchen['used'][meal_category] = used
+
+    return cache_set(SNAPSHOT_KEY, snapshot, ttl=SNAPSHOT_TTL)
+
+
+def invalidate_snapshot():
+    cache_delete(SNAPSHOT_KEY)
+
+
+def record_claim(listing_id, needed):
+    """Add a committed order's quantities ({category: quantity}) to this worker's snapshot"""
+    snapshot = cache_get(SNAPSHOT_KEY)
+    kitchen = snapshot.get(listing_id) if snapshot else None
+    if kitchen is None:
+        return
+    for meal_category, quantity in needed.items():
+        kitchen['used'][meal_category] = kitchen['used'].get(meal_category, 0) + quantity
+
+
+def remaining_slots(listing_id):
+    """{meal_category: meals left today} from the snapshot; None when the kitchen is not capped"""
+    kitchen = capacity_snapshot().get(listing_id)
+    if kitchen is None:
+        return None
+    return {
+        slot: max(kitchen['capacity'] - kitchen['used'].get(slot, 0), 0)
+        for slot in MEAL_SLOTS
+    }
+
+
+def full_slot(listing_id, needed):
+    """The first meal category in needed ({category: quantity}) the snapshot says cannot fit, or None"""
+    kitchen = capacity_snapshot().get(listing_id)
+    if kitchen is None:
+        return None
+    for meal_category, quantity in needed.items():
+        if kitchen['used'].get(meal_category, 0) + quantity > kitchen['capacity']:
+            return meal_category
+    return None
+
+
+def full_slot_message(meal_category):
+    return f'Kitchen is fully booked for {meal_category} today', 400
@@ -0,0 +1,130 @@
+# Materialized "approved catalogue" views for the browse pages
+#
+# With USE_CATALOGUE_VIEWS=1 the hostel, PG, apartment, kitchen and service
+# browse pages read from one materialized view per page (created in
+# schema.py) instead of filtering the listing tables for status = 'approved'
+# and re-joining details and images on every request. The views keep the
+# column names of the tables they come from, so the browse queries only swap
+# their FROM source.
+#
+# Views are refreshed CONCURRENTLY, so browsing is never blocked, after every
+# change that moves a listing in or out of them or changes what they show:
+# admin approve/reject, provider verification changes (provider card columns)
+# and kitchen open/close. The refresh runs on a background thread of the
+# worker that made the change, REFRESH_DELAY seconds later, so the request
+# does not wait for it and a burst of changes costs one refresh per view.
+# Other workers and browsers see the change once that refresh commits, after
+# which the worker bumps the cache versions of the pages built from the view.
+# House save counts are as of the last refresh.
+import threading
+
+from flask import current_app
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import bump_version
+
+REFRESH_DELAY = 2
+
+# Advisory lock taken by the start-up refresh, so one worker runs it
+STARTUP_REFRESH_LOCK = 720049
+
+# browse kind -> view
+CATALOGUE_VIEWS = {
+    'hostel': 'catalogue_hostels',
+    'pg': 'catalogue_pgs',
+    'apartment': 'catalogue_apartments',
+    'kitchen': 'catalogue_kitchens',
+    'service': 'catalogue_services',
+}
+
+# browse kind -> cache version of the cached pages read from its view
+VIEW_CACHE_VERSIONS = {
+    'hostel': 'housing',
+    'pg': 'housing',
+    'apartment': 'housing',
+    'service': 'services',
+}
+
+# house_listings.type -> browse kind
+HOUSE_KINDS = {'Hostel': 'hostel', 'PG': 'pg', 'Apartment': 'apartment'}
+
+
+def use_catalogue_views():
+    return bool(current_app.config.get('USE_CATALOGUE_VIEWS'))
+
+
+def catalogue_source(kind, table, alias):
+    """FROM source for a browse query: the kind's view when the switch is on, else the table"""
+    source = CATALOGUE_VIEWS[kind] if use_catalogue_views() else table
+    return f"{source} {alias}"
+
+
+# Per worker: browse kinds waiting for the scheduled refresh
+_pending = set()
+_pending_lock = threading.Lock()
+_timer = None
+
+
+def refresh_catalogue(*kinds):
+    """Schedule a background refresh of the given browse kinds' views; does nothing while the switch is off.
+
+    Call after the change is committed. A failed refresh is logged and leaves
+    the previous contents in place.
+    """
+    global _timer
+    if not use_catalogue_views():
+        return
+    with _pending_lock:
+        _pending.update(kinds)
+        if _timer is None:
+            _timer = threading.Timer(REFRESH_DELAY, _refresh_pending, args=(db.engine,))
+            _timer.daemon = True
+            _timer.start()
+
+
+def _refresh_pending(engine):
+    global _timer
+    with _pending_lock:
+        kinds = sorted(_pending)
+        _pending.clear()
+        _timer = None
+    for kind in kinds:
+        # entries cached between the change and this refresh hold the old view contents
+        if _refresh_view(engine, CATALOGUE_VIEWS[kind]) and kind in VIEW_CACHE_VERSIONS:
+            bump_version(VIEW_CACHE_VERSIONS[kind])
+
+
+def _refresh_view(engine, view):
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+        return True
+    except Exception as e:
+        print(f"Error refreshing {view}: {e}")
+        return False
+
+
+def refresh_catalogue_at_startup(app):
+    """Refresh every view once in the background, catching up with changes a stopped worker had not refreshed yet.
+
+    All workers call this at boot; the one that gets STARTUP_REFRESH_LOCK does
+    the refresh and the others skip it.
+    """
+    if not app.config.get('USE_CATALOGUE_VIEWS'):
+        return
+    with app.app_context():
+        engine = db.engine
+
+    def run():
+        try:
+            with engine.begin() as conn:
+                if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:lock)"),
+                                    {'lock': STARTUP_REFRESH_LOCK}).scalar():
+                    return
+                for view in CATALOGUE_VIEWS.values():
+                    conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+        except Exception as e:
+            print(f"Error refreshing catalogue views at start-up: {e}")
+
+    threading.Thread(target=run, name='catalogue-refresh', daemon=True).start()
@@ -0,0 +1,59 @@
+# Response compression and conditional GET for JSON endpoints
+import gzip
+
+import brotli
+from flask import jsonify, make_response, request
+
+JSON_MIMETYPES = ('application/json',)
+
+
+def compress_response(response, min_size=1024, etag=True, mimetypes=JSON_MIMETYPES):
+    """Add a weak ETag (answering If-None-Match with 304) and gzip/brotli-encode large bodies"""
+    if response.direct_passthrough or response.status_code != 200:
+        return response
+    if response.mimetype not in mimetypes:
+        return response
+
+    if etag and request.method in ('GET', 'HEAD'):
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    response.vary.add('Accept-Encoding')
+    if 'Content-Encoding' in response.headers:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if 'br' in request.accept_encodings:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+
+    return response
+
+
+def etag_json_response(payload, etag):
+    """JSON response for a payload whose ETag is already known; answers If-None-Match with an empty 304"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def init_compression(blueprint, min_size=1024, etag=True, mimetypes=JSON_MIMETYPES):
+    """Enable compression/ETags for every response of a blueprint (call before registering it)"""
+    @blueprint.after_request
+    def _compress(response):
+        return compress_response(response, min_size=min_size, etag=etag, mimetypes=mimetypes)
+
+    return blueprint
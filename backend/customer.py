@@ -1,9 +1,41 @@
 from flask import Blueprint, session, redirect, render_template, request, jsonify, send_file
 from backend.authorization import db, User
+from backend.availability import SLOTS_MAX_DAYS, booking_slot_error, free_slots, parse_slot_time
+from backend.availability import parse_range as parse_slot_range
+from backend.cache import bump_version, cache_get, cache_set, get_version
+from backend.catalogue_views import catalogue_source, use_catalogue_views
+from backend.capacity import remaining_slots
+from backend.compression import etag_json_response
+from backend.customer_home import load_home
+from backend.db_routing import read_only
+from backend.images import variant_url
+from backend.geo import DEFAULT_ADDRESS_CTE, distance_km_sql, within_radius_conditions
+from backend.geo import default_address, has_coordinates, parse_location, save_default_address
+from backend.housing_search import facet_counts, parse_filters, search_housing
+from backend.menu import CART_MAX_ITEMS, customer_menu, menu_document, parse_cart, place_cart_order, place_order
+from backend.order_history import order_updates, orders_page, parse_since
+from backend.order_history import parse_cursor as parse_order_cursor
+from backend.order_status import ACTIVE_ORDER_STATUSES
+from backend.saved_items import (
+    ALREADY_SAVED, NOT_FOUND, SAVED_KIND_ALIASES, SAVED_KINDS,
+    parse_cursor, save_item, saved_among, saved_ids, saved_page, unsave_item
+)
+from backend.service_catalogue import SERVICE_CATEGORIES, category_counts, services_page
+from backend.service_catalogue import parse_category as parse_service_category
+from backend.service_catalogue import parse_cursor as parse_service_cursor
+from backend.weekdays import WEEKDAYS, available_on_condition, day_bit, parse_day_filter
 from sqlalchemy import text
+import hashlib
+import json
+import time
 
 customer_bp = Blueprint('customer', __name__)
 
+# Versions are per worker, so an approve/reject handled by another gunicorn
+# worker only reaches this worker's detail entries when they expire; the
+# loaders only return approved listings, so a rejected one 404s after that.
+DETAIL_CACHE_TTL = 30
+
 
 def get_current_user():
     """Get current logged-in user from session"""
@@ -13,6 +45,13 @@ def get_current_user():
     return User.query.get(user_id)
 
 
+def _session_account_type():
+    """Account type of the logged-in user from the signed session, for routes that must not query"""
+    if not session.get('user_id'):
+        return None
+    return session.get('account_type')
+
+
                 
 
 @customer_bp.route('/customer/dashboard')
@@ -29,6 +68,23 @@ def customer_dashboard():
     return render_template('dashboards/customer/customer.html', username=user.username)
 
 
+@customer_bp.route('/customer/api/home')
+def customer_home():
+    """Recent orders, upcoming bookings and saved counts for the dashboard in one payload"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+    if user.account_type != 'customer':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    try:
+        home = load_home(db.engine, user.id)
+        return jsonify({'success': True, **home}), 200
+    except Exception as e:
+        print(f"Error loading customer home: {e}")
+        return jsonify({'success': False, 'message': 'Server error'}), 500
+
+
 @customer_bp.route('/customer/logout', methods=['POST', 'GET'])
 def customer_logout():
     """Clear session and redirect to login"""
@@ -68,7 +124,13 @@ def profile():
             'created_at': (user.created_at.strftime('%B %d, %Y') if getattr(user, 'created_at', None) else '')
         }
 
-    return render_template('dashboards/customer/profile.html', profile=profile_data)
+    try:
+        address = default_address(user.id)
+    except Exception as e:
+        print(f"Error loading default address: {e}")
+        address = None
+
+    return render_template('dashboards/customer/profile.html', profile=profile_data, address=address)
 
 
 @customer_bp.route('/profile/update', methods=['PUT'])
@@ -105,212 +167,145 @@ def update_profile():
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+@customer_bp.route('/profile/address', methods=['PUT'])
+def update_default_address():
+    """Set the customer's default address and its location (used by the "near my address" filters)"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+    if user.account_type != 'customer':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    data = request.get_json() or {}
+    address_line = (data.get('address_line') or '').strip()
+    if not address_line:
+        return jsonify({'success': False, 'message': 'Address is required'}), 400
+
+    latitude, longitude, location_error = parse_location(data.get('latitude'), data.get('longitude'))
+    if location_error:
+        return jsonify({'success': False, 'message': location_error}), 400
+
+    try:
+        save_default_address(user.id, address_line, latitude, longitude)
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Address updated successfully',
+            'address': {'address_line': address_line, 'latitude': latitude, 'longitude': longitude}
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating default address: {e}")
+        return jsonify({'success': False, 'message': 'Server error'}), 500
+
+
                         
 
 from backend.admin import (
-    HouseListing, HouseImage, SavedHouse, HostelDetails, PGDetails, ApartmentDetails,
-    ServiceListing, SavedService, ServiceBooking,
-    TiffinListing, Meal, Order, ProviderProfile,SavedKitchen
+    HouseImage, HostelDetails, PGDetails, ApartmentDetails,
+    ServiceListing, ServiceBooking,
+    Meal, Order, ProviderProfile
 )
 
 @customer_bp.route('/housing/hostel')
+@read_only
 def browse_hostels():
-    from flask import request
-    
     user = get_current_user()
     username = user.username if user else "Guest"
 
-                              
-    search_location = request.args.get('location', '').strip()
-    search_budget = request.args.get('budget', '').strip()
-    filter_gender = request.args.get('gender', '').strip()
-    filter_room_type = request.args.get('room_type', '').strip()
-    filter_wifi = request.args.get('wifi')
-    filter_attached_bathroom = request.args.get('attached_bathroom')
-    filter_food_included = request.args.get('food_included')
-    filter_laundry = request.args.get('laundry')
-
-                                                     
-    base_query = """
-        SELECT hl.*, 
-               hd.gender, hd.room_type, hd.wifi, hd.attached_bathroom, hd.food_included, hd.laundry,
-               (SELECT image_path 
-                FROM house_images 
-                WHERE listing_id = hl.id 
-                ORDER BY created_at ASC 
-                LIMIT 1) AS main_image
-        FROM house_listings hl
-        JOIN hostel_details hd ON hl.id = hd.listing_id
-        WHERE hl.type = 'Hostel'
-        AND hl.status = 'approved'
-    """
-    
-    params = {}
-    
-                                                       
-    if search_location:
-        base_query += " AND LOWER(hl.location) LIKE LOWER(:location)"
-        params['location'] = f"%{search_location}%"
-    
-                   
-    if search_budget == '1':
-        base_query += " AND hl.price >= 0 AND hl.price <= 5000"
-    elif search_budget == '2':
-        base_query += " AND hl.price > 5000 AND hl.price <= 10000"
-    elif search_budget == '3':
-        base_query += " AND hl.price > 10000 AND hl.price <= 15000"
-    elif search_budget == '4':
-        base_query += " AND hl.price > 15000"
-    
-                            
-    if filter_gender and filter_gender in ('boys', 'girls', 'coed'):
-        base_query += " AND hd.gender = :filter_gender"
-        params['filter_gender'] = filter_gender
-    if filter_room_type and filter_room_type in ('single', 'double', 'dorm'):
-        base_query += " AND hd.room_type = :filter_room_type"
-        params['filter_room_type'] = filter_room_type
-    if filter_wifi == '1':
-        base_query += " AND hd.wifi = TRUE"
-    if filter_attached_bathroom == '1':
-        base_query += " AND hd.attached_bathroom = TRUE"
-    if filter_food_included == '1':
-        base_query += " AND hd.food_included = TRUE"
-    if filter_laundry == '1':
-        base_query += " AND hd.laundry = TRUE"
-    
-    base_query += " ORDER BY hl.created_at DESC"
-    
-    results = db.session.execute(text(base_query), params).fetchall()
-    
-    saved_house_ids = set()
-    if user and user.account_type == 'customer':
-        try:
-            saved = SavedHouse.query.filter_by(customer_id=user.id).all()
-            saved_house_ids = {s.house_listing_id for s in saved}
-        except Exception:
-            pass
-    
-    listings_data = []
-    for row in results:
-        image_path = row[-1] if row[-1] else 'placeholder.jpg'
-        gender = row[-7]
-        room_type = row[-6]
-        wifi = row[-5]
-        attached_bathroom = row[-4]
-        food_included = row[-3]
-        laundry = row[-2]
-        
-        listings_data.append({
-            'id': row[0],
-            'title': row[2],
-            'description': row[3] or '',
-            'price': row[4],
-            'location': row[5],
-            'image_path': image_path,
-            'gender': gender,
-            'room_type': room_type,
-            'wifi': wifi,
-            'attached_bathroom': attached_bathroom,
-            'food_included': food_included,
-            'laundry': laundry
-        })
-        
+    spec = parse_filters('hostel', request.args)
+    listings_data = search_housing('hostel', spec)
+    facets = facet_counts('hostel', spec)
+
     return render_template(
-        'housing/hostel/hostel.html', 
-        username=username, 
+        'housing/hostel/hostel.html',
+        username=username,
         listings=listings_data,
-        saved_house_ids=saved_house_ids,
-        search_location=search_location,
-        search_budget=search_budget,
-        filter_gender=filter_gender,
-        filter_room_type=filter_room_type,
-        filter_wifi=filter_wifi,
-        filter_attached_bathroom=filter_attached_bathroom,
-        filter_food_included=filter_food_included,
-        filter_laundry=filter_laundry
+        saved_house_ids=_saved_house_ids(user),
+        facets=facets,
+        search_location=spec['location'],
+        search_budget=spec['budget'],
+        min_price=spec['min_price'],
+        max_price=spec['max_price'],
+        sort=spec['sort'],
+        filter_gender=request.args.get('gender', '').strip(),
+        filter_room_type=request.args.get('room_type', '').strip(),
+        filter_wifi=request.args.get('wifi'),
+        filter_attached_bathroom=request.args.get('attached_bathroom'),
+        filter_food_included=request.args.get('food_included'),
+        filter_laundry=request.args.get('laundry')
     )
 
 
-@customer_bp.route('/housing/hostel/<int:listing_id>/details')
-def hostel_details(listing_id):
-    """Return JSON details for a specific hostel listing"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+# Saved ids are cached in the session cookie per kind for SESSION_SAVED_TTL
+# seconds, so saves made on another device show up within that time. Browsers
+# cap the cookie at 4KB and it carries other keys, so at most
+# SESSION_SAVED_LIMIT ids are kept across all kinds; larger saved sets are
+# queried each time.
+SESSION_SAVED_TTL = 120
+SESSION_SAVED_LIMIT = 100
+
+
+def _session_saved(user):
+    """The session's {kind: [cached_at, ids]} for this user, without expired kinds"""
+    if session.get('saved_ids_user') != user.id:
+        return {}
+    now = time.time()
+    return {kind: entry for kind, entry in (session.get('saved_ids') or {}).items()
+            if now - entry[0] < SESSION_SAVED_TTL}
+
+
+def _store_session_saved(user, cached, kind, cached_at, ids):
+    """Put one kind's ids in the session cache if they fit under SESSION_SAVED_LIMIT, else drop it"""
+    others = sum(len(entry[1]) for other, entry in cached.items() if other != kind)
+    if others + len(ids) <= SESSION_SAVED_LIMIT:
+        cached[kind] = [cached_at, sorted(ids)]
+    else:
+        cached.pop(kind, None)
+    session['saved_ids'] = cached
+    session['saved_ids_user'] = user.id
+
+
+def _saved_ids(user, kind):
+    """IDs of the listings of one kind a customer has saved, cached in the session"""
+    if not user or user.account_type != 'customer':
+        return set()
+
+    cached = _session_saved(user)
+    if kind in cached:
+        return set(cached[kind][1])
 
     try:
-                                                                        
-        query = text("""
-            SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
-                   hl.status, hl.created_at,
-                   pp.business_name, pp.verification_status,
-                   u.phone, u.email,
-                   ppic.image_path AS provider_profile_pic,
-                   hd.gender, hd.room_type, hd.wifi, hd.attached_bathroom, hd.food_included, hd.laundry
-            FROM house_listings hl
-            JOIN provider_profiles pp ON hl.provider_id = pp.id
-            JOIN users u ON pp.user_id = u.id
-            LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-            JOIN hostel_details hd ON hl.id = hd.listing_id
-            WHERE hl.id = :listing_id
-            AND hl.type = 'Hostel'
-            AND hl.status = 'approved'
-        """)
-        
-        result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
-        
-        if not result:
-            return jsonify({'success': False, 'message': 'Listing not found'}), 404
-        
-                          
-        images_query = text("""
-            SELECT image_path
-            FROM house_images
-            WHERE listing_id = :listing_id
-            ORDER BY created_at ASC
-        """)
-        images = db.session.execute(images_query, {'listing_id': listing_id}).fetchall()
-        image_list = [row[0] for row in images]
-        
-        return jsonify({
-            'success': True,
-            'listing': {
-                'id': result[0],
-                'title': result[1],
-                'description': result[2] or '',
-                'price': float(result[3]),
-                'location': result[4],
-                'type': result[5],
-                'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
-                'images': image_list,
-                'gender': result[13],
-                'room_type': result[14],
-                'wifi': result[15],
-                'attached_bathroom': result[16],
-                'food_included': result[17],
-                'laundry': result[18]
-            },
-            'provider': {
-                'business_name': result[8],
-                'verification_status': result[9],
-                'phone': result[10],
-                'email': result[11],
-                'profile_pic': result[12]
-            }
-        }), 200
-        
+        ids = saved_ids(user.id, kind)
     except Exception as e:
-        print(f"Error fetching hostel details: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
+        print(f"Error fetching saved {kind} ids: {e}")
+        return set()
 
+    _store_session_saved(user, cached, kind, time.time(), ids)
+    return ids
 
-@customer_bp.route('/save/house/<int:listing_id>', methods=['POST'])
-def save_house(listing_id):
-    """Unified save for any house listing (Hostel/PG/Apartment) via saved_houses"""
+
+def _remember_saved(user, kind, listing_id, saved):
+    """Apply a save/unsave to the session cache (no-op when the kind is not cached)"""
+    cached = _session_saved(user)
+    if kind not in cached:
+        return
+
+    cached_at, ids = cached[kind]
+    ids = set(ids)
+    if saved:
+        ids.add(listing_id)
+    else:
+        ids.discard(listing_id)
+    _store_session_saved(user, cached, kind, cached_at, ids)
+
+
+def _saved_house_ids(user):
+    return _saved_ids(user, 'house')
+
+
+def _save_listing(kind, listing_id, messages, listing_type=None, conditions=None):
+    """Shared body of the save routes; messages holds 'saved', 'already_saved' and 'not_found'"""
     user = get_current_user()
     if not user:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
@@ -318,107 +313,242 @@ def save_house(listing_id):
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
     try:
-        listing = HouseListing.query.filter_by(id=listing_id, status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Listing not found or not available'}), 404
-
-        existing = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        if existing:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Already saved'}), 200
-
-        new_save = SavedHouse(customer_id=user.id, house_listing_id=listing_id)
-        db.session.add(new_save)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Saved successfully'}), 200
-
+        result = save_item(user.id, kind, listing_id, listing_type, conditions)
     except Exception as e:
         db.session.rollback()
-        print(f"Error saving house: {e}")
+        print(f"Error saving {kind}: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
+    if result == NOT_FOUND:
+        return jsonify({'success': False, 'message': messages['not_found']}), 404
 
-@customer_bp.route('/save/house/<int:listing_id>', methods=['DELETE'])
-def unsave_house(listing_id):
-    """Unified unsave for any house listing"""
+    _remember_saved(user, kind, listing_id, True)
+    if result == ALREADY_SAVED:
+        return jsonify({'success': True, 'already_saved': True, 'message': messages['already_saved']}), 200
+    bump_version(f"saved:{user.id}")
+    return jsonify({'success': True, 'message': messages['saved']}), 200
+
+
+def _unsave_listing(kind, listing_id, messages):
+    """Shared body of the unsave routes; messages holds 'removed' and 'not_saved'"""
     user = get_current_user()
     if not user:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
 
     try:
-        entry = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        if entry:
-            db.session.delete(entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'Removed from saved'}), 200
-        return jsonify({'success': True, 'removed': False, 'message': 'Was not saved'}), 200
+        removed = unsave_item(user.id, kind, listing_id)
     except Exception as e:
         db.session.rollback()
-        print(f"Error unsaving house: {e}")
+        print(f"Error unsaving {kind}: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
+    _remember_saved(user, kind, listing_id, False)
+    if removed:
+        bump_version(f"saved:{user.id}")
+    return jsonify({
+        'success': True,
+        'removed': removed,
+        'message': messages['removed'] if removed else messages['not_saved']
+    }), 200
 
-@customer_bp.route('/housing/hostel/<int:listing_id>/save', methods=['POST'])
-def save_hostel(listing_id):
-    """Save a hostel listing for the current customer"""
-    from flask import request, jsonify
-    
+
+@customer_bp.route('/saved/status', methods=['POST'])
+@read_only
+def saved_status():
+    """Saved status for a batch of listings: {"items": [{"kind": "hostel", "id": 3}, ...]}
+
+    Runs at most one query per kind.
+    """
     user = get_current_user()
-    if not user:
+    data = request.get_json(silent=True) or {}
+    items = data.get('items') or []
+
+    requested = {}
+    for item in items:
+        try:
+            kind = SAVED_KIND_ALIASES.get(item.get('kind'), item.get('kind'))
+            listing_id = int(item.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if kind in SAVED_KINDS:
+            requested.setdefault(kind, set()).add(listing_id)
+
+    saved = {kind: set() for kind in requested}
+    if user and user.account_type == 'customer':
+        try:
+            for kind, ids in requested.items():
+                saved[kind] = saved_among(user.id, kind, ids)
+        except Exception as e:
+            print(f"Error checking saved status: {e}")
+            return jsonify({'success': False, 'message': 'Server error'}), 500
+
+    results = []
+    for item in items:
+        try:
+            kind = SAVED_KIND_ALIASES.get(item.get('kind'), item.get('kind'))
+            listing_id = int(item.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if kind in SAVED_KINDS:
+            results.append({'kind': item.get('kind'), 'id': listing_id, 'saved': listing_id in saved[kind]})
+
+    return jsonify({'success': True, 'items': results}), 200
+
+
+def _detail_cache_key(kind, family, listing_id):
+    """Detail entries are dropped when the listing or any provider profile changes"""
+    return (
+        'detail', kind, listing_id,
+        get_version(f"{family}:{listing_id}"),
+        get_version('providers')
+    )
+
+
+def _cached_detail_response(kind, family, listing_id, loader, not_found_message):
+    """Serve a listing detail payload from cache, answering If-None-Match without the database
+
+    Callers authorize from the session (_session_account_type), so a cached
+    entry is served, or revalidated with a 304, without a single query.
+    """
+    key = _detail_cache_key(kind, family, listing_id)
+    entry = cache_get(key)
+
+    if entry is None:
+        payload = loader(listing_id)
+        if payload is None:
+            return jsonify({'success': False, 'message': not_found_message}), 404
+        body = json.dumps(payload, sort_keys=True, default=str)
+        entry = cache_set(key, {
+            'payload': payload,
+            'etag': hashlib.sha1(body.encode('utf-8')).hexdigest()
+        }, ttl=DETAIL_CACHE_TTL)
+
+    return etag_json_response(entry['payload'], entry['etag'])
+
+
+def _load_hostel_detail(listing_id):
+    query = text("""
+        SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
+               hl.status, hl.created_at,
+               pp.business_name, pp.verification_status,
+               u.phone, u.email,
+               ppic.image_path AS provider_profile_pic,
+               hd.gender, hd.room_type, hd.wifi, hd.attached_bathroom, hd.food_included, hd.laundry
+        FROM house_listings hl
+        JOIN provider_profiles pp ON hl.provider_id = pp.id
+        JOIN users u ON pp.user_id = u.id
+        LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
+        JOIN hostel_details hd ON hl.id = hd.listing_id
+        WHERE hl.id = :listing_id
+        AND hl.type = 'Hostel'
+        AND hl.status = 'approved'
+    """)
+
+    result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
+    if not result:
+        return None
+
+    return {
+        'success': True,
+        'listing': {
+            'id': result[0],
+            'title': result[1],
+            'description': result[2] or '',
+            'price': float(result[3]),
+            'location': result[4],
+            'type': result[5],
+            'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
+            'images': _house_image_urls(listing_id),
+            'gender': result[13],
+            'room_type': result[14],
+            'wifi': result[15],
+            'attached_bathroom': result[16],
+            'food_included': result[17],
+            'laundry': result[18]
+        },
+        'provider': {
+            'business_name': result[8],
+            'verification_status': result[9],
+            'phone': result[10],
+            'email': result[11],
+            'profile_pic': result[12]
+        }
+    }
+
+
+def _house_image_urls(listing_id):
+    images_query = text("""
+        SELECT image_path
+        FROM house_images
+        WHERE listing_id = :listing_id
+        ORDER BY created_at ASC
+    """)
+    images = db.session.execute(images_query, {'listing_id': listing_id}).fetchall()
+    return [variant_url(row[0], 'full') for row in images]
+
+
+@customer_bp.route('/housing/hostel/<int:listing_id>/details')
+@read_only
+def hostel_details(listing_id):
+    """Return JSON details for a specific hostel listing"""
+    account_type = _session_account_type()
+    if not account_type:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
+    if account_type != 'customer':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
     try:
-                                                    
-        listing = HouseListing.query.filter_by(id=listing_id, type='Hostel', status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Listing not found or not available'}), 404
+        return _cached_detail_response('hostel', 'house', listing_id, _load_hostel_detail, 'Listing not found')
+    except Exception as e:
+        print(f"Error fetching hostel details: {e}")
+        return jsonify({'success': False, 'message': 'Server error'}), 500
 
-                                   
-        existing_save = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        if existing_save:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Hostel already saved'}), 200
 
-                            
-        new_save = SavedHouse(customer_id=user.id, house_listing_id=listing_id)
-        db.session.add(new_save)
-        db.session.commit()
-        
-        return jsonify({'success': True, 'message': 'Hostel saved successfully'}), 200
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving hostel: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
+@customer_bp.route('/save/house/<int:listing_id>', methods=['POST'])
+def save_house(listing_id):
+    """Unified save for any house listing (Hostel/PG/Apartment)"""
+    return _save_listing('house', listing_id, {
+        'saved': 'Saved successfully',
+        'already_saved': 'Already saved',
+        'not_found': 'Listing not found or not available'
+    })
+
+
+
+@customer_bp.route('/save/house/<int:listing_id>', methods=['DELETE'])
+def unsave_house(listing_id):
+    """Unified unsave for any house listing"""
+    return _unsave_listing('house', listing_id, {
+        'removed': 'Removed from saved',
+        'not_saved': 'Was not saved'
+    })
+
+
+
+@customer_bp.route('/housing/hostel/<int:listing_id>/save', methods=['POST'])
+def save_hostel(listing_id):
+    """Save a hostel listing for the current customer"""
+    return _save_listing('house', listing_id, {
+        'saved': 'Hostel saved successfully',
+        'already_saved': 'Hostel already saved',
+        'not_found': 'Listing not found or not available'
+    }, listing_type='Hostel')
+
 
 
 @customer_bp.route('/housing/hostel/<int:listing_id>/unsave', methods=['DELETE'])
 def unsave_hostel(listing_id):
     """Remove a saved hostel listing for the current customer"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    
-    try:
-                          
-        save_entry = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        
-        if save_entry:
-            db.session.delete(save_entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'Hostel removed from saved list'}), 200
-        else:
-            return jsonify({'success': True, 'removed': False, 'message': 'Hostel was not saved'}), 200
+    return _unsave_listing('house', listing_id, {
+        'removed': 'Hostel removed from saved list',
+        'not_saved': 'Hostel was not saved'
+    })
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving hostel: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/housing/hostel/<int:listing_id>/is-saved', methods=['GET'])
+@read_only
 def is_hostel_saved(listing_id):
     """Check if a hostel is saved by the current customer"""
     from flask import jsonify
@@ -428,7 +558,7 @@ def is_hostel_saved(listing_id):
         return jsonify({'saved': False}), 200
     
     try:
-        exists = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first() is not None
+        exists = listing_id in _saved_ids(user, 'house')
         return jsonify({'saved': exists}), 200
         
     except Exception as e:
@@ -439,255 +569,125 @@ def is_hostel_saved(listing_id):
                    
 
 @customer_bp.route('/housing/pg')
+@read_only
 def browse_pgs():
-    from flask import request
-    
     user = get_current_user()
     username = user.username if user else "Guest"
 
-                              
-    search_location = request.args.get('location', '').strip()
-    search_budget = request.args.get('budget', '').strip()
-    filter_gender = request.args.get('gender', '').strip()
-    filter_ac = request.args.get('ac_available')
-    filter_sharing = request.args.get('sharing', '').strip()
-    filter_food_included = request.args.get('food_included')
-    filter_laundry = request.args.get('laundry')
-
-                                                 
-    base_query = """
-        SELECT hl.*, 
-               pd.gender, pd.ac_available, pd.sharing, pd.food_included, pd.laundry,
-               (SELECT image_path 
-                FROM house_images 
-                WHERE listing_id = hl.id 
-                ORDER BY created_at ASC 
-                LIMIT 1) AS main_image
-        FROM house_listings hl
-        JOIN pg_details pd ON hl.id = pd.listing_id
-        WHERE hl.type = 'PG'
-        AND hl.status = 'approved'
-    """
-    
-    params = {}
-    
-                     
-    if search_location:
-        base_query += " AND LOWER(hl.location) LIKE LOWER(:location)"
-        params['location'] = f"%{search_location}%"
-    
-                   
-    if search_budget == '1':
-        base_query += " AND hl.price >= 0 AND hl.price <= 5000"
-    elif search_budget == '2':
-        base_query += " AND hl.price > 5000 AND hl.price <= 10000"
-    elif search_budget == '3':
-        base_query += " AND hl.price > 10000 AND hl.price <= 15000"
-    elif search_budget == '4':
-        base_query += " AND hl.price > 15000"
-    
-                        
-    if filter_gender and filter_gender in ('boys', 'girls', 'coed'):
-        base_query += " AND pd.gender = :filter_gender"
-        params['filter_gender'] = filter_gender
-    if filter_ac == '1':
-        base_query += " AND pd.ac_available = TRUE"
-    if filter_sharing and filter_sharing in ('1', '2', '3', '4+'):
-        base_query += " AND pd.sharing = :filter_sharing"
-        params['filter_sharing'] = filter_sharing
-    if filter_food_included == '1':
-        base_query += " AND pd.food_included = TRUE"
-    if filter_laundry == '1':
-        base_query += " AND pd.laundry = TRUE"
-    
-    base_query += " ORDER BY hl.created_at DESC"
-    
-    results = db.session.execute(text(base_query), params).fetchall()
-    
-    saved_house_ids = set()
-    if user and user.account_type == 'customer':
-        try:
-            saved = SavedHouse.query.filter_by(customer_id=user.id).all()
-            saved_house_ids = {s.house_listing_id for s in saved}
-        except Exception:
-            pass
-    
-    listings_data = []
-    for row in results:
-        image_path = row[-1] if row[-1] else 'placeholder.jpg'
-        gender = row[-7]
-        ac_available = row[-6]
-        sharing = row[-5]
-        food_included = row[-4]
-        laundry = row[-3]
-        
-        listings_data.append({
-            'id': row[0],
-            'title': row[2],
-            'description': row[3] or '',
-            'price': row[4],
-            'location': row[5],
-            'image_path': image_path,
-            'gender': gender,
-            'ac_available': ac_available,
-            'sharing': sharing,
-            'food_included': food_included,
-            'laundry': laundry
-        })
-        
+    spec = parse_filters('pg', request.args)
+    listings_data = search_housing('pg', spec)
+    facets = facet_counts('pg', spec)
+
     return render_template(
-        'housing/pg/pg.html', 
-        username=username, 
+        'housing/pg/pg.html',
+        username=username,
         listings=listings_data,
-        saved_house_ids=saved_house_ids,
-        search_location=search_location,
-        search_budget=search_budget,
-        filter_gender=filter_gender,
-        filter_ac=filter_ac,
-        filter_sharing=filter_sharing,
-        filter_food_included=filter_food_included,
-        filter_laundry=filter_laundry
+        saved_house_ids=_saved_house_ids(user),
+        facets=facets,
+        search_location=spec['location'],
+        search_budget=spec['budget'],
+        min_price=spec['min_price'],
+        max_price=spec['max_price'],
+        sort=spec['sort'],
+        filter_gender=request.args.get('gender', '').strip(),
+        filter_ac=request.args.get('ac_available'),
+        filter_sharing=request.args.get('sharing', '').strip(),
+        filter_food_included=request.args.get('food_included'),
+        filter_laundry=request.args.get('laundry')
     )
 
 
+
+def _load_pg_detail(listing_id):
+    query = text("""
+        SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
+               hl.status, hl.created_at,
+               pp.business_name, pp.verification_status,
+               u.phone, u.email,
+               ppic.image_path AS provider_profile_pic,
+               pd.gender, pd.ac_available, pd.sharing, pd.food_included, pd.laundry
+        FROM house_listings hl
+        JOIN provider_profiles pp ON hl.provider_id = pp.id
+        JOIN users u ON pp.user_id = u.id
+        LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
+        JOIN pg_details pd ON hl.id = pd.listing_id
+        WHERE hl.id = :listing_id
+        AND hl.type = 'PG'
+        AND hl.status = 'approved'
+    """)
+
+    result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
+    if not result:
+        return None
+
+    return {
+        'success': True,
+        'listing': {
+            'id': result[0],
+            'title': result[1],
+            'description': result[2] or '',
+            'price': float(result[3]),
+            'location': result[4],
+            'type': result[5],
+            'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
+            'images': _house_image_urls(listing_id),
+            'gender': result[13],
+            'ac_available': result[14],
+            'sharing': result[15],
+            'food_included': result[16],
+            'laundry': result[17]
+        },
+        'provider': {
+            'business_name': result[8],
+            'verification_status': result[9],
+            'phone': result[10],
+            'email': result[11],
+            'profile_pic': result[12]
+        }
+    }
+
+
 @customer_bp.route('/housing/pg/<int:listing_id>/details')
+@read_only
 def pg_details(listing_id):
     """Return JSON details for a specific PG listing"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
+    account_type = _session_account_type()
+    if not account_type:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
+    if account_type != 'customer':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
     try:
-                                                                    
-        query = text("""
-            SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
-                   hl.status, hl.created_at,
-                   pp.business_name, pp.verification_status,
-                   u.phone, u.email,
-                   ppic.image_path AS provider_profile_pic,
-                   pd.gender, pd.ac_available, pd.sharing, pd.food_included, pd.laundry
-            FROM house_listings hl
-            JOIN provider_profiles pp ON hl.provider_id = pp.id
-            JOIN users u ON pp.user_id = u.id
-            LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-            JOIN pg_details pd ON hl.id = pd.listing_id
-            WHERE hl.id = :listing_id
-            AND hl.type = 'PG'
-            AND hl.status = 'approved'
-        """)
-        
-        result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
-        
-        if not result:
-            return jsonify({'success': False, 'message': 'Listing not found'}), 404
-        
-                          
-        images_query = text("""
-            SELECT image_path
-            FROM house_images
-            WHERE listing_id = :listing_id
-            ORDER BY created_at ASC
-        """)
-        images = db.session.execute(images_query, {'listing_id': listing_id}).fetchall()
-        image_list = [row[0] for row in images]
-        
-        return jsonify({
-            'success': True,
-            'listing': {
-                'id': result[0],
-                'title': result[1],
-                'description': result[2] or '',
-                'price': float(result[3]),
-                'location': result[4],
-                'type': result[5],
-                'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
-                'images': image_list,
-                'gender': result[13],
-                'ac_available': result[14],
-                'sharing': result[15],
-                'food_included': result[16],
-                'laundry': result[17]
-            },
-            'provider': {
-                'business_name': result[8],
-                'verification_status': result[9],
-                'phone': result[10],
-                'email': result[11],
-                'profile_pic': result[12]
-            }
-        }), 200
-        
+        return _cached_detail_response('pg', 'house', listing_id, _load_pg_detail, 'Listing not found')
     except Exception as e:
         print(f"Error fetching PG details: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+
 @customer_bp.route('/housing/pg/<int:listing_id>/save', methods=['POST'])
 def save_pg(listing_id):
     """Save a PG listing for the current customer"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    return _save_listing('house', listing_id, {
+        'saved': 'PG saved successfully',
+        'already_saved': 'PG already saved',
+        'not_found': 'Listing not found or not available'
+    }, listing_type='PG')
 
-    try:
-                                                       
-        listing = HouseListing.query.filter_by(id=listing_id, type='PG', status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Listing not found or not available'}), 404
-
-                                   
-        existing_save = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        if existing_save:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'PG already saved'}), 200
-
-                            
-        new_save = SavedHouse(customer_id=user.id, house_listing_id=listing_id)
-        db.session.add(new_save)
-        db.session.commit()
-        
-        return jsonify({'success': True, 'message': 'PG saved successfully'}), 200
-
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving PG: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/housing/pg/<int:listing_id>/unsave', methods=['DELETE'])
 def unsave_pg(listing_id):
     """Remove a saved PG listing for the current customer"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    
-    try:
-                          
-        save_entry = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        
-        if save_entry:
-            db.session.delete(save_entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'PG removed from saved list'}), 200
-        else:
-            return jsonify({'success': True, 'removed': False, 'message': 'PG was not saved'}), 200
+    return _unsave_listing('house', listing_id, {
+        'removed': 'PG removed from saved list',
+        'not_saved': 'PG was not saved'
+    })
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving PG: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/housing/pg/<int:listing_id>/is-saved', methods=['GET'])
+@read_only
 def is_pg_saved(listing_id):
     """Check if a PG is saved by the current customer"""
     from flask import jsonify
@@ -697,7 +697,7 @@ def is_pg_saved(listing_id):
         return jsonify({'saved': False}), 200
     
     try:
-        exists = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first() is not None
+        exists = listing_id in _saved_ids(user, 'house')
         return jsonify({'saved': exists}), 200
         
     except Exception as e:
@@ -708,9 +708,8 @@ def is_pg_saved(listing_id):
                           
 
 @customer_bp.route('/housing/apartment')
+@read_only
 def browse_apartments():
-    from flask import request
-    
     user = get_current_user()
     if not user:
         return redirect('/login')
@@ -719,244 +718,118 @@ def browse_apartments():
 
     username = user.username
 
-                              
-    search_location = request.args.get('location', '').strip()
-    search_budget = request.args.get('budget', '').strip()
-    filter_listing_purpose = request.args.get('listing_purpose', '').strip()
-    filter_bhk = request.args.get('bhk', '').strip()
-    filter_tenant_preference = request.args.get('tenant_preference', '').strip()
-    filter_furnishing = request.args.get('furnishing', '').strip()
-
-                                                        
-    base_query = """
-        SELECT hl.*, 
-               ad.listing_purpose, ad.bhk, ad.tenant_preference, ad.furnishing,
-               (SELECT image_path 
-                FROM house_images 
-                WHERE listing_id = hl.id 
-                ORDER BY created_at ASC 
-                LIMIT 1) AS main_image
-        FROM house_listings hl
-        JOIN apartment_details ad ON hl.id = ad.listing_id
-        WHERE hl.type = 'Apartment'
-        AND hl.status = 'approved'
-    """
-    
-    params = {}
-    
-                     
-    if search_location:
-        base_query += " AND LOWER(hl.location) LIKE LOWER(:location)"
-        params['location'] = f"%{search_location}%"
-    
-                   
-    if search_budget == '1':
-        base_query += " AND hl.price >= 0 AND hl.price <= 5000"
-    elif search_budget == '2':
-        base_query += " AND hl.price > 5000 AND hl.price <= 10000"
-    elif search_budget == '3':
-        base_query += " AND hl.price > 10000 AND hl.price <= 15000"
-    elif search_budget == '4':
-        base_query += " AND hl.price > 15000"
-    
-                               
-    if filter_listing_purpose and filter_listing_purpose in ('rent', 'sale'):
-        base_query += " AND ad.listing_purpose = :filter_listing_purpose"
-        params['filter_listing_purpose'] = filter_listing_purpose
-    if filter_bhk and filter_bhk in ('1', '2', '3', '4+'):
-        base_query += " AND ad.bhk = :filter_bhk"
-        params['filter_bhk'] = filter_bhk
-    if filter_tenant_preference and filter_tenant_preference in ('family', 'bachelor', 'any'):
-        base_query += " AND ad.tenant_preference = :filter_tenant_preference"
-        params['filter_tenant_preference'] = filter_tenant_preference
-    if filter_furnishing and filter_furnishing in ('furnished', 'semi', 'unfurnished'):
-        base_query += " AND ad.furnishing = :filter_furnishing"
-        params['filter_furnishing'] = filter_furnishing
-    
-    base_query += " ORDER BY hl.created_at DESC"
-    
-    results = db.session.execute(text(base_query), params).fetchall()
-    
-    saved_house_ids = set()
-    if user and user.account_type == 'customer':
-        try:
-            saved = SavedHouse.query.filter_by(customer_id=user.id).all()
-            saved_house_ids = {s.house_listing_id for s in saved}
-        except Exception:
-            pass
-    
-    listings_data = []
-    for row in results:
-        image_path = row[-1] if row[-1] else 'placeholder.jpg'
-        listing_purpose = row[-5]
-        bhk = row[-4]
-        tenant_preference = row[-3]
-        furnishing = row[-2]
-        
-        listings_data.append({
-            'id': row[0],
-            'title': row[2],
-            'description': row[3] or '',
-            'price': row[4],
-            'location': row[5],
-            'image_path': image_path,
-            'listing_purpose': listing_purpose,
-            'bhk': bhk,
-            'tenant_preference': tenant_preference,
-            'furnishing': furnishing
-        })
-        
+    spec = parse_filters('apartment', request.args)
+    listings_data = search_housing('apartment', spec)
+    facets = facet_counts('apartment', spec)
+
     return render_template(
-        'housing/apartment/apartment.html', 
-        username=username, 
+        'housing/apartment/apartment.html',
+        username=username,
         listings=listings_data,
-        saved_house_ids=saved_house_ids,
-        search_location=search_location,
-        search_budget=search_budget,
-        filter_listing_purpose=filter_listing_purpose,
-        filter_bhk=filter_bhk,
-        filter_tenant_preference=filter_tenant_preference,
-        filter_furnishing=filter_furnishing
+        saved_house_ids=_saved_house_ids(user),
+        facets=facets,
+        search_location=spec['location'],
+        search_budget=spec['budget'],
+        min_price=spec['min_price'],
+        max_price=spec['max_price'],
+        sort=spec['sort'],
+        filter_listing_purpose=request.args.get('listing_purpose', '').strip(),
+        filter_bhk=request.args.get('bhk', '').strip(),
+        filter_tenant_preference=request.args.get('tenant_preference', '').strip(),
+        filter_furnishing=request.args.get('furnishing', '').strip()
     )
 
 
-@customer_bp.route('/housing/apartment/<int:listing_id>/details')
-def apartment_details(listing_id):
-    """Return JSON details for a specific Apartment listing"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
-    try:
-                                                                           
-        query = text("""
-            SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
-                   hl.status, hl.created_at,
-                   pp.business_name, pp.verification_status,
-                   u.phone, u.email,
-                   ppic.image_path AS provider_profile_pic,
-                   ad.listing_purpose, ad.bhk, ad.tenant_preference, ad.furnishing
-            FROM house_listings hl
-            JOIN provider_profiles pp ON hl.provider_id = pp.id
-            JOIN users u ON pp.user_id = u.id
-            LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-            JOIN apartment_details ad ON hl.id = ad.listing_id
-            WHERE hl.id = :listing_id
-            AND hl.type = 'Apartment'
-            AND hl.status = 'approved'
-        """)
-        
-        result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
-        
-        if not result:
-            return jsonify({'success': False, 'message': 'Listing not found'}), 404
-        
-                          
-        images_query = text("""
-            SELECT image_path
-            FROM house_images
-            WHERE listing_id = :listing_id
-            ORDER BY created_at ASC
-        """)
-        images = db.session.execute(images_query, {'listing_id': listing_id}).fetchall()
-        image_list = [row[0] for row in images]
-        
-        return jsonify({
-            'success': True,
-            'listing': {
-                'id': result[0],
-                'title': result[1],
-                'description': result[2] or '',
-                'price': float(result[3]),
-                'location': result[4],
-                'type': result[5],
-                'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
-                'images': image_list,
-                'listing_purpose': result[13],
-                'bhk': result[14],
-                'tenant_preference': result[15],
-                'furnishing': result[16]
-            },
-            'provider': {
-                'business_name': result[8],
-                'verification_status': result[9],
-                'phone': result[10],
-                'email': result[11],
-                'profile_pic': result[12]
-            }
-        }), 200
-        
-    except Exception as e:
-        print(f"Error fetching Apartment details: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
+def _load_apartment_detail(listing_id):
+    query = text("""
+        SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
+               hl.status, hl.created_at,
+               pp.business_name, pp.verification_status,
+               u.phone, u.email,
+               ppic.image_path AS provider_profile_pic,
+               ad.listing_purpose, ad.bhk, ad.tenant_preference, ad.furnishing
+        FROM house_listings hl
+        JOIN provider_profiles pp ON hl.provider_id = pp.id
+        JOIN users u ON pp.user_id = u.id
+        LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
+        JOIN apartment_details ad ON hl.id = ad.listing_id
+        WHERE hl.id = :listing_id
+        AND hl.type = 'Apartment'
+        AND hl.status = 'approved'
+    """)
 
+    result = db.session.execute(query, {'listing_id': listing_id}).fetchone()
+    if not result:
+        return None
 
-@customer_bp.route('/housing/apartment/<int:listing_id>/save', methods=['POST'])
-def save_apartment(listing_id):
-    """Save an Apartment listing for the current customer"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
+    return {
+        'success': True,
+        'listing': {
+            'id': result[0],
+            'title': result[1],
+            'description': result[2] or '',
+            'price': float(result[3]),
+            'location': result[4],
+            'type': result[5],
+            'created_at': result[7].strftime('%B %d, %Y') if result[7] else None,
+            'images': _house_image_urls(listing_id),
+            'listing_purpose': result[13],
+            'bhk': result[14],
+            'tenant_preference': result[15],
+            'furnishing': result[16]
+        },
+        'provider': {
+            'business_name': result[8],
+            'verification_status': result[9],
+            'phone': result[10],
+            'email': result[11],
+            'profile_pic': result[12]
+        }
+    }
+
+
+@customer_bp.route('/housing/apartment/<int:listing_id>/details')
+@read_only
+def apartment_details(listing_id):
+    """Return JSON details for a specific Apartment listing"""
+    account_type = _session_account_type()
+    if not account_type:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
+    if account_type != 'customer':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
     try:
-                                                              
-        listing = HouseListing.query.filter_by(id=listing_id, type='Apartment', status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Listing not found or not available'}), 404
+        return _cached_detail_response('apartment', 'house', listing_id, _load_apartment_detail, 'Listing not found')
+    except Exception as e:
+        print(f"Error fetching Apartment details: {e}")
+        return jsonify({'success': False, 'message': 'Server error'}), 500
 
-                                   
-        existing_save = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        if existing_save:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Apartment already saved'}), 200
 
-                            
-        new_save = SavedHouse(customer_id=user.id, house_listing_id=listing_id)
-        db.session.add(new_save)
-        db.session.commit()
-        
-        return jsonify({'success': True, 'message': 'Apartment saved successfully'}), 200
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving Apartment: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
+@customer_bp.route('/housing/apartment/<int:listing_id>/save', methods=['POST'])
+def save_apartment(listing_id):
+    """Save an apartment listing for the current customer"""
+    return _save_listing('house', listing_id, {
+        'saved': 'Apartment saved successfully',
+        'already_saved': 'Apartment already saved',
+        'not_found': 'Listing not found or not available'
+    }, listing_type='Apartment')
+
 
 
 @customer_bp.route('/housing/apartment/<int:listing_id>/unsave', methods=['DELETE'])
 def unsave_apartment(listing_id):
-    """Remove a saved Apartment listing for the current customer"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    
-    try:
-                          
-        save_entry = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first()
-        
-        if save_entry:
-            db.session.delete(save_entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'Apartment removed from saved list'}), 200
-        else:
-            return jsonify({'success': True, 'removed': False, 'message': 'Apartment was not saved'}), 200
+    """Remove a saved apartment listing for the current customer"""
+    return _unsave_listing('house', listing_id, {
+        'removed': 'Apartment removed from saved list',
+        'not_saved': 'Apartment was not saved'
+    })
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving Apartment: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/housing/apartment/<int:listing_id>/is-saved', methods=['GET'])
+@read_only
 def is_apartment_saved(listing_id):
     """Check if an Apartment is saved by the current customer"""
     from flask import jsonify
@@ -966,7 +839,7 @@ def is_apartment_saved(listing_id):
         return jsonify({'saved': False}), 200
 
     try:
-        exists = SavedHouse.query.filter_by(customer_id=user.id, house_listing_id=listing_id).first() is not None
+        exists = listing_id in _saved_ids(user, 'house')
         return jsonify({'saved': exists}), 200
 
     except Exception as e:
@@ -977,6 +850,7 @@ def is_apartment_saved(listing_id):
                          
 
 @customer_bp.route('/services')
+@read_only
 def browse_services():
     user = get_current_user()
     if not user:
@@ -986,137 +860,113 @@ def browse_services():
 
     username = user.username
     search_query = request.args.get('q', '').strip()
+    address = _default_address_or_none(user) if request.args.get('near') == '1' else None
+    near, near_unavailable = _near_filter(address)
+    day = request.args.get('day', '').strip().lower()
+    weekday = parse_day_filter(day)
+    category = parse_service_category(request.args.get('category'))
+    before = request.args.get('before', '').strip()
+    cursor = parse_service_cursor(before)
 
-    base_query = """
-        SELECT sl.id, sl.provider_id, sl.service_category, sl.service_title, sl.description,
-               sl.base_price, sl.service_radius, sl.availability_days,
-               pp.business_name,
-               ppic.image_path AS provider_image
-        FROM service_listings sl
-        JOIN provider_profiles pp ON sl.provider_id = pp.id
-        LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-        WHERE sl.status = 'approved'
-    """
-    params = {}
-
-    if search_query:
-        base_query += " AND (LOWER(sl.service_title) LIKE LOWER(:search_query))"
-        params['search_query'] = f"%{search_query}%"
-
-    base_query += " ORDER BY sl.created_at DESC"
-
-    results = db.session.execute(text(base_query), params).fetchall()
-
-    saved_ids = set()
-    if user:
-        saved = SavedService.query.filter_by(customer_id=user.id).all()
-        saved_ids = {s.service_listing_id for s in saved}
+    customer_id = user.id if near else None
+    services, next_cursor = services_page(category, search_query, weekday, customer_id, cursor)
+    counts = category_counts(search_query, weekday, customer_id)
 
-    listings_data = []
-    for row in results:
-        listings_data.append({
-            'id': row[0],
-            'provider_id': row[1],
-            'service_category': row[2],
-            'service_title': row[3],
-            'description': row[4] or '',
-            'base_price': float(row[5]) if row[5] else 0,
-            'service_radius': float(row[6]) if row[6] else 0,
-            'availability_days': row[7] or '',
-            'business_name': row[8],
-            'provider_image': row[9],
-            'is_saved': row[0] in saved_ids
-        })
+    saved_ids = _saved_ids(user, 'service')
+    listings_data = [dict(service, is_saved=service['id'] in saved_ids) for service in services]
 
     return render_template(
         'services/services.html',
         username=username,
         listings=listings_data,
-        search_query=search_query
+        search_query=search_query,
+        near=near,
+        near_unavailable=near_unavailable,
+        day=day if weekday is not None else '',
+        weekdays=WEEKDAYS,
+        category=category,
+        categories=SERVICE_CATEGORIES,
+        counts=counts,
+        next_cursor=next_cursor,
+        before=before if cursor else ''
     )
 
 
+
 @customer_bp.route('/services/<int:service_id>/save', methods=['POST'])
 def save_service(service_id):
-    from flask import jsonify
+    """Save a service listing for the current customer"""
+    return _save_listing('service', service_id, {
+        'saved': 'Service saved successfully',
+        'already_saved': 'Service already saved',
+        'not_found': 'Listing not found or not available'
+    })
 
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
-    try:
-        listing = ServiceListing.query.filter_by(id=service_id, status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Listing not found or not available'}), 404
-
-        existing_save = SavedService.query.filter_by(customer_id=user.id, service_listing_id=service_id).first()
-        if existing_save:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Service already saved'}), 200
-
-        new_save = SavedService(customer_id=user.id, service_listing_id=service_id)
-        db.session.add(new_save)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Service saved successfully'}), 200
-
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving service: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/services/<int:service_id>/unsave', methods=['DELETE'])
 def unsave_service(service_id):
-    from flask import jsonify
-
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-
-    try:
-        save_entry = SavedService.query.filter_by(customer_id=user.id, service_listing_id=service_id).first()
-        if save_entry:
-            db.session.delete(save_entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'Service removed from saved list'}), 200
-        else:
-            return jsonify({'success': True, 'removed': False, 'message': 'Service was not saved'}), 200
+    """Remove a saved service listing for the current customer"""
+    return _unsave_listing('service', service_id, {
+        'removed': 'Service removed from saved list',
+        'not_saved': 'Service was not saved'
+    })
 
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving service: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/services/<int:service_id>/is-saved', methods=['GET'])
+@read_only
 def is_service_saved(service_id):
     user = get_current_user()
     if not user:
         return jsonify({'saved': False}), 200
 
     try:
-        exists = SavedService.query.filter_by(customer_id=user.id, service_listing_id=service_id).first() is not None
+        exists = service_id in _saved_ids(user, 'service')
         return jsonify({'saved': exists}), 200
     except Exception as e:
         print(f"Error checking saved status: {e}")
         return jsonify({'saved': False}), 200
 
 
-@customer_bp.route('/services/<int:service_id>/book', methods=['POST'])
-def book_service(service_id):
-    """Create a service booking for the current customer"""
+@customer_bp.route('/services/<int:service_id>/slots', methods=['GET'])
+@read_only
+def get_service_slots(service_id):
+    """Free booking slots of an approved service for ?from=&to= (YYYY-MM-DD, default next 7 days)"""
     user = get_current_user()
     if not user:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
     try:
+        date_range = parse_slot_range(request.args.get('from'), request.args.get('to'))
+        if date_range is None:
+            return jsonify({'success': False, 'message': f'Invalid date range (at most {SLOTS_MAX_DAYS} days)'}), 400
+
         listing = ServiceListing.query.filter_by(id=service_id, status='approved').first()
         if not listing:
             return jsonify({'success': False, 'message': 'Service not found or not available'}), 404
 
+        return jsonify({
+            'success': True,
+            'slot_minutes': listing.slot_minutes,
+            'days': free_slots(listing, *date_range)
+        }), 200
+
+    except Exception as e:
+        print(f"Error fetching service slots: {e}")
+        return jsonify({'success': False, 'message': 'Server error'}), 500
+
+
+@customer_bp.route('/services/<int:service_id>/book', methods=['POST'])
+def book_service(service_id):
+    """Create a service booking for the current customer in a free slot"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+    if user.account_type != 'customer':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    try:
         data = request.get_json() or {}
         booking_date = data.get('booking_date', '').strip()
         booking_time_str = data.get('booking_time', '').strip()
@@ -1137,12 +987,21 @@ def book_service(service_id):
         except ValueError:
             return jsonify({'success': False, 'message': 'Invalid booking date format'}), 400
 
-        try:
-            t = datetime.strptime(booking_time_str, '%H:%M')
-            booking_time_obj = t.time()
-        except ValueError:
+        booking_time_obj = parse_slot_time(booking_time_str)
+        if booking_time_obj is None:
             return jsonify({'success': False, 'message': 'Invalid booking time format'}), 400
 
+        # Lock the listing row so concurrent bookings for it check their slot one at a time
+        listing = ServiceListing.query.filter_by(id=service_id, status='approved').with_for_update().first()
+        if not listing:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Service not found or not available'}), 404
+
+        slot_error = booking_slot_error(listing, booking_date_obj, booking_time_obj)
+        if slot_error:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': slot_error}), 409
+
         quoted_price = float(listing.base_price) if listing.base_price else 0
 
         new_booking = ServiceBooking(
@@ -1157,6 +1016,8 @@ def book_service(service_id):
         )
         db.session.add(new_booking)
         db.session.commit()
+        bump_version(f"bookings:{user.id}")
+        bump_version(f"service:{service_id}")
 
         return jsonify({'success': True, 'message': 'Service booked successfully'}), 200
 
@@ -1166,6 +1027,7 @@ def book_service(service_id):
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+
 @customer_bp.route('/services/bookings')
 def service_bookings():
     """My Service Bookings page for the logged-in customer"""
@@ -1209,7 +1071,25 @@ def service_bookings():
 
                        
 
+def _default_address_or_none(user):
+    try:
+        return default_address(user.id)
+    except Exception as e:
+        print(f"Error fetching default address: {e}")
+        return None
+
+
+def _near_filter(address):
+    """(near, near_unavailable) for ?near=1; without a located default address the full list is shown"""
+    if request.args.get('near') != '1':
+        return False, False
+    if has_coordinates(address):
+        return True, False
+    return False, True
+
+
 @customer_bp.route('/tiffin')
+@read_only
 def browse_tiffins():
     user = get_current_user()
     if not user:
@@ -1221,46 +1101,56 @@ def browse_tiffins():
 
                                                                   
     search_location = request.args.get('location', '').strip()
-
-    base_query = """
+    address = _default_address_or_none(user)
+    near, near_unavailable = _near_filter(address)
+    day = request.args.get('day', '').strip().lower()
+    weekday = parse_day_filter(day)
+
+    distance_column = f", {distance_km_sql('tl')} AS distance_km" if near else ""
+    address_join = "CROSS JOIN addr" if near else ""
+    main_image = "tl.main_image" if use_catalogue_views() else """(SELECT image_path
+                FROM tiffin_images
+                WHERE tiffin_listing_id = tl.id
+                ORDER BY created_at ASC
+                LIMIT 1) AS main_image"""
+
+    base_query = f"""
         SELECT tl.id, tl.delivery_radius, tl.fast_delivery_available, tl.diet_type, tl.available_days,
-               pp.business_name,
-               (SELECT image_path 
-                FROM tiffin_images 
-                WHERE tiffin_listing_id = tl.id 
-                ORDER BY created_at ASC 
-                LIMIT 1) AS main_image
-        FROM tiffin_listings tl
-        JOIN provider_profiles pp ON tl.provider_id = pp.id
+               tl.provider_name, tl.provider_status,
+               {main_image}
+               {distance_column}
+        FROM {catalogue_source('kitchen', 'tiffin_listings', 'tl')}
+        {address_join}
         WHERE tl.status = 'approved'
         AND tl.kitchen_open = TRUE
     """
     
     params = {}
 
+    # Only kitchens whose delivery radius covers the customer's default address
+    if near:
+        base_query = DEFAULT_ADDRESS_CTE + base_query
+        base_query += " AND " + " AND ".join(within_radius_conditions('tl', 'delivery_radius'))
+        params['customer_id'] = user.id
+
                                                                                              
     if search_location:
-        base_query += " AND LOWER(pp.business_name) LIKE LOWER(:search_name)"
+        base_query += " AND LOWER(tl.provider_name) LIKE LOWER(:search_name)"
         params['search_name'] = f"%{search_location}%"
 
-    base_query += " ORDER BY tl.created_at DESC"
+    if weekday is not None:
+        base_query += " AND " + available_on_condition('tl')
+        params['day_bit'] = day_bit(weekday)
+
+    base_query += " ORDER BY distance_km ASC" if near else " ORDER BY tl.created_at DESC"
     
     results = db.session.execute(text(base_query), params).fetchall()
     
-    saved_kitchen_ids = set()
-    try:
-        saved_rows = db.session.execute(text("""
-            SELECT tiffin_listing_id
-            FROM saved_restaurants
-            WHERE customer_id = :customer_id
-        """), {'customer_id': user.id}).fetchall()
-        saved_kitchen_ids = {row[0] for row in saved_rows}
-    except Exception as e:
-        print(f"Error fetching saved restaurants ids: {e}")
+    saved_kitchen_ids = _saved_ids(user, 'kitchen')
     
     listings_data = []
     for row in results:
-        image_path = row[6] if row[6] else 'placeholder.jpg'
+        image_path = variant_url(row[7], 'card') if row[7] else 'placeholder.jpg'
         kitchen_id = row[0]
         listings_data.append({
             'id': kitchen_id,
@@ -1269,140 +1159,112 @@ def browse_tiffins():
             'diet_type': row[3],
             'available_days': row[4],
             'business_name': row[5],
+            'provider_verified': row[6] == 'verified',
             'image_path': image_path,
+            'distance_km': round(float(row[8]), 1) if near else None,
+            'remaining_slots': remaining_slots(kitchen_id),
             'is_saved': kitchen_id in saved_kitchen_ids
         })
         
-                                                       
-    default_address = ''
-    try:
-        addr_row = db.session.execute(text("""
-            SELECT address_line
-            FROM customer_addresses
-            WHERE customer_id = :customer_id
-            ORDER BY is_default DESC, created_at DESC
-            LIMIT 1
-        """), {'customer_id': user.id}).fetchone()
-        if addr_row and addr_row[0]:
-            default_address = addr_row[0]
-    except Exception as e:
-                                                                                    
-        print(f"Error fetching default address: {e}")
-
     return render_template(
         'tiffin/tiffin.html',
         username=username,
         listings=listings_data,
         search_location=search_location,
-        default_address=default_address
+        near=near,
+        near_unavailable=near_unavailable,
+        day=day if weekday is not None else '',
+        weekdays=WEEKDAYS,
+        default_address=address['address_line'] if address else ''
     )
 
 
+def _load_tiffin_detail(tiffin_id):
+    query = text("""
+        SELECT tl.id, tl.delivery_radius, tl.fast_delivery_available, tl.diet_type, 
+               tl.available_days, tl.created_at,
+               pp.business_name, pp.verification_status,
+               u.phone, u.email,
+               ppic.image_path AS provider_profile_pic
+        FROM tiffin_listings tl
+        JOIN provider_profiles pp ON tl.provider_id = pp.id
+        JOIN users u ON pp.user_id = u.id
+        LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
+        WHERE tl.id = :tiffin_id
+        AND tl.status = 'approved'
+        AND tl.kitchen_open = TRUE
+    """)
+
+    result = db.session.execute(query, {'tiffin_id': tiffin_id}).fetchone()
+    if not result:
+        return None
+
+    images_query = text("""
+        SELECT image_path
+        FROM tiffin_images
+        WHERE tiffin_listing_id = :tiffin_id
+        ORDER BY created_at ASC
+    """)
+    images = db.session.execute(images_query, {'tiffin_id': tiffin_id}).fetchall()
+    image_list = [variant_url(row[0], 'full') for row in images]
+
+    return {
+        'success': True,
+        'listing': {
+            'id': result[0],
+            'delivery_radius': float(result[1]) if result[1] else 0,
+            'fast_delivery_available': result[2],
+            'diet_type': result[3],
+            'available_days': result[4],
+            'created_at': result[5].strftime('%B %d, %Y') if result[5] else None,
+            'images': image_list
+        },
+        'provider': {
+            'business_name': result[6],
+            'verification_status': result[7],
+            'phone': result[8],
+            'email': result[9],
+            'profile_pic': result[10]
+        }
+    }
+
+
 @customer_bp.route('/tiffin/<int:tiffin_id>/details')
+@read_only
 def tiffin_details(tiffin_id):
     """Return JSON details for a specific Tiffin Kitchen"""
-    from flask import jsonify
-    
-    user = get_current_user()
-    if not user:
+    if not _session_account_type():
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    
+
     try:
-                                                       
-        query = text("""
-            SELECT tl.id, tl.delivery_radius, tl.fast_delivery_available, tl.diet_type, 
-                   tl.available_days, tl.created_at,
-                   pp.business_name, pp.verification_status,
-                   u.phone, u.email,
-                   ppic.image_path AS provider_profile_pic
-            FROM tiffin_listings tl
-            JOIN provider_profiles pp ON tl.provider_id = pp.id
-            JOIN users u ON pp.user_id = u.id
-            LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-            WHERE tl.id = :tiffin_id
-            AND tl.status = 'approved'
-            AND tl.kitchen_open = TRUE
-        """)
-        
-        result = db.session.execute(query, {'tiffin_id': tiffin_id}).fetchone()
-        
-        if not result:
-            return jsonify({'success': False, 'message': 'Kitchen not found or closed'}), 404
-        
-                          
-        images_query = text("""
-            SELECT image_path
-            FROM tiffin_images
-            WHERE tiffin_listing_id = :tiffin_id
-            ORDER BY created_at ASC
-        """)
-        images = db.session.execute(images_query, {'tiffin_id': tiffin_id}).fetchall()
-        image_list = [row[0] for row in images]
-        
-        return jsonify({
-            'success': True,
-            'listing': {
-                'id': result[0],
-                'delivery_radius': float(result[1]) if result[1] else 0,
-                'fast_delivery_available': result[2],
-                'diet_type': result[3],
-                'available_days': result[4],
-                'created_at': result[5].strftime('%B %d, %Y') if result[5] else None,
-                'images': image_list
-            },
-            'provider': {
-                'business_name': result[6],
-                'verification_status': result[7],
-                'phone': result[8],
-                'email': result[9],
-                'profile_pic': result[10]
-            }
-        }), 200
-        
+        return _cached_detail_response('tiffin', 'tiffin', tiffin_id, _load_tiffin_detail, 'Kitchen not found or closed')
     except Exception as e:
         print(f"Error fetching Tiffin details: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+
 @customer_bp.route('/tiffin/<int:tiffin_id>/meals')
+@read_only
 def get_tiffin_meals(tiffin_id):
     """Return JSON list of available meals for a Tiffin Kitchen"""
-    from flask import jsonify
-    
     user = get_current_user()
     if not user:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
     
     try:
-        query = text("""
-            SELECT id, meal_name, meal_category, diet_type, price, description, meal_image_path
-            FROM meals
-            WHERE tiffin_listing_id = :tiffin_id
-            AND is_available = TRUE
-            ORDER BY created_at DESC
-        """)
+        document = menu_document(tiffin_id)
+        if document is None:
+            return jsonify({'success': True, 'meals': []}), 200
         
-        results = db.session.execute(query, {'tiffin_id': tiffin_id}).fetchall()
-        
-        meals_data = []
-        for row in results:
-            meals_data.append({
-                'id': row[0],
-                'meal_name': row[1],
-                'meal_category': row[2],
-                'diet_type': row[3],
-                'price': float(row[4]),
-                'description': row[5] or '',
-                'image_path': row[6] if row[6] else 'placeholder.jpg'
-            })
-            
-        return jsonify({'success': True, 'meals': meals_data}), 200
+        return etag_json_response({'success': True, 'meals': customer_menu(document)}, document['etag'])
         
     except Exception as e:
         print(f"Error fetching meals: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+
 @customer_bp.route('/meals/<int:meal_id>/order', methods=['POST'])
 def order_meal(meal_id):
     """Create an order for a meal (customer only)"""
@@ -1427,48 +1289,14 @@ def order_meal(meal_id):
     if not delivery_address:
         return jsonify({'success': False, 'message': 'Delivery address is required'}), 400
 
-                                                   
-    meal = Meal.query.get(meal_id)
-    if not meal:
-        return jsonify({'success': False, 'message': 'Meal not found'}), 404
-
-    if not meal.is_available:
-        return jsonify({'success': False, 'message': 'Meal is currently unavailable'}), 400
-
-    listing = TiffinListing.query.filter_by(
-        id=meal.tiffin_listing_id,
-        status='approved',
-        kitchen_open=True
-    ).first()
-
-    if not listing:
-        return jsonify({'success': False, 'message': 'Kitchen is closed or not approved'}), 400
-
-                                                       
-    fast_delivery = fast_delivery_requested and bool(listing.fast_delivery_available)
-
-    from decimal import Decimal
-    base_price = Decimal(str(meal.price))
-    fast_delivery_charge = Decimal('20.00') if fast_delivery else Decimal('0.00')
-    total_price = (base_price * Decimal(quantity)) + fast_delivery_charge
-
     try:
-        new_order = Order(
-            customer_id=user.id,
-            tiffin_listing_id=meal.tiffin_listing_id,
-            meal_id=meal.id,
-            quantity=quantity,
-            base_price=base_price,
-            fast_delivery=fast_delivery,
-            fast_delivery_charge=fast_delivery_charge,
-            total_price=total_price,
-            delivery_address=delivery_address,
-            order_status='placed'
-        )
-        db.session.add(new_order)
-        db.session.commit()
+        order_id, error = place_order(user.id, meal_id, quantity, fast_delivery_requested, delivery_address)
+        if error:
+            message, status_code = error
+            return jsonify({'success': False, 'message': message}), status_code
 
-        return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': new_order.id}), 200
+        bump_version(f"orders:{user.id}")
+        return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': order_id}), 200
 
     except Exception as e:
         db.session.rollback()
@@ -1476,53 +1304,61 @@ def order_meal(meal_id):
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
-@customer_bp.route('/save/kitchen/<int:kitchen_id>', methods=['POST'])
-def save_kitchen(kitchen_id):
-    """Save a kitchen (tiffin listing) for the current customer"""
+
+@customer_bp.route('/tiffin/<int:tiffin_id>/checkout', methods=['POST'])
+def checkout_cart(tiffin_id):
+    """Order several meals from one kitchen at once (customer only)"""
     user = get_current_user()
     if not user:
         return jsonify({'success': False, 'message': 'Not authenticated'}), 401
     if user.account_type != 'customer':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
 
-    try:
-        listing = TiffinListing.query.filter_by(id=kitchen_id, status='approved').first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Kitchen not found or not available'}), 404
+    data = request.get_json() or {}
 
-        existing = SavedKitchen.query.filter_by(customer_id=user.id, tiffin_listing_id=kitchen_id).first()
-        if existing:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Kitchen already saved'}), 200
+    cart = parse_cart(data.get('items'))
+    delivery_address = (data.get('delivery_address') or '').strip()
+    fast_delivery_requested = bool(data.get('fast_delivery'))
 
-        new_save = SavedKitchen(customer_id=user.id, tiffin_listing_id=kitchen_id)
-        db.session.add(new_save)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Kitchen saved successfully'}), 200
+    if cart is None:
+        return jsonify({'success': False, 'message': f'Cart must hold 1 to {CART_MAX_ITEMS} meals, each with a quantity of at least 1'}), 400
+    if not delivery_address:
+        return jsonify({'success': False, 'message': 'Delivery address is required'}), 400
+
+    try:
+        checkout, error = place_cart_order(user.id, tiffin_id, cart, fast_delivery_requested, delivery_address)
+        if error:
+            message, status_code = error
+            return jsonify({'success': False, 'message': message}), status_code
+
+        bump_version(f"orders:{user.id}")
+        return jsonify({'success': True, 'message': 'Order placed successfully', **checkout}), 200
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error saving kitchen: {e}")
+        print(f"Error checking out cart: {e}")
         return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
+@customer_bp.route('/save/kitchen/<int:kitchen_id>', methods=['POST'])
+def save_kitchen(kitchen_id):
+    """Save a kitchen (tiffin listing) for the current customer"""
+    return _save_listing('kitchen', kitchen_id, {
+        'saved': 'Kitchen saved successfully',
+        'already_saved': 'Kitchen already saved',
+        'not_found': 'Kitchen not found or not available'
+    })
+
+
+
 @customer_bp.route('/save/kitchen/<int:kitchen_id>', methods=['DELETE'])
 def unsave_kitchen(kitchen_id):
     """Remove a saved kitchen for the current customer"""
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+    return _unsave_listing('kitchen', kitchen_id, {
+        'removed': 'Kitchen removed from saved',
+        'not_saved': 'Kitchen was not saved'
+    })
 
-    try:
-        entry = SavedKitchen.query.filter_by(customer_id=user.id, tiffin_listing_id=kitchen_id).first()
-        if entry:
-            db.session.delete(entry)
-            db.session.commit()
-            return jsonify({'success': True, 'removed': True, 'message': 'Kitchen removed from saved'}), 200
-        return jsonify({'success': True, 'removed': False, 'message': 'Kitchen was not saved'}), 200
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving kitchen: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/orders')
@@ -1534,45 +1370,36 @@ def my_orders():
     if user.account_type != 'customer':
         return redirect('/')
 
-    query = text("""
-        SELECT o.*,
-               m.meal_name,
-               m.diet_type,
-               m.meal_category,
-               pp.business_name,
-               u.phone AS provider_phone
-        FROM orders o
-        JOIN meals m ON o.meal_id = m.id
-        JOIN tiffin_listings tl ON o.tiffin_listing_id = tl.id
-        JOIN provider_profiles pp ON tl.provider_id = pp.id
-        JOIN users u ON pp.user_id = u.id
-        WHERE o.customer_id = :customer_id
-        ORDER BY o.order_date DESC
-    """)
+    before = request.args.get('before', '')
+    orders_data, next_cursor = orders_page(user.id, parse_order_cursor(before))
+    _, updates_since = order_updates(user.id, None)
 
-    results = db.session.execute(query, {'customer_id': user.id}).mappings().all()
-
-    orders_data = []
-    for r in results:
-        order_date = r.get('order_date')
-        orders_data.append({
-            'id': r.get('id'),
-            'quantity': r.get('quantity'),
-            'base_price': float(r.get('base_price') or 0),
-            'fast_delivery': bool(r.get('fast_delivery')),
-            'fast_delivery_charge': float(r.get('fast_delivery_charge') or 0),
-            'total_price': float(r.get('total_price') or 0),
-            'order_status': r.get('order_status'),
-            'delivery_address': r.get('delivery_address') or '',
-            'order_date': order_date.strftime('%B %d, %Y %I:%M %p') if order_date else '',
-            'meal_name': r.get('meal_name'),
-            'diet_type': r.get('diet_type'),
-            'meal_category': r.get('meal_category'),
-            'provider_business_name': r.get('business_name'),
-            'provider_phone': r.get('provider_phone')
-        })
+    return render_template('tiffin/my_orders.html', username=user.username, orders=orders_data,
+                           next_cursor=next_cursor, before=before,
+                           updates_since=updates_since.isoformat(),
+                           active_statuses=ACTIVE_ORDER_STATUSES)
+
+
+@customer_bp.route('/orders/api/updates')
+def my_order_updates():
+    """Orders whose status changed since ?since= (ISO timestamp from the previous poll)"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    if user.account_type != 'customer':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+
+    since = parse_since(request.args.get('since'))
+    if since is None:
+        return jsonify({'success': False, 'message': 'A valid since timestamp is required'}), 400
+
+    try:
+        updates, next_since = order_updates(user.id, since)
+        return jsonify({'success': True, 'orders': updates, 'since': next_since.isoformat()})
+    except Exception as e:
+        print(f"Error fetching order updates: {e}")
+        return jsonify({'success': False, 'message': 'Failed to fetch order updates'}), 500
 
-    return render_template('tiffin/my_orders.html', username=user.username, orders=orders_data)
 
 
 @customer_bp.route('/orders/<int:order_id>/bill')
@@ -1713,6 +1540,7 @@ def download_order_bill(order_id):
                             
 
 @customer_bp.route('/saved/houses')
+@read_only
 def saved_houses():
     """Display saved houses for the current customer"""
     user = get_current_user()
@@ -1721,106 +1549,53 @@ def saved_houses():
     if user.account_type != 'customer':
         return redirect('/')
 
+    before = request.args.get('before', '')
     try:
-        query = text("""
-            SELECT hl.id, hl.title, hl.description, hl.price, hl.location, hl.type,
-                   (SELECT image_path 
-                    FROM house_images 
-                    WHERE listing_id = hl.id 
-                    ORDER BY created_at ASC 
-                    LIMIT 1) AS main_image
-            FROM saved_houses sh
-            JOIN house_listings hl ON sh.house_listing_id = hl.id
-            WHERE sh.customer_id = :customer_id
-            AND hl.status = 'approved'
-            ORDER BY sh.created_at DESC
-        """)
-        
-        results = db.session.execute(query, {'customer_id': user.id}).fetchall()
-        
+        results, next_cursor = saved_page(user.id, 'house', parse_cursor(before))
+
         listings_data = []
         for row in results:
-            image_path = row[6] if row[6] else 'placeholder.jpg'
             listings_data.append({
-                'id': row[0],
-                'title': row[1],
-                'description': row[2] or '',
-                'price': float(row[3]) if row[3] else 0,
-                'location': row[4],
-                'type': row[5],                            
-                'image_path': image_path
+                'id': row['id'],
+                'title': row['title'],
+                'description': row['description'] or '',
+                'price': float(row['price']) if row['price'] else 0,
+                'location': row['location'],
+                'type': row['type'],
+                'image_path': variant_url(row['main_image'], 'card') if row['main_image'] else 'placeholder.jpg'
             })
-        
-        return render_template('saved/saved_houses.html', listings=listings_data, username=user.username)
+
+        return render_template('saved/saved_houses.html', listings=listings_data, username=user.username,
+                               next_cursor=next_cursor, before=before)
     except Exception as e:
         print(f"Error fetching saved houses: {e}")
         return render_template('saved/saved_houses.html', listings=[], username=user.username)
 
 
+
 @customer_bp.route('/save/restaurant/<int:restaurant_id>', methods=['POST'])
 def save_restaurant(restaurant_id):
-    """Save a restaurant (tiffin listing) for the current customer using saved_restaurants table"""
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-    if user.account_type != 'customer':
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
-
-    try:
-        listing = TiffinListing.query.filter_by(id=restaurant_id, status='approved', kitchen_open=True).first()
-        if not listing:
-            return jsonify({'success': False, 'message': 'Restaurant not found or not available'}), 404
-
-        existing = db.session.execute(text("""
-            SELECT 1
-            FROM saved_restaurants
-            WHERE customer_id = :customer_id AND tiffin_listing_id = :tiffin_id
-            LIMIT 1
-        """), {'customer_id': user.id, 'tiffin_id': restaurant_id}).fetchone()
-
-        if existing:
-            return jsonify({'success': True, 'already_saved': True, 'message': 'Restaurant already saved'}), 200
+    """Save a restaurant (open tiffin kitchen) for the current customer"""
+    return _save_listing('kitchen', restaurant_id, {
+        'saved': 'Restaurant saved successfully',
+        'already_saved': 'Restaurant already saved',
+        'not_found': 'Restaurant not found or not available'
+    }, conditions="kitchen_open = TRUE")
 
-        db.session.execute(text("""
-            INSERT INTO saved_restaurants(customer_id, tiffin_listing_id)
-            VALUES (:customer_id, :tiffin_id)
-        """), {'customer_id': user.id, 'tiffin_id': restaurant_id})
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Restaurant saved successfully'}), 200
-
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving restaurant: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/save/restaurant/<int:restaurant_id>', methods=['DELETE'])
 def unsave_restaurant(restaurant_id):
-    """Remove a saved restaurant (tiffin listing) for the current customer using saved_restaurants table"""
-    user = get_current_user()
-    if not user:
-        return jsonify({'success': False, 'message': 'Not authenticated'}), 401
-
-    try:
-        result = db.session.execute(text("""
-            DELETE FROM saved_restaurants
-            WHERE customer_id = :customer_id AND tiffin_listing_id = :tiffin_id
-        """), {'customer_id': user.id, 'tiffin_id': restaurant_id})
-        db.session.commit()
+    """Remove a saved restaurant (tiffin listing) for the current customer"""
+    return _unsave_listing('kitchen', restaurant_id, {
+        'removed': 'Restaurant removed from saved',
+        'not_saved': 'Restaurant was not saved'
+    })
 
-        removed = bool(getattr(result, 'rowcount', 0))
-        return jsonify({
-            'success': True,
-            'removed': removed,
-            'message': 'Restaurant removed from saved' if removed else 'Restaurant was not saved'
-        }), 200
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error unsaving restaurant: {e}")
-        return jsonify({'success': False, 'message': 'Server error'}), 500
 
 
 @customer_bp.route('/saved/restaurants/ids')
+@read_only
 def saved_restaurant_ids():
     """Return list of saved restaurant (tiffin listing) IDs for current customer"""
     user = get_current_user()
@@ -1828,12 +1603,7 @@ def saved_restaurant_ids():
         return jsonify({'success': True, 'ids': []}), 200
 
     try:
-        rows = db.session.execute(text("""
-            SELECT tiffin_listing_id
-            FROM saved_restaurants
-            WHERE customer_id = :customer_id
-        """), {'customer_id': user.id}).fetchall()
-        ids = [row[0] for row in rows]
+        ids = sorted(_saved_ids(user, 'kitchen'))
         return jsonify({'success': True, 'ids': ids}), 200
     except Exception as e:
         print(f"Error fetching saved restaurant ids: {e}")
@@ -1841,6 +1611,7 @@ def saved_restaurant_ids():
 
 
 @customer_bp.route('/saved/restaurants')
+@read_only
 def saved_restaurants():
     """Display saved restaurants (tiffin kitchens) for the current customer"""
     user = get_current_user()
@@ -1849,55 +1620,34 @@ def saved_restaurants():
     if user.account_type != 'customer':
         return redirect('/')
 
+    before = request.args.get('before', '')
     try:
-        query = text("""
-            SELECT 
-                tl.id,
-                tl.delivery_radius,
-                tl.fast_delivery_available,
-                tl.diet_type,
-                tl.available_days,
-                tl.created_at,
-                pp.business_name,
-                (
-                    SELECT image_path
-                    FROM tiffin_images
-                    WHERE tiffin_listing_id = tl.id
-                    ORDER BY created_at ASC
-                    LIMIT 1
-                ) AS main_image
-            FROM saved_restaurants sr
-            JOIN tiffin_listings tl
-              ON sr.tiffin_listing_id = tl.id
-            JOIN provider_profiles pp
-              ON tl.provider_id = pp.id
-            WHERE sr.customer_id = :customer_id
-            ORDER BY sr.created_at DESC
-        """)
-
-        results = db.session.execute(query, {'customer_id': user.id}).fetchall()
+        results, next_cursor = saved_page(user.id, 'kitchen', parse_cursor(before))
 
         restaurants = []
         for row in results:
-            image_path = row[7] if row[7] else 'placeholder.jpg'
             restaurants.append({
-                'id': row[0],
-                'delivery_radius': float(row[1]) if row[1] else 0,
-                'fast_delivery_available': row[2],
-                'diet_type': row[3],
-                'available_days': row[4],
-                'created_at': row[5].strftime('%B %d, %Y') if row[5] else None,
-                'business_name': row[6],
-                'image_path': image_path,
+                'id': row['id'],
+                'delivery_radius': float(row['delivery_radius']) if row['delivery_radius'] else 0,
+                'fast_delivery_available': row['fast_delivery_available'],
+                'diet_type': row['diet_type'],
+                'available_days': row['available_days'],
+                'created_at': row['created_at'].strftime('%B %d, %Y') if row['created_at'] else None,
+                'business_name': row['business_name'],
+                'provider_verified': row['provider_status'] == 'verified',
+                'image_path': variant_url(row['main_image'], 'card') if row['main_image'] else 'placeholder.jpg',
             })
 
-        return render_template('saved/restaurants.html', restaurants=restaurants, username=user.username)
+        return render_template('saved/restaurants.html', restaurants=restaurants, username=user.username,
+                               next_cursor=next_cursor, before=before)
     except Exception as e:
         print(f"Error fetching saved restaurants: {e}")
         return render_template('saved/restaurants.html', restaurants=[], username=user.username)
 
 
+
 @customer_bp.route('/saved/services')
+@read_only
 def saved_services():
     """Display saved services for the current customer"""
     user = get_current_user()
@@ -1906,36 +1656,26 @@ def saved_services():
     if user.account_type != 'customer':
         return redirect('/')
 
+    before = request.args.get('before', '')
     try:
-        query = text("""
-            SELECT sl.id, sl.service_title, sl.service_category, sl.base_price, sl.service_radius, sl.availability_days,
-                   pp.business_name,
-                   ppic.image_path AS provider_image
-            FROM saved_services ss
-            JOIN service_listings sl ON ss.service_listing_id = sl.id
-            JOIN provider_profiles pp ON sl.provider_id = pp.id
-            LEFT JOIN provider_profile_pics ppic ON pp.id = ppic.provider_id
-            WHERE ss.customer_id = :customer_id
-            AND sl.status = 'approved'
-            ORDER BY ss.created_at DESC
-        """)
-        
-        results = db.session.execute(query, {'customer_id': user.id}).fetchall()
-        
+        results, next_cursor = saved_page(user.id, 'service', parse_cursor(before))
+
         services_data = []
         for row in results:
             services_data.append({
-                'id': row[0],
-                'service_title': row[1],
-                'service_category': row[2],
-                'base_price': float(row[3]) if row[3] else 0,
-                'service_radius': float(row[4]) if row[4] else 0,
-                'availability_days': row[5] or '',
-                'business_name': row[6],
-                'provider_image': row[7]
+                'id': row['id'],
+                'service_title': row['service_title'],
+                'service_category': row['service_category'],
+                'base_price': float(row['base_price']) if row['base_price'] else 0,
+                'service_radius': float(row['service_radius']) if row['service_radius'] else 0,
+                'availability_days': row['availability_days'] or '',
+                'business_name': row['business_name'],
+                'provider_verified': row['provider_status'] == 'verified',
+                'provider_image': variant_url(row['provider_image'], 'card')
             })
-        
-        return render_template('saved/saved_services.html', services=services_data, username=user.username)
+
+        return render_template('saved/saved_services.html', services=services_data, username=user.username,
+                               next_cursor=next_cursor, before=before)
     except Exception as e:
         print(f"Error fetching saved services: {e}")
-        return render_template('saved/saved_services.html', services=[], username=user.username)
\ No newline at end of file
+        return render_template('saved/saved_services.html', services=[], username=user.username)
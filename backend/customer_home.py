@@ -0,0 +1,110 @@
+# Data for the customer dashboard home (/customer/api/home)
+#
+# Each section is a small query run on its own pooled connection, so the
+# sections load in parallel instead of one after another. Sections are cached
+# per customer and invalidated through versions bumped by the order, booking
+# and save handlers.
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from backend.cache import cache_get, cache_set, get_version
+
+RECENT_ORDERS_LIMIT = 5
+UPCOMING_BOOKINGS_LIMIT = 5
+
+# Shared by all requests; keeps the extra connections per worker bounded
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='customer-home')
+
+
+def _recent_orders(conn, customer_id):
+    rows = conn.execute(text("""
+        SELECT o.id, o.quantity, o.total_price, o.order_status, o.order_date,
+               m.meal_name, pp.business_name
+        FROM orders o
+        JOIN meals m ON o.meal_id = m.id
+        JOIN tiffin_listings tl ON o.tiffin_listing_id = tl.id
+        JOIN provider_profiles pp ON tl.provider_id = pp.id
+        WHERE o.customer_id = :customer_id
+        ORDER BY o.order_date DESC
+        LIMIT :limit
+    """), {'customer_id': customer_id, 'limit': RECENT_ORDERS_LIMIT}).fetchall()
+
+    return [{
+        'id': row[0],
+        'quantity': row[1],
+        'total_price': float(row[2] or 0),
+        'order_status': row[3],
+        'order_date': row[4].strftime('%B %d, %Y %I:%M %p') if row[4] else '',
+        'meal_name': row[5],
+        'business_name': row[6]
+    } for row in rows]
+
+
+def _upcoming_bookings(conn, customer_id):
+    rows = conn.execute(text("""
+        SELECT sb.id, sb.booking_date, sb.booking_time, sb.booking_status,
+               sl.service_title, pp.business_name
+        FROM service_bookings sb
+        JOIN service_listings sl ON sb.service_listing_id = sl.id
+        JOIN provider_profiles pp ON sl.provider_id = pp.id
+        WHERE sb.customer_id = :customer_id
+        AND sb.booking_date >= CURRENT_DATE
+        AND sb.booking_status IN ('requested', 'accepted')
+        ORDER BY sb.booking_date ASC, sb.booking_time ASC
+        LIMIT :limit
+    """), {'customer_id': customer_id, 'limit': UPCOMING_BOOKINGS_LIMIT}).fetchall()
+
+    return [{
+        'id': row[0],
+        'booking_date': row[1].strftime('%Y-%m-%d') if row[1] else None,
+        'booking_time': row[2].strftime('%H:%M') if row[2] else None,
+        'booking_status': row[3],
+        'service_title': row[4],
+        'business_name': row[5]
+    } for row in rows]
+
+
+def _saved_counts(conn, customer_id):
+    rows = conn.execute(text("""
+        SELECT kind, COUNT(*)
+        FROM saved_items
+        WHERE customer_id = :customer_id
+        GROUP BY kind
+    """), {'customer_id': customer_id}).fetchall()
+
+    counts = {'house': 0, 'kitchen': 0, 'service': 0}
+    counts.update({row[0]: row[1] for row in rows})
+    return counts
+
+
+# section -> (loader, version name prefix, ttl)
+HOME_SECTIONS = {
+    'recent_orders': (_recent_orders, 'orders', 30),
+    'upcoming_bookings': (_upcoming_bookings, 'bookings', 30),
+    'saved_counts': (_saved_counts, 'saved', 120),
+}
+
+
+def _load_section(engine, loader, customer_id):
+    with engine.connect() as conn:
+        return loader(conn, customer_id)
+
+
+def load_home(engine, customer_id):
+    """Return {section: data}; cached sections are reused, the rest load concurrently"""
+    home = {}
+    pending = {}
+
+    for name, (loader, version_name, ttl) in HOME_SECTIONS.items():
+        key = ('home', name, customer_id, get_version(f"{version_name}:{customer_id}"))
+        cached = cache_get(key)
+        if cached is not None:
+            home[name] = cached
+        else:
+            pending[name] = (key, ttl, _executor.submit(_load_section, engine, loader, customer_id))
+
+    for name, (key, ttl, future) in pending.items():
+        home[name] = cache_set(key, future.result(), ttl=ttl)
+
+    return home
@@ -0,0 +1,184 @@
+# Read-replica routing for read-only routes
+#
+# With DATABASE_REPLICA_URL set, the routes marked @read_only (customer
+# browse, detail and saved routes, admin list endpoints) run their queries on
+# the 'replica' bind; every other route, and every flush, uses the primary.
+# A read-only request still goes to the primary when:
+#   - the replica was more than REPLICA_MAX_LAG seconds behind, or could not
+#     be reached, at its last check (re-checked at most every
+#     REPLICA_CHECK_INTERVAL seconds per worker),
+#   - the browser session made a write (any successful non-GET request:
+#     saves, orders, bookings, profile edits) in the last
+#     READ_YOUR_WRITES_SECONDS, so customers see their own changes at once.
+# The replica connection is checked out by the request's first query, so
+# answering from cache or with a 304 takes none. A failed connection or
+# database error on the replica marks it down until the next check and the
+# request is served from the primary. Code in a read-only route that has to write (the menu
+# document rebuild) wraps the write in on_primary().
+#
+# A replica read can be older than a version bump made on the primary, and
+# caching it would keep stale data under the new key; cache_set() asks
+# replica_read_cacheable() first and stores nothing while the replica lags.
+#
+# This module must not import backend.authorization: RoutingSession is passed
+# to the SQLAlchemy() constructor there.
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc, text
+
+REPLICA_BIND = 'replica'
+REPLICA_CHECK_INTERVAL = 5
+READ_YOUR_WRITES_SECONDS = 30
+
+# Seconds the replica has not replayed yet; 0 when it is caught up with what
+# it received, or when the bind is not a standby at all
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Per worker: when the replica was last checked and whether it was usable
+_replica_state = {'checked_at': 0.0, 'usable': False}
+
+
+class RoutingSession(Session):
+    """db.session class that sends the queries of replica-routed requests to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _routed_to_replica() and self._replica_connected():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_connected(self):
+        """The transaction's replica connection, checked out on first use; a failure sends the request to the primary"""
+        failed_before = g.get('replica_failed', False)
+        try:
+            self.connection(bind_arguments={'bind': self._db.engines[REPLICA_BIND]})
+        except exc.DBAPIError as e:
+            # _on_replica_error saw the connect error too, but nothing ran on
+            # the replica, so this alone does not call for re-running the view
+            g.replica_failed = failed_before
+            _mark_replica_down()
+            g.use_replica = False
+            print(f"Error connecting to replica, reading from primary: {e}")
+            return False
+        return True
+
+
+def _routed_to_replica():
+    return has_request_context() and g.get('use_replica', False)
+
+
+def replica_configured():
+    return REPLICA_BIND in (current_app.config.get('SQLALCHEMY_BINDS') or {})
+
+
+def _replica_usable():
+    """Whether the replica answered the last lag check within REPLICA_MAX_LAG; re-checks when due"""
+    now = time.monotonic()
+    if now - _replica_state['checked_at'] < REPLICA_CHECK_INTERVAL:
+        return _replica_state['usable']
+
+    _replica_state['checked_at'] = now
+    engine = current_app.extensions['sqlalchemy'].engines[REPLICA_BIND]
+    try:
+        with engine.connect() as conn:
+            lag = float(conn.execute(REPLICA_LAG_SQL).scalar())
+        _replica_state['usable'] = lag <= current_app.config['REPLICA_MAX_LAG']
+        if not _replica_state['usable']:
+            print(f"Replica is {lag:.1f}s behind, reading from primary")
+    except Exception as e:
+        _replica_state['usable'] = False
+        print(f"Error checking replica lag: {e}")
+    return _replica_state['usable']
+
+
+def _mark_replica_down():
+    _replica_state['usable'] = False
+    _replica_state['checked_at'] = time.monotonic()
+
+
+def _wrote_recently():
+    last_write_at = session.get('last_write_at')
+    return last_write_at is not None and time.time() - last_write_at < READ_YOUR_WRITES_SECONDS
+
+
+def read_only(view):
+    """Mark a route as read-only so its queries may run on the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        g.use_replica = replica_configured() and not _wrote_recently() and _replica_usable()
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            if not g.get('replica_failed'):
+                raise
+            response = None
+
+        # the view may have caught the replica error itself; run it again on the primary
+        if g.get('replica_failed'):
+            current_app.extensions['sqlalchemy'].session.rollback()
+            g.use_replica = False
+            g.replica_failed = False
+            response = view(*args, **kwargs)
+        return response
+    return wrapper
+
+
+def replica_read_cacheable():
+    """Whether this request's reads may be cached: not while the replica they came from lags"""
+    if not _routed_to_replica():
+        return True
+    if 'replica_lag' not in g:
+        # measured once per request, after its reads, on the same replica
+        db = current_app.extensions['sqlalchemy']
+        try:
+            g.replica_lag = float(db.session.execute(REPLICA_LAG_SQL).scalar())
+        except exc.DBAPIError as e:
+            g.replica_lag = None
+            print(f"Error checking replica lag: {e}")
+    return g.replica_lag == 0
+
+
+@contextmanager
+def on_primary():
+    """Run the enclosed queries on the primary, even inside a read-only route"""
+    previous = g.get('use_replica', False) if has_request_context() else False
+    if has_request_context():
+        g.use_replica = False
+    try:
+        yield
+    finally:
+        if has_request_context():
+            g.use_replica = previous
+
+
+def _on_replica_error(context):
+    if has_request_context() and g.get('use_replica'):
+        g.replica_failed = True
+    if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+        _mark_replica_down()
+
+
+def _remember_write(response):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 \
+            and not g.get('read_only'):
+        session['last_write_at'] = time.time()
+    return response
+
+
+def init_db_routing(app, db):
+    """Register the write marker and the replica error hook; no-op without a replica bind"""
+    with app.app_context():
+        if not replica_configured():
+            return
+        event.listen(db.engines[REPLICA_BIND], 'handle_error', _on_replica_error)
+    app.after_request(_remember_write)
@@ -0,0 +1,133 @@
+# Radius search for tiffin kitchens and local services
+#
+# Listings and customer addresses store latitude/longitude in degrees. A
+# "deliverable to my address" search joins the customer's default address,
+# narrows candidates with a bounding box (served by the (latitude, longitude)
+# indexes from schema.py) and then keeps rows whose great-circle distance is
+# within the listing's own radius. Everything runs in one SQL statement.
+#
+# Customers set their default address and its coordinates on the profile page
+# (save_default_address); providers set a listing's coordinates when adding it
+# or later from their dashboard. A customer whose default address has no
+# coordinates gets the normal list with a prompt instead of an empty result.
+from sqlalchemy import text
+
+from backend.authorization import db
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.045
+
+# Bounding-box half-width, so also the largest delivery/service radius a
+# provider may set (parse_radius)
+MAX_RADIUS_KM = 50
+
+DEFAULT_ADDRESS_CTE = """
+    WITH addr AS (
+        SELECT latitude, longitude
+        FROM customer_addresses
+        WHERE customer_id = :customer_id
+        AND latitude IS NOT NULL
+        AND longitude IS NOT NULL
+        ORDER BY is_default DESC, created_at DESC
+        LIMIT 1
+    )
+"""
+
+
+def default_address(customer_id):
+    """{'address_line', 'latitude', 'longitude'} of the customer's default address, or None"""
+    row = db.session.execute(text("""
+        SELECT address_line, latitude, longitude
+        FROM customer_addresses
+        WHERE customer_id = :customer_id
+        ORDER BY is_default DESC, created_at DESC
+        LIMIT 1
+    """), {'customer_id': customer_id}).mappings().fetchone()
+    return dict(row) if row else None
+
+
+def has_coordinates(address):
+    return bool(address) and address['latitude'] is not None and address['longitude'] is not None
+
+
+def save_default_address(customer_id, address_line, latitude, longitude):
+    """Update the customer's default address (or add one) in a single statement; the caller commits"""
+    db.session.execute(text("""
+        WITH target AS (
+            SELECT id
+            FROM customer_addresses
+            WHERE customer_id = :customer_id
+            ORDER BY is_default DESC, created_at DESC
+            LIMIT 1
+            FOR UPDATE
+        ),
+        updated AS (
+            UPDATE customer_addresses ca
+            SET address_line = :address_line,
+                latitude = :latitude,
+                longitude = :longitude,
+                is_default = TRUE
+            FROM target
+            WHERE ca.id = target.id
+            RETURNING ca.id
+        )
+        INSERT INTO customer_addresses (customer_id, address_line, is_default, latitude, longitude)
+        SELECT :customer_id, :address_line, TRUE, :latitude, :longitude
+        WHERE NOT EXISTS (SELECT 1 FROM updated)
+    """), {'customer_id': customer_id, 'address_line': address_line,
+           'latitude': latitude, 'longitude': longitude})
+
+
+def parse_location(latitude_value, longitude_value):
+    """(latitude, longitude, error): both None when both are empty; error set when only one is valid"""
+    if latitude_value in (None, '') and longitude_value in (None, ''):
+        return None, None, None
+    latitude = parse_coordinate(latitude_value, 90)
+    longitude = parse_coordinate(longitude_value, 180)
+    if latitude is None or longitude is None:
+        return None, None, 'Enter a valid latitude and longitude'
+    return latitude, longitude, None
+
+
+def parse_coordinate(value, limit):
+    """Parse a latitude (limit 90) or longitude (limit 180); None when missing or out of range"""
+    if value in (None, ''):
+        return None
+    try:
+        coordinate = float(value)
+    except (TypeError, ValueError):
+        return None
+    if -limit <= coordinate <= limit:
+        return coordinate
+    return None
+
+
+def parse_radius(value):
+    """Parse a delivery/service radius in km; None when missing, not positive or above MAX_RADIUS_KM"""
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        return None
+    if 0 < radius <= MAX_RADIUS_KM:
+        return radius
+    return None
+
+
+def distance_km_sql(alias):
+    """Haversine distance in km between <alias>.latitude/longitude and the addr CTE row"""
+    return f"""(2 * {EARTH_RADIUS_KM} * ASIN(SQRT(
+            POWER(SIN(RADIANS({alias}.latitude - addr.latitude) / 2), 2)
+            + COS(RADIANS(addr.latitude)) * COS(RADIANS({alias}.latitude))
+            * POWER(SIN(RADIANS({alias}.longitude - addr.longitude) / 2), 2)
+        )))"""
+
+
+def within_radius_conditions(alias, radius_column):
+    """WHERE conditions keeping rows of <alias> whose radius covers the addr CTE row"""
+    half_lat = MAX_RADIUS_KM / KM_PER_DEGREE_LAT
+    return [
+        f"{alias}.latitude BETWEEN addr.latitude - {half_lat} AND addr.latitude + {half_lat}",
+        f"{alias}.longitude BETWEEN addr.longitude - {half_lat} / COS(RADIANS(addr.latitude))"
+        f" AND addr.longitude + {half_lat} / COS(RADIANS(addr.latitude))",
+        f"{distance_km_sql(alias)} <= {alias}.{radius_column}",
+    ]
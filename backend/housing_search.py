@@ -0,0 +1,315 @@
+# Housing search engine shared by the hostel, PG and apartment browse routes
+#
+# A filter spec is parsed from the request arguments, compiled into one
+# parameterised query over house_listings + the type's details table, and the
+# rows are mapped to the dicts the browse templates expect. Facet counts for
+# the filter controls come from a single FILTER-aggregate query per search,
+# each facet counted under the other active filters, and are cached. With
+# USE_CATALOGUE_VIEWS both read the type's materialized view instead (see
+# catalogue_views.py).
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import cache_get, cache_set, get_version
+from backend.catalogue_views import CATALOGUE_VIEWS, use_catalogue_views
+from backend.images import variant_url
+
+HOUSING_TYPES = {
+    'hostel': {
+        'type': 'Hostel',
+        'details_table': 'hostel_details',
+        'columns': ('gender', 'room_type', 'wifi', 'attached_bathroom', 'food_included', 'laundry'),
+        'choice_filters': {
+            'gender': ('boys', 'girls', 'coed'),
+            'room_type': ('single', 'double', 'dorm'),
+        },
+        'flag_filters': ('wifi', 'attached_bathroom', 'food_included', 'laundry'),
+    },
+    'pg': {
+        'type': 'PG',
+        'details_table': 'pg_details',
+        'columns': ('gender', 'ac_available', 'sharing', 'food_included', 'laundry'),
+        'choice_filters': {
+            'gender': ('boys', 'girls', 'coed'),
+            'sharing': ('1', '2', '3', '4+'),
+        },
+        'flag_filters': ('ac_available', 'food_included', 'laundry'),
+    },
+    'apartment': {
+        'type': 'Apartment',
+        'details_table': 'apartment_details',
+        'columns': ('listing_purpose', 'bhk', 'tenant_preference', 'furnishing'),
+        'choice_filters': {
+            'listing_purpose': ('rent', 'sale'),
+            'bhk': ('1', '2', '3', '4+'),
+            'tenant_preference': ('family', 'bachelor', 'any'),
+            'furnishing': ('furnished', 'semi', 'unfurnished'),
+        },
+        'flag_filters': (),
+    },
+}
+
+# budget band -> (price greater than, price at most)
+BUDGET_BANDS = {
+    '1': (None, 5000),
+    '2': (5000, 10000),
+    '3': (10000, 15000),
+    '4': (15000, None),
+}
+
+# sort mode -> ORDER BY; each is served by an index on (type, status, <sort key>)
+SORT_MODES = {
+    'newest': "hl.created_at DESC",
+    'price_asc': "hl.price ASC, hl.created_at DESC",
+    'price_desc': "hl.price DESC, hl.created_at DESC",
+    'most_saved': "hl.save_count DESC, hl.created_at DESC",
+}
+DEFAULT_SORT = 'newest'
+
+LISTING_COLUMNS = ('id', 'title', 'description', 'price', 'location', 'created_at')
+
+FACET_CACHE_TTL = 120
+
+
+def parse_filters(kind, args):
+    """Build a filter spec from request arguments, dropping values outside the allowed sets"""
+    config = HOUSING_TYPES[kind]
+
+    spec = {
+        'location': args.get('location', '').strip(),
+        'budget': args.get('budget', '').strip(),
+        'min_price': _parse_price(args.get('min_price')),
+        'max_price': _parse_price(args.get('max_price')),
+        'sort': args.get('sort', '').strip(),
+        'choices': {},
+        'flags': [],
+    }
+
+    for name, allowed in config['choice_filters'].items():
+        value = args.get(name, '').strip()
+        if value and value in allowed:
+            spec['choices'][name] = value
+
+    for name in config['flag_filters']:
+        if args.get(name) == '1':
+            spec['flags'].append(name)
+
+    if spec['sort'] not in SORT_MODES:
+        spec['sort'] = DEFAULT_SORT
+
+    return spec
+
+
+def _parse_price(value):
+    """Non-negative whole rupees, or None when missing or invalid"""
+    try:
+        price = int(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+
+def _base_conditions(has_location, budget, has_min_price, has_max_price):
+    """WHERE conditions shared by the listing query and the facet query"""
+    conditions = ["hl.type = :type", "hl.status = 'approved'"]
+
+    if has_location:
+        conditions.append("LOWER(hl.location) LIKE LOWER(:location)")
+
+    if has_min_price:
+        conditions.append("hl.price >= :min_price")
+    if has_max_price:
+        conditions.append("hl.price <= :max_price")
+
+    if budget in BUDGET_BANDS:
+        lower, upper = BUDGET_BANDS[budget]
+        if lower is not None:
+            conditions.append("hl.price > :budget_min")
+        if upper is not None:
+            conditions.append("hl.price <= :budget_max")
+
+    return conditions
+
+
+def _base_params(kind, spec):
+    params = {'type': HOUSING_TYPES[kind]['type']}
+
+    if spec['location']:
+        params['location'] = f"%{spec['location']}%"
+
+    budget = _budget(spec)
+    if budget:
+        lower, upper = BUDGET_BANDS[budget]
+        if lower is not None:
+            params['budget_min'] = lower
+        if upper is not None:
+            params['budget_max'] = upper
+
+    if spec['min_price'] is not None:
+        params['min_price'] = spec['min_price']
+    if spec['max_price'] is not None:
+        params['max_price'] = spec['max_price']
+
+    return params
+
+
+def _budget(spec):
+    return spec['budget'] if spec['budget'] in BUDGET_BANDS else ''
+
+
+def _base_shape(spec):
+    """Hashable description of which base conditions a spec uses"""
+    return (bool(spec['location']), _budget(spec), spec['min_price'] is not None, spec['max_price'] is not None)
+
+
+def _source(kind, use_views):
+    """(FROM clause, alias of the detail columns): the kind's catalogue view, or listings joined to details"""
+    if use_views:
+        return f"{CATALOGUE_VIEWS[kind]} hl", "hl"
+    return f"house_listings hl JOIN {HOUSING_TYPES[kind]['details_table']} d ON hl.id = d.listing_id", "d"
+
+
+@lru_cache(maxsize=256)
+def _compile(kind, base_shape, choice_names, flag_names, sort, use_views):
+    """Compile one query shape; identical shapes reuse the same text() object and SQL string"""
+    config = HOUSING_TYPES[kind]
+    source, d = _source(kind, use_views)
+
+    projection = [f"hl.{column}" for column in LISTING_COLUMNS]
+    projection += [f"{d}.{column}" for column in config['columns']]
+    if use_views:
+        projection.append("hl.main_image")
+    else:
+        projection.append("""(SELECT image_path
+                FROM house_images
+                WHERE listing_id = hl.id
+                ORDER BY created_at ASC
+                LIMIT 1) AS main_image""")
+
+    conditions = _base_conditions(*base_shape)
+
+    for name in choice_names:
+        conditions.append(f"{d}.{name} = :{name}")
+
+    for name in flag_names:
+        conditions.append(f"{d}.{name} = TRUE")
+
+    sql = f"""
+        SELECT {', '.join(projection)}
+        FROM {source}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {SORT_MODES[sort]}
+    """
+    return text(sql)
+
+
+@lru_cache(maxsize=256)
+def _compile_facets(kind, base_shape, choice_names, flag_names, use_views):
+    """One row of COUNT(*) FILTER (...) columns: every choice value and every flag of the type.
+
+    Each count applies the active choice and flag filters of the other
+    dimensions but not its own, so a choice value's count is what the results
+    would be when switched to that value; 'total' applies them all.
+    """
+    config = HOUSING_TYPES[kind]
+    source, d = _source(kind, use_views)
+
+    active = {name: f"{d}.{name} = :{name}" for name in choice_names}
+    active.update({name: f"{d}.{name} = TRUE" for name in flag_names})
+
+    def count(condition, exclude=None):
+        conditions = [c for name, c in active.items() if name != exclude]
+        if condition:
+            conditions.append(condition)
+        if not conditions:
+            return "COUNT(*)"
+        return f"COUNT(*) FILTER (WHERE {' AND '.join(conditions)})"
+
+    aggregates = [f"{count(None)} AS total"]
+    for name, allowed in config['choice_filters'].items():
+        for index, value in enumerate(allowed):
+            # allowed values are fixed config constants, never request input
+            aggregates.append(f"{count(f'{d}.{name} = {value!r}', exclude=name)} AS {name}__{index}")
+    for name in config['flag_filters']:
+        aggregates.append(f"{count(f'{d}.{name} = TRUE', exclude=name)} AS {name}")
+
+    sql = f"""
+        SELECT {', '.join(aggregates)}
+        FROM {source}
+        WHERE {' AND '.join(_base_conditions(*base_shape))}
+    """
+    return text(sql)
+
+
+def compile_query(kind, spec):
+    """Return (statement, params) for a filter spec"""
+    params = _base_params(kind, spec)
+
+    choice_names = tuple(sorted(spec['choices']))
+    for name in choice_names:
+        params[name] = spec['choices'][name]
+
+    statement = _compile(kind, _base_shape(spec), choice_names, tuple(sorted(spec['flags'])), spec['sort'],
+                         use_catalogue_views())
+    return statement, params
+
+
+def map_row(kind, row):
+    """Map one result row to the dict the browse templates render"""
+    listing = {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'] or '',
+        'price': row['price'],
+        'location': row['location'],
+        'image_path': variant_url(row['main_image'], 'card') if row['main_image'] else 'placeholder.jpg',
+    }
+    for column in HOUSING_TYPES[kind]['columns']:
+        listing[column] = row[column]
+    return listing
+
+
+def search_housing(kind, spec):
+    """Run a housing search and return the mapped listings"""
+    statement, params = compile_query(kind, spec)
+    rows = db.session.execute(statement, params).mappings().all()
+    return [map_row(kind, row) for row in rows]
+
+
+def facet_counts(kind, spec):
+    """Per-value counts for the filter controls, for the current result set.
+
+    Returns {'total': n, <choice>: {value: n}, <flag>: n}. Counts are
+    disjunctive: each facet applies every other active filter but ignores its
+    own, so the counts show what picking a different value would return.
+    Cached per search; approving or rejecting a listing bumps the 'housing'
+    version.
+    """
+    choice_names = tuple(sorted(spec['choices']))
+    flag_names = tuple(sorted(spec['flags']))
+    key = ('facets', kind, spec['location'].lower(), _budget(spec),
+           spec['min_price'], spec['max_price'],
+           tuple((name, spec['choices'][name]) for name in choice_names), flag_names,
+           get_version('housing'))
+
+    facets = cache_get(key)
+    if facets is not None:
+        return facets
+
+    config = HOUSING_TYPES[kind]
+    params = _base_params(kind, spec)
+    for name in choice_names:
+        params[name] = spec['choices'][name]
+
+    statement = _compile_facets(kind, _base_shape(spec), choice_names, flag_names, use_catalogue_views())
+    row = db.session.execute(statement, params).mappings().one()
+
+    facets = {'total': row['total']}
+    for name, allowed in config['choice_filters'].items():
+        facets[name] = {value: row[f"{name}__{index}"] for index, value in enumerate(allowed)}
+    for name in config['flag_filters']:
+        facets[name] = row[name]
+
+    return cache_set(key, facets, ttl=FACET_CACHE_TTL)
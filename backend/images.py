@@ -0,0 +1,192 @@
+# Image uploads, sized variants and cache-aware serving of local image files
+import hashlib
+import mimetypes
+import os
+import threading
+
+import cloudinary
+import cloudinary.uploader
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+ALLOWED_FORMATS = ['jpg', 'jpeg', 'png', 'webp']
+
+
+VARIANTS = {
+    'thumb': {'crop': 'fill', 'width': 160, 'height': 120, 'quality': 'auto'},
+    'card': {'crop': 'fill', 'width': 480, 'height': 360, 'quality': 'auto'},
+    'full': {'crop': 'limit', 'width': 1600, 'height': 1600, 'quality': 'auto'},
+}
+
+
+EAGER_FORMATS = ['webp', 'avif']
+
+CLOUDINARY_UPLOAD_MARKER = '/image/upload/'
+
+
+def _transformation_string(options):
+    """Build a Cloudinary transformation segment such as c_fill,w_480,h_360,q_auto"""
+    parts = [
+        f"c_{options['crop']}",
+        f"w_{options['width']}",
+        f"h_{options['height']}",
+        f"q_{options['quality']}",
+    ]
+    return ','.join(parts)
+
+
+def eager_transformations():
+    """Variants generated at upload time so the first browse hit is already cached on the CDN"""
+    eager = []
+    for options in VARIANTS.values():
+        for fmt in EAGER_FORMATS:
+            eager.append(dict(options, format=fmt))
+    return eager
+
+
+def is_cloudinary_url(image_path):
+    return bool(image_path) and image_path.startswith('http') and CLOUDINARY_UPLOAD_MARKER in image_path
+
+
+def variant_url(image_path, variant='card'):
+    """Return the URL of a sized variant of an uploaded image.
+
+    Cloudinary URLs get the variant transformation injected after /image/upload/
+    together with f_auto, so the CDN serves WebP or AVIF when the browser accepts it.
+    Anything else (local files, placeholders, external URLs) is returned unchanged.
+    """
+    if variant not in VARIANTS or not is_cloudinary_url(image_path):
+        return image_path
+
+    head, tail = image_path.split(CLOUDINARY_UPLOAD_MARKER, 1)
+    transformation = _transformation_string(VARIANTS[variant]) + ',f_auto'
+    return f"{head}{CLOUDINARY_UPLOAD_MARKER}{transformation}/{tail}"
+
+
+def public_id_from_url(image_path):
+    """Extract the Cloudinary public id (folder/name without extension) from a secure_url"""
+    if not is_cloudinary_url(image_path):
+        return None
+
+    tail = image_path.split(CLOUDINARY_UPLOAD_MARKER, 1)[1]
+    segments = tail.split('/')
+
+    if segments and segments[0].startswith('v') and segments[0][1:].isdigit():
+        segments = segments[1:]
+    if not segments:
+        return None
+    path = '/'.join(segments)
+    return path.rsplit('.', 1)[0]
+
+
+def upload_image(file, folder):
+    """Upload an image to Cloudinary and pre-generate its thumb/card/full variants.
+
+    Returns the secure_url of the original, which is what the image_path columns store.
+    """
+    upload_result = cloudinary.uploader.upload(
+        file,
+        folder=folder,
+        allowed_formats=ALLOWED_FORMATS,
+        eager=eager_transformations(),
+        eager_async=True
+    )
+    return upload_result.get('secure_url')
+
+
+# Local image files are named <type>_<id>_<timestamp>.<ext> and never rewritten,
+# so browsers and proxies may keep them for a year without revalidating.
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifest = {}
+_manifest_lock = threading.Lock()
+
+
+def content_hash(path):
+    """Return the sha256 of a file, cached in the manifest until its size or mtime changes"""
+    stat = os.stat(path)
+    entry = _manifest.get(path)
+    if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+        return entry[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b''):
+            digest.update(chunk)
+    content_digest = digest.hexdigest()
+
+    with _manifest_lock:
+        _manifest[path] = (stat.st_mtime_ns, stat.st_size, content_digest)
+    return content_digest
+
+
+def send_image(folder, filename):
+    """Serve a local image with an immutable Cache-Control and a strong content-hash ETag.
+
+    Conditional requests get a 304 and Range requests a 206 (via send_file). When
+    IMAGES_ACCEL_REDIRECT is configured the body is handed off to nginx with
+    X-Accel-Redirect; when USE_X_SENDFILE is set Flask emits X-Sendfile instead.
+    """
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    etag = content_hash(path)
+    accel_prefix = current_app.config.get('IMAGES_ACCEL_REDIRECT')
+
+    if accel_prefix:
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, etag=etag, conditional=True, max_age=IMAGE_MAX_AGE)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def backfill_variants():
+    """Generate variants for images uploaded before the variant pipeline existed"""
+    from sqlalchemy import text
+    from backend.authorization import db
+
+    sources = [
+        "SELECT image_path FROM house_images",
+        "SELECT image_path FROM tiffin_images",
+        "SELECT meal_image_path FROM meals WHERE meal_image_path IS NOT NULL",
+        "SELECT image_path FROM provider_profile_pics",
+    ]
+
+    processed = 0
+    failed = 0
+    for query in sources:
+        rows = db.session.execute(text(query)).fetchall()
+        for row in rows:
+            public_id = public_id_from_url(row[0])
+            if not public_id:
+                continue
+            try:
+                cloudinary.uploader.explicit(
+                    public_id,
+                    type='upload',
+                    eager=eager_transformations(),
+                    eager_async=True
+                )
+                processed += 1
+            except Exception as e:
+                failed += 1
+                print(f"Error generating variants for {public_id}: {e}")
+
+    return processed, failed
+
+
+if __name__ == '__main__':
+    from backend.run import app
+
+    with app.app_context():
+        processed, failed = backfill_variants()
+        print(f"Image variants requested for {processed} images ({failed} failed)")
@@ -0,0 +1,351 @@
+# Kitchen menus and meal order placement
+#
+# Each kitchen's orderable state (open/approved, fast delivery, and every
+# meal's price, category and availability) is cached per worker and keyed on
+# the tiffin:<listing id> version, which add_meal, edit_meal,
+# toggle_kitchen_status and tiffin approval bump. Orders are pre-checked
+# against the cached menu and capacity snapshot, then inserted with a single
+# statement that re-validates kitchen and meal state and claims slot capacity
+# atomically. Versions are per worker, so a cached answer is never final:
+# a pre-check reject is re-checked once against fresh data before it is
+# returned, and a short insert is rolled back and re-checked the same way.
+# Single-meal orders and cart checkouts share that statement; the lines come
+# from unnest()ed arrays, so a checkout costs the same number of round-trips
+# whatever its size.
+#
+# The meal list shown to customers and providers is a per-kitchen menu
+# document (JSON plus an ETag), rebuilt by the same writes that bump the
+# version and stored in tiffin_listings.menu_json, so opening a menu is a
+# cache read and a repeat open with If-None-Match is a 304.
+import hashlib
+import json
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import bump_version, cache_get, cache_set, get_version
+from backend.capacity import full_slot, full_slot_message, invalidate_snapshot, record_claim
+from backend.db_routing import on_primary
+from backend.images import variant_url
+
+MENU_CACHE_TTL = 60
+MEAL_KITCHEN_CACHE_TTL = 3600
+MENU_DOCUMENT_TTL = 60
+
+FAST_DELIVERY_CHARGE = Decimal('20.00')
+
+# Distinct meals per cart checkout
+CART_MAX_ITEMS = 20
+
+# Inserts one order row per line. A line survives only if its meal is
+# available and the kitchen is approved and open; capped kitchens must also
+# fit every line's quantity into today's slot for its meal category, claimed
+# in kitchen_slot_usage by the same statement. The fast delivery charge is
+# added once, to the first line.
+INSERT_ORDER_LINES = text("""
+    WITH lines AS (
+        SELECT c.line_no, c.quantity, m.id AS meal_id, m.price, m.meal_category,
+               tl.id AS listing_id, tl.slot_capacity,
+               (:fast_delivery AND tl.fast_delivery_available) AS fast_delivery
+        FROM unnest(CAST(:meal_ids AS INTEGER[]), CAST(:quantities AS INTEGER[]))
+             WITH ORDINALITY AS c(meal_id, quantity, line_no)
+        JOIN meals m ON m.id = c.meal_id
+        JOIN tiffin_listings tl ON tl.id = m.tiffin_listing_id
+        WHERE m.id = ANY(:meal_ids)
+        AND m.tiffin_listing_id = :listing_id
+        AND m.is_available = TRUE
+        AND tl.status = 'approved'
+        AND tl.kitchen_open = TRUE
+    ), needed AS (
+        SELECT listing_id, meal_category, SUM(quantity) AS quantity, MAX(slot_capacity) AS slot_capacity
+        FROM lines
+        WHERE slot_capacity IS NOT NULL
+        GROUP BY listing_id, meal_category
+    ), claimed AS (
+        INSERT INTO kitchen_slot_usage (tiffin_listing_id, slot_date, meal_category, used)
+        SELECT listing_id, CURRENT_DATE, meal_category, quantity
+        FROM needed
+        WHERE quantity <= slot_capacity
+        ON CONFLICT (tiffin_listing_id, slot_date, meal_category)
+        DO UPDATE SET used = kitchen_slot_usage.used + EXCLUDED.used
+        WHERE kitchen_slot_usage.used + EXCLUDED.used <= (
+            SELECT slot_capacity FROM tiffin_listings WHERE id = kitchen_slot_usage.tiffin_listing_id
+        )
+        RETURNING meal_category
+    )
+    INSERT INTO orders (customer_id, tiffin_listing_id, meal_id, quantity, base_price,
+                        fast_delivery, fast_delivery_charge, total_price,
+                        delivery_address, order_status, checkout_id)
+    SELECT :customer_id, listing_id, meal_id, quantity, price, fast_delivery,
+           CASE WHEN line_no = 1 AND fast_delivery THEN :charge ELSE 0 END,
+           price * quantity + CASE WHEN line_no = 1 AND fast_delivery THEN :charge ELSE 0 END,
+           :delivery_address, 'placed', :checkout_id
+    FROM lines
+    WHERE (SELECT COUNT(*) FROM claimed) = (SELECT COUNT(*) FROM needed)
+    ORDER BY line_no
+    RETURNING id, total_price
+""")
+
+
+def invalidate_menu(listing_id):
+    bump_version(f"tiffin:{listing_id}")
+
+
+def kitchen_menu(listing_id):
+    """Cached {'open', 'fast_delivery_available', 'meals': {meal_id: {'price', 'meal_category', 'is_available'}}}; None if no such kitchen"""
+    key = ('menu', listing_id, get_version(f"tiffin:{listing_id}"))
+    menu = cache_get(key)
+    if menu is not None:
+        return menu
+
+    rows = db.session.execute(text("""
+        SELECT tl.status = 'approved' AND tl.kitchen_open AS open,
+               tl.fast_delivery_available,
+               m.id AS meal_id, m.price, m.meal_category, m.is_available
+        FROM tiffin_listings tl
+        LEFT JOIN meals m ON m.tiffin_listing_id = tl.id
+        WHERE tl.id = :listing_id
+    """), {'listing_id': listing_id}).mappings().all()
+
+    if not rows:
+        return None
+
+    menu = {
+        'open': bool(rows[0]['open']),
+        'fast_delivery_available': bool(rows[0]['fast_delivery_available']),
+        'meals': {
+            row['meal_id']: {
+                'price': row['price'],
+                'meal_category': row['meal_category'],
+                'is_available': bool(row['is_available'])
+            }
+            for row in rows if row['meal_id'] is not None
+        }
+    }
+    return cache_set(key, menu, ttl=MENU_CACHE_TTL)
+
+
+def build_menu_document(listing_id):
+    """Build a kitchen's menu document from meals and store it in tiffin_listings.menu_json.
+
+    Returns {'etag', 'meals': [...]} (every meal, newest first), or None if
+    there is no such kitchen. Called after add_meal, edit_meal and
+    toggle_kitchen_status commit (see refresh_menu_document); the caller has
+    already bumped the version.
+    """
+    rows = db.session.execute(text("""
+        SELECT id, meal_name, description, meal_category, diet_type, price,
+               is_available, meal_image_path, created_at
+        FROM meals
+        WHERE tiffin_listing_id = :listing_id
+        ORDER BY created_at DESC
+    """), {'listing_id': listing_id}).mappings().all()
+
+    meals = [{
+        'id': row['id'],
+        'meal_name': row['meal_name'],
+        'description': row['description'],
+        'meal_category': row['meal_category'],
+        'diet_type': row['diet_type'],
+        'price': float(row['price']),
+        'is_available': bool(row['is_available']),
+        'meal_image_path': row['meal_image_path'],
+        'created_at': row['created_at'].strftime('%Y-%m-%d') if row['created_at'] else ''
+    } for row in rows]
+
+    body = json.dumps(meals, sort_keys=True)
+    document = {'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(), 'meals': meals}
+
+    updated = db.session.execute(text("""
+        UPDATE tiffin_listings
+        SET menu_json = :menu_json
+        WHERE id = :listing_id
+        RETURNING id
+    """), {'listing_id': listing_id, 'menu_json': json.dumps(document)}).fetchone()
+    db.session.commit()
+
+    if not updated:
+        return None
+    key = ('menu_document', listing_id, get_version(f"tiffin:{listing_id}"))
+    return cache_set(key, document, ttl=MENU_DOCUMENT_TTL)
+
+
+def refresh_menu_document(listing_id):
+    """Rebuild after a write; a failure is logged and the next read rebuilds instead"""
+    try:
+        build_menu_document(listing_id)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding menu document: {e}")
+
+
+def menu_document(listing_id):
+    """A kitchen's menu document: from cache, else the stored menu_json, else freshly built"""
+    key = ('menu_document', listing_id, get_version(f"tiffin:{listing_id}"))
+    document = cache_get(key)
+    if document is not None:
+        return document
+
+    row = db.session.execute(text("SELECT menu_json FROM tiffin_listings WHERE id = :listing_id"),
+                             {'listing_id': listing_id}).fetchone()
+    if not row:
+        return None
+    if not row[0]:
+        # stores menu_json, so it cannot run on the replica of a read-only route
+        with on_primary():
+            return build_menu_document(listing_id)
+    return cache_set(key, json.loads(row[0]), ttl=MENU_DOCUMENT_TTL)
+
+
+def customer_menu(document):
+    """The available meals of a menu document, shaped for the customer meal grid"""
+    return [{
+        'id': meal['id'],
+        'meal_name': meal['meal_name'],
+        'meal_category': meal['meal_category'],
+        'diet_type': meal['diet_type'],
+        'price': meal['price'],
+        'description': meal['description'] or '',
+        'image_path': variant_url(meal['meal_image_path'], 'card') if meal['meal_image_path'] else 'placeholder.jpg'
+    } for meal in document['meals'] if meal['is_available']]
+
+
+def meal_kitchen(meal_id):
+    """The tiffin listing a meal belongs to (meals never move between kitchens); None if no such meal"""
+    key = ('meal_kitchen', meal_id)
+    listing_id = cache_get(key)
+    if listing_id is not None:
+        return listing_id
+
+    row = db.session.execute(text("SELECT tiffin_listing_id FROM meals WHERE id = :meal_id"),
+                             {'meal_id': meal_id}).fetchone()
+    if not row:
+        return None
+    return cache_set(key, row[0], ttl=MEAL_KITCHEN_CACHE_TTL)
+
+
+def parse_cart(raw_items):
+    """Turn [{'meal_id', 'quantity'}] into {meal_id: quantity}, merging repeats; None if invalid"""
+    if not isinstance(raw_items, list) or not raw_items:
+        return None
+
+    cart = {}
+    for item in raw_items:
+        try:
+            meal_id = int(item.get('meal_id'))
+            quantity = int(item.get('quantity', 1))
+        except (AttributeError, TypeError, ValueError):
+            return None
+        if quantity < 1:
+            return None
+        cart[meal_id] = cart.get(meal_id, 0) + quantity
+
+    if len(cart) > CART_MAX_ITEMS:
+        return None
+    return cart
+
+
+def check_cart(listing_id, cart):
+    """Validate a cart against the cached menu and capacity snapshot.
+
+    Returns (needed, None) where needed is {meal_category: quantity}, or
+    (None, (message, status code)).
+    """
+    menu = kitchen_menu(listing_id)
+    if not menu:
+        return None, ('Kitchen not found', 404)
+
+    needed = {}
+    for meal_id, quantity in cart.items():
+        meal = menu['meals'].get(meal_id)
+        if not meal:
+            return None, ('Meal not found', 404)
+        if not meal['is_available']:
+            return None, ('Meal is currently unavailable', 400)
+        needed[meal['meal_category']] = needed.get(meal['meal_category'], 0) + quantity
+
+    if not menu['open']:
+        return None, ('Kitchen is closed or not approved', 400)
+
+    meal_category = full_slot(listing_id, needed)
+    if meal_category:
+        return None, full_slot_message(meal_category)
+    return needed, None
+
+
+def _insert_order_lines(customer_id, listing_id, cart, fast_delivery, delivery_address, checkout_id):
+    """Run INSERT_ORDER_LINES; commits and returns the (id, total_price) rows, or rolls back and returns an error"""
+    needed, error = check_cart(listing_id, cart)
+    if error:
+        # The cached menu or snapshot may predate a meal added, a kitchen
+        # reopened or a slot freed on another worker; only a reject that
+        # still holds against the database is returned
+        invalidate_menu(listing_id)
+        invalidate_snapshot()
+        needed, error = check_cart(listing_id, cart)
+        if error:
+            return None, error
+
+    meal_ids = list(cart)
+    rows = db.session.execute(INSERT_ORDER_LINES, {
+        'customer_id': customer_id,
+        'listing_id': listing_id,
+        'meal_ids': meal_ids,
+        'quantities': [cart[meal_id] for meal_id in meal_ids],
+        'fast_delivery': bool(fast_delivery),
+        'charge': FAST_DELIVERY_CHARGE,
+        'delivery_address': delivery_address,
+        'checkout_id': checkout_id
+    }).fetchall()
+
+    if len(rows) != len(meal_ids):
+        # The cached menu or capacity snapshot was stale; insert nothing and
+        # report the current reason
+        db.session.rollback()
+        invalidate_menu(listing_id)
+        invalidate_snapshot()
+        _, error = check_cart(listing_id, cart)
+        return None, error or ('Meal is currently unavailable', 400)
+
+    db.session.commit()
+    record_claim(listing_id, needed)
+    return rows, None
+
+
+def place_order(customer_id, meal_id, quantity, fast_delivery, delivery_address):
+    """Insert one order; returns (order_id, None) or (None, (message, status code)).
+
+    Price and fast delivery are taken from the meal and kitchen rows inside
+    the insert, so a stale cache can never produce a wrong total.
+    """
+    listing_id = meal_kitchen(meal_id)
+    if listing_id is None:
+        return None, ('Meal not found', 404)
+
+    rows, error = _insert_order_lines(customer_id, listing_id, {meal_id: quantity},
+                                      fast_delivery, delivery_address, None)
+    if error:
+        return None, error
+    return rows[0][0], None
+
+
+def place_cart_order(customer_id, listing_id, cart, fast_delivery, delivery_address):
+    """Insert one order row per cart line, sharing a checkout_id.
+
+    Returns ({'checkout_id', 'order_ids', 'total_price'}, None) or
+    (None, (message, status code)). If any line is rejected nothing is
+    committed.
+    """
+    checkout_id = uuid.uuid4().hex
+    rows, error = _insert_order_lines(customer_id, listing_id, cart,
+                                      fast_delivery, delivery_address, checkout_id)
+    if error:
+        return None, error
+
+    return {
+        'checkout_id': checkout_id,
+        'order_ids': [row[0] for row in rows],
+        'total_price': float(sum(row[1] for row in rows))
+    }, None
@@ -0,0 +1,125 @@
+# Customer order history (/orders) and status-change polling
+#
+# The history is paged by keyset on (order_date, id), newest first, and only
+# the columns the order cards show are selected. orders.updated_at is set by a
+# trigger (see schema.py) whenever an order row changes, so the polling
+# endpoint reads just (id, order_status, updated_at) for orders changed since
+# the last poll, off the (customer_id, updated_at) index.
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend.authorization import db
+
+ORDERS_PAGE_SIZE = 20
+
+# The next poll starts this far before the current one, so updates committed
+# by transactions that were still open while we read are not missed
+UPDATES_OVERLAP_SECONDS = 5
+
+ORDER_COLUMNS = """o.id, o.quantity, o.base_price, o.fast_delivery, o.fast_delivery_charge,
+               o.total_price, o.order_status, o.delivery_address, o.order_date,
+               m.meal_name, m.diet_type, m.meal_category,
+               pp.business_name, u.phone AS provider_phone"""
+
+
+def parse_cursor(value):
+    """Decode an orders-page cursor ('<iso order date>_<order id>'); None when missing or invalid"""
+    if not value:
+        return None
+    ordered_at, _, order_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(ordered_at), int(order_id)
+    except ValueError:
+        return None
+
+
+def parse_since(value):
+    """Decode the ?since= timestamp of the updates endpoint; None when missing or invalid"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def map_order(row):
+    """Map one order row to the dict the order cards and details modal render"""
+    order_date = row['order_date']
+    return {
+        'id': row['id'],
+        'quantity': row['quantity'],
+        'base_price': float(row['base_price'] or 0),
+        'fast_delivery': bool(row['fast_delivery']),
+        'fast_delivery_charge': float(row['fast_delivery_charge'] or 0),
+        'total_price': float(row['total_price'] or 0),
+        'order_status': row['order_status'],
+        'delivery_address': row['delivery_address'] or '',
+        'order_date': order_date.strftime('%B %d, %Y %I:%M %p') if order_date else '',
+        'meal_name': row['meal_name'],
+        'diet_type': row['diet_type'],
+        'meal_category': row['meal_category'],
+        'provider_business_name': row['business_name'],
+        'provider_phone': row['provider_phone']
+    }
+
+
+def orders_page(customer_id, cursor=None, limit=ORDERS_PAGE_SIZE):
+    """One page of a customer's orders, newest first.
+
+    Returns (orders, next_cursor); next_cursor is None on the last page.
+    """
+    params = {'customer_id': customer_id, 'limit': limit + 1}
+
+    keyset = ""
+    if cursor:
+        keyset = "AND (o.order_date, o.id) < (:cursor_at, :cursor_id)"
+        params['cursor_at'], params['cursor_id'] = cursor
+
+    rows = db.session.execute(text(f"""
+        SELECT {ORDER_COLUMNS}
+        FROM orders o
+        JOIN meals m ON o.meal_id = m.id
+        JOIN tiffin_listings tl ON o.tiffin_listing_id = tl.id
+        JOIN provider_profiles pp ON tl.provider_id = pp.id
+        JOIN users u ON pp.user_id = u.id
+        WHERE o.customer_id = :customer_id
+        {keyset}
+        ORDER BY o.order_date DESC, o.id DESC
+        LIMIT :limit
+    """), params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last['order_date'].isoformat()}_{last['id']}"
+    return [map_order(row) for row in rows], next_cursor
+
+
+def order_updates(customer_id, since):
+    """Orders changed after `since`, plus the `since` value for the next poll.
+
+    Returns ([{'id', 'order_status', 'updated_at'}], next_since).
+    """
+    row = db.session.execute(text("SELECT LOCALTIMESTAMP")).fetchone()
+    next_since = row[0] - timedelta(seconds=UPDATES_OVERLAP_SECONDS)
+
+    if since is None:
+        return [], next_since
+
+    rows = db.session.execute(text("""
+        SELECT id, order_status, updated_at
+        FROM orders
+        WHERE customer_id = :customer_id
+        AND updated_at > :since
+        ORDER BY updated_at ASC
+    """), {'customer_id': customer_id, 'since': since}).fetchall()
+
+    updates = [{
+        'id': r[0],
+        'order_status': r[1],
+        'updated_at': r[2].isoformat() if r[2] else None
+    } for r in rows]
+    return updates, next_since
@@ -0,0 +1,62 @@
+# Meal order status transitions
+#
+# Orders move one step at a time: placed -> preparing -> out_for_delivery ->
+# delivered. The single-order and bulk provider endpoints both go through
+# transition_orders(), one guarded UPDATE that only touches orders of the
+# provider's kitchens that are still in the status the target comes from.
+from sqlalchemy import text
+
+from backend.authorization import db
+
+# current status -> the only status it may move to
+ORDER_TRANSITIONS = {
+    'placed': 'preparing',
+    'preparing': 'out_for_delivery',
+    'out_for_delivery': 'delivered'
+}
+
+# target status -> the status an order must be in to reach it
+PREVIOUS_STATUS = {target: source for source, target in ORDER_TRANSITIONS.items()}
+
+# Orders in these states can still change
+ACTIVE_ORDER_STATUSES = tuple(ORDER_TRANSITIONS)
+
+# Order ids per bulk request
+BULK_MAX_ORDERS = 200
+
+
+def transition_error(current_status, new_status):
+    """Why current_status cannot move to new_status, or None if it can"""
+    if current_status not in ORDER_TRANSITIONS:
+        return 'Order cannot be updated'
+    if ORDER_TRANSITIONS[current_status] != new_status:
+        return f'Invalid status transition from {current_status} to {new_status}'
+    return None
+
+
+def transition_orders(provider_id, order_ids, new_status):
+    """Move the provider's orders in order_ids to new_status in one statement.
+
+    Only orders currently in PREVIOUS_STATUS[new_status] change. Returns
+    [(order_id, customer_id)] for the orders that moved; the caller commits.
+    """
+    from_status = PREVIOUS_STATUS.get(new_status)
+    if from_status is None or not order_ids:
+        return []
+
+    rows = db.session.execute(text("""
+        UPDATE orders o
+        SET order_status = :new_status
+        FROM tiffin_listings tl
+        WHERE o.tiffin_listing_id = tl.id
+        AND tl.provider_id = :provider_id
+        AND o.id = ANY(:order_ids)
+        AND o.order_status = :from_status
+        RETURNING o.id, o.customer_id
+    """), {
+        'new_status': new_status,
+        'from_status': from_status,
+        'provider_id': provider_id,
+        'order_ids': list(order_ids)
+    }).fetchall()
+    return [(row[0], row[1]) for row in rows]
@@ -4,8 +4,16 @@ from backend.admin import ProviderProfile, ProviderProfilePic, HouseListing, Hou
 from werkzeug.utils import secure_filename
 import os
 import time
-import cloudinary
-import cloudinary.uploader
+from backend.images import upload_image
+from backend.availability import DEFAULT_SLOT_MINUTES, parse_slot_time, schedule_error
+from backend.cache import bump_version
+from backend.catalogue_views import refresh_catalogue
+from backend.capacity import invalidate_snapshot
+from backend.compression import etag_json_response
+from backend.menu import menu_document, refresh_menu_document
+from backend.geo import MAX_RADIUS_KM, parse_coordinate, parse_location, parse_radius
+from backend.provider_cards import refresh_provider_cards
+from backend.order_status import ACTIVE_ORDER_STATUSES, BULK_MAX_ORDERS, PREVIOUS_STATUS, transition_error, transition_orders
 provider_bp = Blueprint('provider', __name__)
 
                                                                    
@@ -192,12 +200,7 @@ def apply_verification():
                 filename = f"provider_{profile_id}_{timestamp}.jpg"
                 filepath = os.path.join(IMAGES_FOLDER, filename)
                 
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    folder="urbanease/providers",
-                    allowed_formats=['jpg', 'jpeg', 'png', 'webp']
-                )
-                profile_image_path = upload_result.get('secure_url')
+                profile_image_path = upload_image(file, "urbanease/providers")
                 
                                                    
                 existing_pic = ProviderProfilePic.query.filter_by(provider_id=profile_id).first()
@@ -210,7 +213,10 @@ def apply_verification():
                     )
                     db.session.add(new_pic)
         
+        refresh_provider_cards(profile_id)
         db.session.commit()
+        bump_version('providers')
+        refresh_catalogue('kitchen', 'service')
         
         return jsonify({
             'success': True,
@@ -371,12 +377,7 @@ def add_house_listing():
                 if size > MAX_FILE_SIZE:
                     continue                                   
                 
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    folder="urbanease/uploads",
-                    allowed_formats=['jpg', 'jpeg', 'png', 'webp']
-                )
-                filename = upload_result.get('secure_url')
+                filename = upload_image(file, "urbanease/uploads")
                 
                                      
                                                                 
@@ -475,7 +476,10 @@ def get_provider_tiffin_listings():
                 'available_days': listing.available_days,
                 'preview_image': preview_image,
                 'created_at': listing.created_at.strftime('%Y-%m-%d'),
-                'kitchen_open': listing.kitchen_open
+                'kitchen_open': listing.kitchen_open,
+                'slot_capacity': listing.slot_capacity,
+                'latitude': listing.latitude,
+                'longitude': listing.longitude
             })
             
         return jsonify(results), 200
@@ -505,10 +509,16 @@ def add_tiffin_listing():
         fast_delivery = request.form.get('fast_delivery') == 'true'
         diet_type = request.form.get('diet_type')
         available_days = request.form.get('available_days')
+        latitude = parse_coordinate(request.form.get('latitude'), 90)
+        longitude = parse_coordinate(request.form.get('longitude'), 180)
         
         if not all([delivery_radius, diet_type, available_days]):
              return jsonify({'success': False, 'message': 'Missing required fields'}), 400
 
+        delivery_radius = parse_radius(delivery_radius)
+        if delivery_radius is None:
+            return jsonify({'success': False, 'message': f'Delivery radius must be more than 0 and at most {MAX_RADIUS_KM} km'}), 400
+
                         
         new_listing = TiffinListing(
             provider_id=profile.id,
@@ -516,11 +526,14 @@ def add_tiffin_listing():
             fast_delivery_available=fast_delivery,
             diet_type=diet_type,
             available_days=available_days,
+            latitude=latitude,
+            longitude=longitude,
             status='pending'
         )
         
         db.session.add(new_listing)
         db.session.flush()         
+        refresh_provider_cards(profile.id)
         
                        
         files = request.files.getlist('images')
@@ -534,12 +547,7 @@ def add_tiffin_listing():
                 if size > MAX_FILE_SIZE:
                     continue 
                 
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    folder="urbanease/services",
-                    allowed_formats=['jpg', 'jpeg', 'png', 'webp']
-                )
-                filename = upload_result.get('secure_url')
+                filename = upload_image(file, "urbanease/services")
                 
                                      
                 new_image = TiffinImage(
@@ -582,6 +590,9 @@ def toggle_kitchen_status(listing_id):
                        
         listing.kitchen_open = not listing.kitchen_open
         db.session.commit()
+        bump_version(f"tiffin:{listing_id}")
+        refresh_menu_document(listing_id)
+        refresh_catalogue('kitchen')
         
         return jsonify({
             'success': True, 
@@ -594,6 +605,82 @@ def toggle_kitchen_status(listing_id):
         print(f"Error toggling kitchen status: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@provider_bp.route('/provider/tiffin/<int:listing_id>/capacity', methods=['POST'])
+@require_provider_auth
+def update_kitchen_capacity(listing_id):
+    """Set how many meals a kitchen accepts per meal slot per day (empty for unlimited)"""
+    try:
+        user = get_current_user()
+        profile = ProviderProfile.query.filter_by(user_id=user.id).first()
+        
+        if not profile or profile.verification_status != 'verified':
+            return jsonify({'success': False, 'message': 'Provider must be verified'}), 403
+            
+        listing = TiffinListing.query.filter_by(id=listing_id, provider_id=profile.id).first()
+        
+        if not listing:
+            return jsonify({'success': False, 'message': 'Listing not found or unauthorized'}), 404
+        
+        data = request.get_json() or {}
+        slot_capacity = data.get('slot_capacity')
+        
+        if slot_capacity in (None, ''):
+            slot_capacity = None
+        else:
+            try:
+                slot_capacity = int(slot_capacity)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'Capacity must be a whole number'}), 400
+            if slot_capacity < 0:
+                return jsonify({'success': False, 'message': 'Capacity cannot be negative'}), 400
+        
+        listing.slot_capacity = slot_capacity
+        db.session.commit()
+        invalidate_snapshot()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Kitchen capacity updated',
+            'slot_capacity': listing.slot_capacity
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating kitchen capacity: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@provider_bp.route('/provider/tiffin/<int:listing_id>/location', methods=['POST'])
+@require_provider_auth
+def update_kitchen_location(listing_id):
+    """Set the kitchen's coordinates, used by the "deliverable to my address" filter"""
+    try:
+        user = get_current_user()
+        profile = ProviderProfile.query.filter_by(user_id=user.id).first()
+
+        if not profile:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+
+        listing = TiffinListing.query.filter_by(id=listing_id, provider_id=profile.id).first()
+        if not listing:
+            return jsonify({'success': False, 'message': 'Listing not found or unauthorized'}), 404
+
+        data = request.get_json() or {}
+        latitude, longitude, location_error = parse_location(data.get('latitude'), data.get('longitude'))
+        if location_error:
+            return jsonify({'success': False, 'message': location_error}), 400
+
+        listing.latitude = latitude
+        listing.longitude = longitude
+        db.session.commit()
+        refresh_catalogue('kitchen')
+
+        return jsonify({'success': True, 'message': 'Kitchen location updated'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating kitchen location: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @provider_bp.route('/provider/tiffin/<int:listing_id>/add-meal', methods=['POST'])
 @require_provider_auth
 def add_meal(listing_id):
@@ -634,12 +721,7 @@ def add_meal(listing_id):
              return jsonify({'success': False, 'message': 'No selected file'}), 400
              
         if file and allowed_file(file.filename):
-            upload_result = cloudinary.uploader.upload(
-                file,
-                folder="urbanease/services",
-                allowed_formats=['jpg', 'jpeg', 'png', 'webp']
-            )
-            filename = upload_result.get('secure_url')
+            filename = upload_image(file, "urbanease/services")
             
             new_meal = Meal(
                 tiffin_listing_id=listing.id,
@@ -654,6 +736,8 @@ def add_meal(listing_id):
             
             db.session.add(new_meal)
             db.session.commit()
+            bump_version(f"tiffin:{listing.id}")
+            refresh_menu_document(listing.id)
             
             return jsonify({'success': True, 'message': 'Meal added successfully'}), 201
         
@@ -680,23 +764,9 @@ def get_meals(listing_id):
          if not listing:
               return jsonify({'success': False, 'message': 'Listing not found'}), 404
               
-         meals = Meal.query.filter_by(tiffin_listing_id=listing.id).order_by(Meal.created_at.desc()).all()
+         document = menu_document(listing.id)
          
-         results = []
-         for meal in meals:
-             results.append({
-                 'id': meal.id,
-                 'meal_name': meal.meal_name,
-                 'description': meal.description,
-                 'meal_category': meal.meal_category,
-                 'diet_type': meal.diet_type,
-                 'price': float(meal.price),
-                 'is_available': meal.is_available,
-                 'meal_image_path': meal.meal_image_path,
-                 'created_at': meal.created_at.strftime('%Y-%m-%d')
-             })
-             
-         return jsonify(results), 200
+         return etag_json_response(document['meals'], document['etag'])
 
     except Exception as e:
         print(f"Error fetching meals: {e}")
@@ -735,14 +805,11 @@ def edit_meal(meal_id):
         if 'meal_image' in request.files:
             file = request.files['meal_image']
             if file.filename != '' and allowed_file(file.filename):
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    folder="urbanease/services",
-                    allowed_formats=['jpg', 'jpeg', 'png', 'webp']
-                )
-                meal.meal_image_path = upload_result.get('secure_url')
+                meal.meal_image_path = upload_image(file, "urbanease/services")
         
         db.session.commit()
+        bump_version(f"tiffin:{listing.id}")
+        refresh_menu_document(listing.id)
         
         return jsonify({'success': True, 'message': 'Meal updated successfully'}), 200
         
@@ -769,7 +836,7 @@ def get_active_orders_count():
             TiffinListing, Order.tiffin_listing_id == TiffinListing.id
         ).filter(
             TiffinListing.provider_id == profile.id,
-            Order.order_status.in_(['placed', 'preparing', 'out_for_delivery'])
+            Order.order_status.in_(ACTIVE_ORDER_STATUSES)
         ).count()
         
         return jsonify({'active_count': active_count}), 200
@@ -841,33 +908,24 @@ def update_order_status(order_id):
         if not new_status:
             return jsonify({'success': False, 'message': 'New status required'}), 400
         
-                           
-        valid_transitions = {
-            'placed': 'preparing',
-            'preparing': 'out_for_delivery',
-            'out_for_delivery': 'delivered'
-        }
-        
-                                                               
-        order = db.session.query(Order).join(
-            TiffinListing, Order.tiffin_listing_id == TiffinListing.id
-        ).filter(
-            Order.id == order_id,
-            TiffinListing.provider_id == profile.id
-        ).first()
-        
-        if not order:
-            return jsonify({'success': False, 'message': 'Order not found or unauthorized'}), 404
+        transitioned = transition_orders(profile.id, [order_id], new_status)
         
-                                      
-        if order.order_status not in valid_transitions:
-            return jsonify({'success': False, 'message': 'Order cannot be updated'}), 400
+        if not transitioned:
+            db.session.rollback()
+            order = db.session.query(Order).join(
+                TiffinListing, Order.tiffin_listing_id == TiffinListing.id
+            ).filter(
+                Order.id == order_id,
+                TiffinListing.provider_id == profile.id
+            ).first()
             
-        if valid_transitions[order.order_status] != new_status:
-            return jsonify({'success': False, 'message': f'Invalid status transition from {order.order_status} to {new_status}'}), 400
+            if not order:
+                return jsonify({'success': False, 'message': 'Order not found or unauthorized'}), 404
+            
+            return jsonify({'success': False, 'message': transition_error(order.order_status, new_status) or 'Order cannot be updated'}), 400
         
-        order.order_status = new_status
         db.session.commit()
+        bump_version(f"orders:{transitioned[0][1]}")
         
         return jsonify({'success': True, 'message': 'Status updated', 'new_status': new_status}), 200
         
@@ -876,6 +934,55 @@ def update_order_status(order_id):
         print(f"Error updating order status: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+
+@provider_bp.route('/provider/orders/bulk-status', methods=['POST'])
+@require_provider_auth
+def bulk_update_order_status():
+    """Move many orders to the same next status at once; reports which ids moved"""
+    try:
+        user = get_current_user()
+        profile = ProviderProfile.query.filter_by(user_id=user.id).first()
+        
+        if not profile:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+        
+        data = request.get_json() or {}
+        new_status = data.get('new_status')
+        
+        if new_status not in PREVIOUS_STATUS:
+            return jsonify({'success': False, 'message': 'Invalid target status'}), 400
+        
+        try:
+            order_ids = sorted({int(order_id) for order_id in data.get('order_ids') or []})
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Order ids must be integers'}), 400
+        
+        if not order_ids or len(order_ids) > BULK_MAX_ORDERS:
+            return jsonify({'success': False, 'message': f'Select between 1 and {BULK_MAX_ORDERS} orders'}), 400
+        
+        transitioned = transition_orders(profile.id, order_ids, new_status)
+        db.session.commit()
+        
+        for customer_id in {customer_id for _, customer_id in transitioned}:
+            bump_version(f"orders:{customer_id}")
+        
+        updated = sorted(order_id for order_id, _ in transitioned)
+        skipped = sorted(set(order_ids) - set(updated))
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(updated)} of {len(order_ids)} orders updated',
+            'new_status': new_status,
+            'updated': updated,
+            'skipped': skipped
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error bulk updating order status: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
                                 
 
 @provider_bp.route('/provider/api/service-listings', methods=['GET'])
@@ -901,6 +1008,11 @@ def get_provider_service_listings():
                 'base_price': float(listing.base_price),
                 'service_radius': float(listing.service_radius) if listing.service_radius else 0,
                 'availability_days': listing.availability_days,
+                'slot_minutes': listing.slot_minutes,
+                'available_from': listing.available_from.strftime('%H:%M'),
+                'available_to': listing.available_to.strftime('%H:%M'),
+                'latitude': listing.latitude,
+                'longitude': listing.longitude,
                 'status': listing.status,
                 'created_at': listing.created_at.strftime('%Y-%m-%d')
             })
@@ -934,10 +1046,26 @@ def add_service_listing():
         base_price = request.form.get('base_price')
         service_radius = request.form.get('service_radius')
         availability_days = request.form.get('availability_days')
+        latitude = parse_coordinate(request.form.get('latitude'), 90)
+        longitude = parse_coordinate(request.form.get('longitude'), 180)
         
         if not all([service_category, service_title, description, base_price, service_radius, availability_days]):
              return jsonify({'success': False, 'message': 'Missing required fields'}), 400
 
+        service_radius = parse_radius(service_radius)
+        if service_radius is None:
+            return jsonify({'success': False, 'message': f'Service radius must be more than 0 and at most {MAX_RADIUS_KM} km'}), 400
+
+        try:
+            slot_minutes = int(request.form.get('slot_minutes') or DEFAULT_SLOT_MINUTES)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid slot length'}), 400
+        available_from = parse_slot_time(request.form.get('available_from') or '09:00')
+        available_to = parse_slot_time(request.form.get('available_to') or '18:00')
+        schedule_problem = schedule_error(slot_minutes, available_from, available_to)
+        if schedule_problem:
+            return jsonify({'success': False, 'message': schedule_problem}), 400
+
                         
         new_listing = ServiceListing(
             provider_id=profile.id,
@@ -947,10 +1075,16 @@ def add_service_listing():
             base_price=base_price,
             service_radius=service_radius,
             availability_days=availability_days,
+            slot_minutes=slot_minutes,
+            available_from=available_from,
+            available_to=available_to,
+            latitude=latitude,
+            longitude=longitude,
             status='pending'
         )
         
         db.session.add(new_listing)
+        refresh_provider_cards(profile.id)
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Service listing added successfully'}), 201
@@ -960,7 +1094,79 @@ def add_service_listing():
         print(f"Error adding service listing: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
-                                 
+
+@provider_bp.route('/provider/service/<int:listing_id>/schedule', methods=['POST'])
+@require_provider_auth
+def update_service_schedule(listing_id):
+    """Set the booking slot length and working hours of one of the provider's services"""
+    try:
+        user = get_current_user()
+        profile = ProviderProfile.query.filter_by(user_id=user.id).first()
+
+        if not profile:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+
+        listing = ServiceListing.query.filter_by(id=listing_id, provider_id=profile.id).first()
+        if not listing:
+            return jsonify({'success': False, 'message': 'Service not found or unauthorized'}), 404
+
+        data = request.get_json() or {}
+        try:
+            slot_minutes = int(data.get('slot_minutes'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Invalid slot length'}), 400
+        available_from = parse_slot_time(data.get('available_from'))
+        available_to = parse_slot_time(data.get('available_to'))
+        schedule_problem = schedule_error(slot_minutes, available_from, available_to)
+        if schedule_problem:
+            return jsonify({'success': False, 'message': schedule_problem}), 400
+
+        listing.slot_minutes = slot_minutes
+        listing.available_from = available_from
+        listing.available_to = available_to
+        db.session.commit()
+        bump_version(f"service:{listing.id}")
+
+        return jsonify({'success': True, 'message': 'Booking slots updated'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating service schedule: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@provider_bp.route('/provider/service/<int:listing_id>/location', methods=['POST'])
+@require_provider_auth
+def update_service_location(listing_id):
+    """Set the service's base coordinates, used by the "available at my address" filter"""
+    try:
+        user = get_current_user()
+        profile = ProviderProfile.query.filter_by(user_id=user.id).first()
+
+        if not profile:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+
+        listing = ServiceListing.query.filter_by(id=listing_id, provider_id=profile.id).first()
+        if not listing:
+            return jsonify({'success': False, 'message': 'Service not found or unauthorized'}), 404
+
+        data = request.get_json() or {}
+        latitude, longitude, location_error = parse_location(data.get('latitude'), data.get('longitude'))
+        if location_error:
+            return jsonify({'success': False, 'message': location_error}), 400
+
+        listing.latitude = latitude
+        listing.longitude = longitude
+        db.session.commit()
+        refresh_catalogue('service')
+
+        return jsonify({'success': True, 'message': 'Service location updated'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating service location: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 
 @provider_bp.route('/provider/service-bookings/active-count', methods=['GET'])
 @require_provider_auth
@@ -1075,6 +1281,8 @@ def update_service_booking_status(booking_id):
         
         booking.booking_status = new_status
         db.session.commit()
+        bump_version(f"bookings:{booking.customer_id}")
+        bump_version(f"service:{booking.service_listing_id}")
         
         return jsonify({'success': True, 'message': 'Status updated', 'new_status': new_status}), 200
         
@@ -0,0 +1,30 @@
+# Provider card columns kept on kitchen and service listings
+#
+# Browse and saved pages show each listing's provider name, avatar and
+# verification status. Those are copied onto tiffin_listings and
+# service_listings (provider_name, provider_image, provider_status) so the
+# browse queries read a single table. The copies are rewritten whenever a
+# provider's profile or verification changes (apply_verification,
+# approve_provider, reject_provider) and when a listing is added.
+from sqlalchemy import text
+
+from backend.authorization import db
+
+CARD_TABLES = ('tiffin_listings', 'service_listings')
+
+
+def refresh_provider_cards(provider_id):
+    """Copy the provider's current card onto all of their listings; the caller commits"""
+    # pending ORM changes to the profile or picture must be visible to the UPDATEs
+    db.session.flush()
+    for table in CARD_TABLES:
+        db.session.execute(text(f"""
+            UPDATE {table} l
+            SET provider_name = pp.business_name,
+                provider_image = ppic.image_path,
+                provider_status = pp.verification_status
+            FROM provider_profiles pp
+            LEFT JOIN provider_profile_pics ppic ON ppic.provider_id = pp.id
+            WHERE pp.id = :provider_id
+            AND l.provider_id = pp.id
+        """), {'provider_id': provider_id})
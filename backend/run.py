@@ -3,16 +3,36 @@ from backend.admin import admin_bp
 from backend.provider import provider_bp
 from backend.customer import customer_bp
 from backend.cloudinary_config import configure_cloudinary
+from backend.assets import init_assets
+from backend.compression import init_compression
+from backend.schema import upgrade_schema
+from backend.catalogue_views import refresh_catalogue_at_startup
+from backend.db_routing import init_db_routing
 
 # Initialize Cloudinary
 configure_cloudinary()
 
+# JSON responses above min_size are gzip/brotli-encoded and carry weak ETags
+init_compression(admin_bp, min_size=512)
+init_compression(provider_bp, min_size=1024)
+init_compression(customer_bp, min_size=1024)
+
 app.register_blueprint(admin_bp)
 app.register_blueprint(provider_bp)
 app.register_blueprint(customer_bp)
 
+init_assets(app)
+
+# Read-only routes use DATABASE_REPLICA_URL when it is set and caught up
+init_db_routing(app, db)
+
 with app.app_context():
-    db.create_all()
+    db.create_all(bind_key=None)
+    upgrade_schema(db, catalogue_views=app.config['USE_CATALOGUE_VIEWS'])
+
+# views are (re)created with current data above; one worker refreshes them in
+# the background in case a refresh was still pending when workers last stopped
+refresh_catalogue_at_startup(app)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
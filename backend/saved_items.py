@@ -0,0 +1,195 @@
+# Saved listings (houses, kitchens, services) in the saved_items table
+#
+# Each save is a single INSERT ... SELECT from the listing table, so listing
+# validation, the duplicate check and the insert happen in one statement and a
+# double click cannot create a second row. Each unsave is a single
+# DELETE ... RETURNING. The saved pages read through saved_page(), which
+# paginates on (created_at, id) instead of OFFSET.
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+
+from backend.authorization import db
+
+# kind -> listing table and the conditions a listing must meet to be saved
+SAVED_KINDS = {
+    'house': {
+        'listing_table': 'house_listings',
+        'conditions': "status = 'approved'",
+    },
+    'kitchen': {
+        'listing_table': 'tiffin_listings',
+        'conditions': "status = 'approved'",
+    },
+    'service': {
+        'listing_table': 'service_listings',
+        'conditions': "status = 'approved'",
+    },
+}
+SAVED_KIND_ALIASES = {'hostel': 'house', 'pg': 'house', 'apartment': 'house', 'restaurant': 'kitchen'}
+
+# kind -> what the saved page shows for each listing (l is the listing table)
+SAVED_PAGE_QUERIES = {
+    'house': {
+        'columns': """l.id, l.title, l.description, l.price, l.location, l.type,
+               (SELECT image_path
+                FROM house_images
+                WHERE listing_id = l.id
+                ORDER BY created_at ASC
+                LIMIT 1) AS main_image""",
+        'joins': "",
+        'conditions': "l.status = 'approved'",
+    },
+    'kitchen': {
+        'columns': """l.id, l.delivery_radius, l.fast_delivery_available, l.diet_type,
+               l.available_days, l.created_at, l.provider_name AS business_name, l.provider_status,
+               (SELECT image_path
+                FROM tiffin_images
+                WHERE tiffin_listing_id = l.id
+                ORDER BY created_at ASC
+                LIMIT 1) AS main_image""",
+        'joins': "",
+        'conditions': "TRUE",
+    },
+    'service': {
+        'columns': """l.id, l.service_title, l.service_category, l.base_price, l.service_radius,
+               l.availability_days, l.provider_name AS business_name, l.provider_status, l.provider_image""",
+        'joins': "",
+        'conditions': "l.status = 'approved'",
+    },
+}
+
+SAVED_PAGE_SIZE = 24
+
+# save_item() results
+SAVED = 'saved'
+ALREADY_SAVED = 'already_saved'
+NOT_FOUND = 'not_found'
+
+
+def save_item(customer_id, kind, listing_id, listing_type=None, conditions=None):
+    """Save a listing for a customer; returns SAVED, ALREADY_SAVED or NOT_FOUND.
+
+    listing_type restricts house saves to one of Hostel/PG/Apartment;
+    conditions adds SQL conditions on the listing table (e.g. kitchen_open).
+    """
+    config = SAVED_KINDS[kind]
+    where = config['conditions']
+    params = {'customer_id': customer_id, 'kind': kind, 'listing_id': listing_id}
+    if listing_type:
+        where += " AND type = :listing_type"
+        params['listing_type'] = listing_type
+    if conditions:
+        where += f" AND {conditions}"
+
+    row = db.session.execute(text(f"""
+        WITH listing AS (
+            SELECT id
+            FROM {config['listing_table']}
+            WHERE id = :listing_id
+            AND {where}
+        ), inserted AS (
+            INSERT INTO saved_items (customer_id, kind, item_id)
+            SELECT :customer_id, :kind, id FROM listing
+            ON CONFLICT (customer_id, kind, item_id) DO NOTHING
+            RETURNING 1
+        )
+        SELECT EXISTS (SELECT 1 FROM listing), EXISTS (SELECT 1 FROM inserted)
+    """), params).fetchone()
+    db.session.commit()
+
+    found, inserted = row
+    if not found:
+        return NOT_FOUND
+    return SAVED if inserted else ALREADY_SAVED
+
+
+def unsave_item(customer_id, kind, listing_id):
+    """Remove a saved listing; returns True when a row was deleted"""
+    row = db.session.execute(text("""
+        DELETE FROM saved_items
+        WHERE customer_id = :customer_id
+        AND kind = :kind
+        AND item_id = :listing_id
+        RETURNING item_id
+    """), {'customer_id': customer_id, 'kind': kind, 'listing_id': listing_id}).fetchone()
+    db.session.commit()
+    return row is not None
+
+
+def saved_ids(customer_id, kind):
+    """Every listing id of one kind the customer has saved"""
+    rows = db.session.execute(text("""
+        SELECT item_id
+        FROM saved_items
+        WHERE customer_id = :customer_id
+        AND kind = :kind
+    """), {'customer_id': customer_id, 'kind': kind}).fetchall()
+    return {row[0] for row in rows}
+
+
+def saved_among(customer_id, kind, listing_ids):
+    """The subset of listing_ids the customer has saved (one query)"""
+    if not listing_ids:
+        return set()
+    query = text("""
+        SELECT item_id
+        FROM saved_items
+        WHERE customer_id = :customer_id
+        AND kind = :kind
+        AND item_id IN :ids
+    """).bindparams(bindparam('ids', expanding=True))
+    rows = db.session.execute(query, {
+        'customer_id': customer_id,
+        'kind': kind,
+        'ids': sorted(listing_ids)
+    }).fetchall()
+    return {row[0] for row in rows}
+
+
+def parse_cursor(value):
+    """Decode a saved-page cursor ('<iso timestamp>_<saved item id>'); None when missing or invalid"""
+    if not value:
+        return None
+    saved_at, _, saved_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(saved_at), int(saved_id)
+    except ValueError:
+        return None
+
+
+def saved_page(customer_id, kind, cursor=None, limit=SAVED_PAGE_SIZE):
+    """One page of a customer's saved listings, newest first.
+
+    Returns (rows, next_cursor); rows hold the SAVED_PAGE_QUERIES columns and
+    next_cursor is None on the last page.
+    """
+    config = SAVED_KINDS[kind]
+    page = SAVED_PAGE_QUERIES[kind]
+    params = {'customer_id': customer_id, 'kind': kind, 'limit': limit + 1}
+
+    keyset = ""
+    if cursor:
+        keyset = "AND (si.created_at, si.id) < (:cursor_at, :cursor_id)"
+        params['cursor_at'], params['cursor_id'] = cursor
+
+    rows = db.session.execute(text(f"""
+        SELECT si.id AS saved_id, si.created_at AS saved_at,
+               {page['columns']}
+        FROM saved_items si
+        JOIN {config['listing_table']} l ON l.id = si.item_id
+        {page['joins']}
+        WHERE si.customer_id = :customer_id
+        AND si.kind = :kind
+        AND {page['conditions']}
+        {keyset}
+        ORDER BY si.created_at DESC, si.id DESC
+        LIMIT :limit
+    """), params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last['saved_at'].isoformat()}_{last['saved_id']}"
+    return rows, next_cursor
@@ -0,0 +1,428 @@
+# Schema upgrades that db.create_all() cannot express
+#
+# create_all() only creates missing tables. Indexes, new columns on existing
+# tables and triggers are listed here as idempotent PostgreSQL statements and
+# applied in order on every start-up (see run.py). One-off data migrations are
+# listed in DATA_MIGRATIONS and recorded in schema_migrations once applied.
+from sqlalchemy import text
+
+SCHEMA_UPGRADES = [
+    # Housing browse: approved listings of one type, newest first
+    """CREATE INDEX IF NOT EXISTS idx_house_listings_type_status_created
+       ON house_listings (type, status, created_at DESC)""",
+    # First image per listing (main_image subquery and detail image lists)
+    """CREATE INDEX IF NOT EXISTS idx_house_images_listing_created
+       ON house_images (listing_id, created_at)""",
+    # Housing price sort / min-max price range
+    """CREATE INDEX IF NOT EXISTS idx_house_listings_type_status_price
+       ON house_listings (type, status, price)""",
+    # house_listings.save_count: added and backfilled once on existing databases
+    """DO $$
+       BEGIN
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'house_listings' AND column_name = 'save_count') THEN
+               ALTER TABLE house_listings ADD COLUMN save_count INTEGER NOT NULL DEFAULT 0;
+               UPDATE house_listings hl
+               SET save_count = s.cnt
+               FROM (SELECT house_listing_id, COUNT(*) AS cnt
+                     FROM saved_houses GROUP BY house_listing_id) s
+               WHERE hl.id = s.house_listing_id;
+           END IF;
+       END
+       $$""",
+    # ...and kept up to date by a trigger on the house rows of saved_items
+    """CREATE OR REPLACE FUNCTION house_listings_save_count() RETURNS trigger AS $$
+       BEGIN
+           IF TG_OP = 'INSERT' AND NEW.kind = 'house' THEN
+               UPDATE house_listings SET save_count = save_count + 1 WHERE id = NEW.item_id;
+           ELSIF TG_OP = 'DELETE' AND OLD.kind = 'house' THEN
+               UPDATE house_listings SET save_count = GREATEST(save_count - 1, 0) WHERE id = OLD.item_id;
+           END IF;
+           RETURN NULL;
+       END
+       $$ LANGUAGE plpgsql""",
+    """DROP TRIGGER IF EXISTS trg_saved_houses_save_count ON saved_houses""",
+    """DROP TRIGGER IF EXISTS trg_saved_items_save_count ON saved_items""",
+    """CREATE TRIGGER trg_saved_items_save_count
+       AFTER INSERT OR DELETE ON saved_items
+       FOR EACH ROW EXECUTE FUNCTION house_listings_save_count()""",
+    # Housing "most saved" sort
+    """CREATE INDEX IF NOT EXISTS idx_house_listings_type_status_saves
+       ON house_listings (type, status, save_count DESC, created_at DESC)""",
+    # Coordinates for radius search (see geo.py)
+    """ALTER TABLE tiffin_listings ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION""",
+    """ALTER TABLE tiffin_listings ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION""",
+    """ALTER TABLE service_listings ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION""",
+    """ALTER TABLE service_listings ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION""",
+    """ALTER TABLE customer_addresses ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION""",
+    """ALTER TABLE customer_addresses ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION""",
+    # Bounding-box prefilter for "deliverable to my address"
+    """CREATE INDEX IF NOT EXISTS idx_tiffin_listings_lat_lng
+       ON tiffin_listings (latitude, longitude)
+       WHERE status = 'approved' AND latitude IS NOT NULL""",
+    """CREATE INDEX IF NOT EXISTS idx_service_listings_lat_lng
+       ON service_listings (latitude, longitude)
+       WHERE status = 'approved' AND latitude IS NOT NULL""",
+    # orders.updated_at: added and backfilled from order_date once...
+    """DO $$
+       BEGIN
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'orders' AND column_name = 'updated_at') THEN
+               ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP DEFAULT now();
+               UPDATE orders SET updated_at = COALESCE(order_date, now());
+           END IF;
+       END
+       $$""",
+    # ...and touched by a trigger whenever an order row changes
+    """CREATE OR REPLACE FUNCTION orders_touch_updated_at() RETURNS trigger AS $$
+       BEGIN
+           IF NEW IS DISTINCT FROM OLD THEN
+               NEW.updated_at = LOCALTIMESTAMP;
+           END IF;
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql""",
+    """DROP TRIGGER IF EXISTS trg_orders_updated_at ON orders""",
+    """CREATE TRIGGER trg_orders_updated_at
+       BEFORE UPDATE ON orders
+       FOR EACH ROW EXECUTE FUNCTION orders_touch_updated_at()""",
+    # My Orders: keyset pages and status-change polling
+    """CREATE INDEX IF NOT EXISTS idx_orders_customer_date
+       ON orders (customer_id, order_date DESC, id DESC)""",
+    """CREATE INDEX IF NOT EXISTS idx_orders_customer_updated
+       ON orders (customer_id, updated_at)""",
+    # Meals per slot (meal category per day); NULL means unlimited
+    """ALTER TABLE tiffin_listings ADD COLUMN IF NOT EXISTS slot_capacity INTEGER""",
+    # Per-kitchen menu document (see menu.py), rebuilt on meal/kitchen writes
+    """ALTER TABLE tiffin_listings ADD COLUMN IF NOT EXISTS menu_json TEXT""",
+    # Cart checkouts: order rows placed together share a checkout_id
+    """ALTER TABLE orders ADD COLUMN IF NOT EXISTS checkout_id VARCHAR(32)""",
+    """CREATE INDEX IF NOT EXISTS idx_orders_checkout
+       ON orders (checkout_id)
+       WHERE checkout_id IS NOT NULL""",
+    # Service booking slots (see availability.py)
+    """ALTER TABLE service_listings ADD COLUMN IF NOT EXISTS slot_minutes INTEGER NOT NULL DEFAULT 60""",
+    """ALTER TABLE service_listings ADD COLUMN IF NOT EXISTS available_from TIME NOT NULL DEFAULT '09:00'""",
+    """ALTER TABLE service_listings ADD COLUMN IF NOT EXISTS available_to TIME NOT NULL DEFAULT '18:00'""",
+    # Taken slots of one listing over a date range
+    """CREATE INDEX IF NOT EXISTS idx_service_bookings_listing_date
+       ON service_bookings (service_listing_id, booking_date) INCLUDE (booking_time)
+       WHERE booking_status IN ('requested', 'accepted')""",
+    # Working days as a weekday bitmask (bit 0 = Monday), parsed from the free
+    # text the provider form writes: 'All Days', 'Weekdays', 'Weekends',
+    # 'Monday, Wednesday', or abbreviations and ranges such as 'Mon-Fri'.
+    # Text naming no day at all counts as every day.
+    """CREATE OR REPLACE FUNCTION weekday_mask(days TEXT) RETURNS SMALLINT AS $$
+       DECLARE
+           value TEXT := lower(btrim(coalesce(days, '')));
+           names TEXT[] := ARRAY['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'];
+           part TEXT;
+           bounds TEXT[];
+           first_day INT;
+           last_day INT;
+           mask INT := 0;
+       BEGIN
+           IF value IN ('all days', 'everyday', 'every day', 'daily') THEN
+               RETURN 127;
+           ELSIF value = 'weekdays' THEN
+               RETURN 31;
+           ELSIF value = 'weekends' THEN
+               RETURN 96;
+           END IF;
+           FOREACH part IN ARRAY regexp_split_to_array(value, '[,;/]') LOOP
+               bounds := regexp_split_to_array(replace(part, ' to ', '-'), '-');
+               first_day := array_position(names, left(btrim(bounds[1]), 3)) - 1;
+               IF array_length(bounds, 1) = 2 THEN
+                   last_day := array_position(names, left(btrim(bounds[2]), 3)) - 1;
+                   IF first_day IS NOT NULL AND last_day IS NOT NULL THEN
+                       FOR offset_days IN 0 .. (last_day - first_day + 7) % 7 LOOP
+                           mask := mask | (1 << ((first_day + offset_days) % 7));
+                       END LOOP;
+                   END IF;
+               ELSIF array_length(bounds, 1) = 1 AND first_day IS NOT NULL THEN
+                   mask := mask | (1 << first_day);
+               END IF;
+           END LOOP;
+           RETURN CASE WHEN mask = 0 THEN 127 ELSE mask END;
+       END
+       $$ LANGUAGE plpgsql IMMUTABLE""",
+    # available_days_mask: added and backfilled once on existing databases...
+    """DO $$
+       BEGIN
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'tiffin_listings' AND column_name = 'available_days_mask') THEN
+               ALTER TABLE tiffin_listings ADD COLUMN available_days_mask SMALLINT;
+               UPDATE tiffin_listings SET available_days_mask = weekday_mask(available_days);
+           END IF;
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'service_listings' AND column_name = 'available_days_mask') THEN
+               ALTER TABLE service_listings ADD COLUMN available_days_mask SMALLINT;
+               UPDATE service_listings SET available_days_mask = weekday_mask(availability_days);
+           END IF;
+       END
+       $$""",
+    # ...and reparsed by triggers whenever the day text is written
+    """CREATE OR REPLACE FUNCTION tiffin_listings_days_mask() RETURNS trigger AS $$
+       BEGIN
+           NEW.available_days_mask := weekday_mask(NEW.available_days);
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql""",
+    """DROP TRIGGER IF EXISTS trg_tiffin_listings_days_mask ON tiffin_listings""",
+    """CREATE TRIGGER trg_tiffin_listings_days_mask
+       BEFORE INSERT OR UPDATE OF available_days ON tiffin_listings
+       FOR EACH ROW EXECUTE FUNCTION tiffin_listings_days_mask()""",
+    """CREATE OR REPLACE FUNCTION service_listings_days_mask() RETURNS trigger AS $$
+       BEGIN
+           NEW.available_days_mask := weekday_mask(NEW.availability_days);
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql""",
+    """DROP TRIGGER IF EXISTS trg_service_listings_days_mask ON service_listings""",
+    """CREATE TRIGGER trg_service_listings_days_mask
+       BEFORE INSERT OR UPDATE OF availability_days ON service_listings
+       FOR EACH ROW EXECUTE FUNCTION service_listings_days_mask()""",
+    # "Open on <day>" browse filters
+    """CREATE INDEX IF NOT EXISTS idx_tiffin_listings_status_days
+       ON tiffin_listings (status, available_days_mask)""",
+    """CREATE INDEX IF NOT EXISTS idx_service_listings_status_days
+       ON service_listings (status, available_days_mask)""",
+    # Services browse: approved services of one category, newest first
+    """CREATE INDEX IF NOT EXISTS idx_service_listings_status_category_created
+       ON service_listings (status, service_category, created_at DESC, id DESC)""",
+    # Provider card columns (see provider_cards.py): added and backfilled once
+    """DO $$
+       BEGIN
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'tiffin_listings' AND column_name = 'provider_name') THEN
+               ALTER TABLE tiffin_listings ADD COLUMN provider_name VARCHAR(150),
+                                           ADD COLUMN provider_image TEXT,
+                                           ADD COLUMN provider_status VARCHAR(20);
+               UPDATE tiffin_listings l
+               SET provider_name = pp.business_name,
+                   provider_image = ppic.image_path,
+                   provider_status = pp.verification_status
+               FROM provider_profiles pp
+               LEFT JOIN provider_profile_pics ppic ON ppic.provider_id = pp.id
+               WHERE l.provider_id = pp.id;
+           END IF;
+           IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                          WHERE table_name = 'service_listings' AND column_name = 'provider_name') THEN
+               ALTER TABLE service_listings ADD COLUMN provider_name VARCHAR(150),
+                                            ADD COLUMN provider_image TEXT,
+                                            ADD COLUMN provider_status VARCHAR(20);
+               UPDATE service_listings l
+               SET provider_name = pp.business_name,
+                   provider_image = ppic.image_path,
+                   provider_status = pp.verification_status
+               FROM provider_profiles pp
+               LEFT JOIN provider_profile_pics ppic ON ppic.provider_id = pp.id
+               WHERE l.provider_id = pp.id;
+           END IF;
+       END
+       $$""",
+    # Kitchen browse: open approved kitchens, newest first
+    """CREATE INDEX IF NOT EXISTS idx_tiffin_listings_status_open_created
+       ON tiffin_listings (status, kitchen_open, created_at DESC)""",
+]
+
+# Approved catalogue, one materialized view per browse page (see
+# catalogue_views.py), applied after SCHEMA_UPGRADES only with
+# USE_CATALOGUE_VIEWS=1; with the switch off the views are dropped instead.
+# The unique id index lets them be refreshed CONCURRENTLY. A changed
+# definition needs the view dropped by hand first.
+CATALOGUE_VIEW_UPGRADES = [
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS catalogue_hostels AS
+       SELECT hl.id, hl.type, hl.status, hl.title, hl.description, hl.price, hl.location,
+              hl.save_count, hl.created_at,
+              d.gender, d.room_type, d.wifi, d.attached_bathroom, d.food_included, d.laundry,
+              (SELECT image_path
+               FROM house_images
+               WHERE listing_id = hl.id
+               ORDER BY created_at ASC
+               LIMIT 1) AS main_image
+       FROM house_listings hl
+       JOIN hostel_details d ON hl.id = d.listing_id
+       WHERE hl.type = 'Hostel'
+       AND hl.status = 'approved'""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_catalogue_hostels_id ON catalogue_hostels (id)""",
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS catalogue_pgs AS
+       SELECT hl.id, hl.type, hl.status, hl.title, hl.description, hl.price, hl.location,
+              hl.save_count, hl.created_at,
+              d.gender, d.ac_available, d.sharing, d.food_included, d.laundry,
+              (SELECT image_path
+               FROM house_images
+               WHERE listing_id = hl.id
+               ORDER BY created_at ASC
+               LIMIT 1) AS main_image
+       FROM house_listings hl
+       JOIN pg_details d ON hl.id = d.listing_id
+       WHERE hl.type = 'PG'
+       AND hl.status = 'approved'""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_catalogue_pgs_id ON catalogue_pgs (id)""",
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS catalogue_apartments AS
+       SELECT hl.id, hl.type, hl.status, hl.title, hl.description, hl.price, hl.location,
+              hl.save_count, hl.created_at,
+              d.listing_purpose, d.bhk, d.tenant_preference, d.furnishing,
+              (SELECT image_path
+               FROM house_images
+               WHERE listing_id = hl.id
+               ORDER BY created_at ASC
+               LIMIT 1) AS main_image
+       FROM house_listings hl
+       JOIN apartment_details d ON hl.id = d.listing_id
+       WHERE hl.type = 'Apartment'
+       AND hl.status = 'approved'""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_catalogue_apartments_id ON catalogue_apartments (id)""",
+    # views made before the cards showed the verified badge lack provider_status
+    """DO $$
+       BEGIN
+           IF to_regclass('catalogue_kitchens') IS NOT NULL AND NOT EXISTS (
+               SELECT 1 FROM pg_attribute
+               WHERE attrelid = to_regclass('catalogue_kitchens') AND attname = 'provider_status'
+           ) THEN
+               DROP MATERIALIZED VIEW catalogue_kitchens;
+           END IF;
+           IF to_regclass('catalogue_services') IS NOT NULL AND NOT EXISTS (
+               SELECT 1 FROM pg_attribute
+               WHERE attrelid = to_regclass('catalogue_services') AND attname = 'provider_status'
+           ) THEN
+               DROP MATERIALIZED VIEW catalogue_services;
+           END IF;
+       END $$""",
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS catalogue_kitchens AS
+       SELECT tl.id, tl.status, tl.kitchen_open, tl.delivery_radius, tl.fast_delivery_available,
+              tl.diet_type, tl.available_days, tl.available_days_mask, tl.latitude, tl.longitude,
+              tl.provider_name, tl.provider_status, tl.created_at,
+              (SELECT image_path
+               FROM tiffin_images
+               WHERE tiffin_listing_id = tl.id
+               ORDER BY created_at ASC
+               LIMIT 1) AS main_image
+       FROM tiffin_listings tl
+       WHERE tl.status = 'approved'""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_catalogue_kitchens_id ON catalogue_kitchens (id)""",
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS catalogue_services AS
+       SELECT sl.id, sl.status, sl.provider_id, sl.service_category, sl.service_title, sl.description,
+              sl.base_price, sl.service_radius, sl.availability_days, sl.available_days_mask,
+              sl.latitude, sl.longitude, sl.provider_name, sl.provider_status, sl.provider_image,
+              sl.created_at
+       FROM service_listings sl
+       WHERE sl.status = 'approved'""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_catalogue_services_id ON catalogue_services (id)""",
+    """CREATE INDEX IF NOT EXISTS idx_catalogue_services_category_created
+       ON catalogue_services (service_category, created_at DESC, id DESC)""",
+]
+
+CATALOGUE_VIEW_TEARDOWN = [
+    "DROP MATERIALIZED VIEW IF EXISTS catalogue_hostels",
+    "DROP MATERIALIZED VIEW IF EXISTS catalogue_pgs",
+    "DROP MATERIALIZED VIEW IF EXISTS catalogue_apartments",
+    "DROP MATERIALIZED VIEW IF EXISTS catalogue_kitchens",
+    "DROP MATERIALIZED VIEW IF EXISTS catalogue_services",
+]
+
+# (name, statements); each migration runs once, in one transaction
+DATA_MIGRATIONS = [
+    ('merge_saved_tables', [
+        """INSERT INTO saved_items (customer_id, kind, item_id, created_at)
+           SELECT customer_id, 'house', house_listing_id, COALESCE(created_at, now())
+           FROM saved_houses
+           ON CONFLICT (customer_id, kind, item_id) DO NOTHING""",
+        """INSERT INTO saved_items (customer_id, kind, item_id, created_at)
+           SELECT customer_id, 'kitchen', tiffin_listing_id, COALESCE(created_at, now())
+           FROM saved_kitchens
+           ON CONFLICT (customer_id, kind, item_id) DO NOTHING""",
+        # saved_restaurants has no model, so create_all() never makes it on a fresh database
+        """DO $$
+           BEGIN
+               IF to_regclass('saved_restaurants') IS NOT NULL THEN
+                   INSERT INTO saved_items (customer_id, kind, item_id, created_at)
+                   SELECT customer_id, 'kitchen', tiffin_listing_id, COALESCE(created_at, now())
+                   FROM saved_restaurants
+                   ON CONFLICT (customer_id, kind, item_id) DO NOTHING;
+               END IF;
+           END $$""",
+        """INSERT INTO saved_items (customer_id, kind, item_id, created_at)
+           SELECT customer_id, 'service', service_listing_id, COALESCE(created_at, now())
+           FROM saved_services
+           ON CONFLICT (customer_id, kind, item_id) DO NOTHING""",
+        # the trigger counted the merged rows on top of the old counts
+        """UPDATE house_listings hl
+           SET save_count = (SELECT COUNT(*) FROM saved_items si
+                             WHERE si.kind = 'house' AND si.item_id = hl.id)""",
+    ]),
+    # Listings added before coordinates existed take the location of the same
+    # provider's newest located kitchen or service; the rest are set by the
+    # provider from the dashboard
+    ('backfill_listing_coordinates', [
+        """UPDATE tiffin_listings tl
+           SET latitude = src.latitude, longitude = src.longitude
+           FROM (SELECT DISTINCT ON (provider_id) provider_id, latitude, longitude
+                 FROM (SELECT provider_id, latitude, longitude, created_at FROM tiffin_listings
+                       UNION ALL
+                       SELECT provider_id, latitude, longitude, created_at FROM service_listings) located
+                 WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                 ORDER BY provider_id, created_at DESC) src
+           WHERE tl.provider_id = src.provider_id
+           AND (tl.latitude IS NULL OR tl.longitude IS NULL)""",
+        """UPDATE service_listings sl
+           SET latitude = src.latitude, longitude = src.longitude
+           FROM (SELECT DISTINCT ON (provider_id) provider_id, latitude, longitude
+                 FROM (SELECT provider_id, latitude, longitude, created_at FROM tiffin_listings
+                       UNION ALL
+                       SELECT provider_id, latitude, longitude, created_at FROM service_listings) located
+                 WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                 ORDER BY provider_id, created_at DESC) src
+           WHERE sl.provider_id = src.provider_id
+           AND (sl.latitude IS NULL OR sl.longitude IS NULL)""",
+    ]),
+    # radius search never looks further than geo.MAX_RADIUS_KM (50 km), which
+    # is now also the largest radius a provider can save
+    ('cap_listing_radius', [
+        "UPDATE tiffin_listings SET delivery_radius = 50 WHERE delivery_radius > 50",
+        "UPDATE service_listings SET service_radius = 50 WHERE service_radius > 50",
+    ]),
+]
+
+
+def upgrade_schema(db, catalogue_views=False):
+    """Apply SCHEMA_UPGRADES, then pending DATA_MIGRATIONS; a failing step is logged and skipped
+
+    catalogue_views (the USE_CATALOGUE_VIEWS switch) creates the catalogue
+    views, or drops them when off.
+    """
+    upgrades = SCHEMA_UPGRADES + (CATALOGUE_VIEW_UPGRADES if catalogue_views else CATALOGUE_VIEW_TEARDOWN)
+    for statement in upgrades:
+        try:
+            db.session.execute(text(statement))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error applying schema upgrade: {e}")
+
+    try:
+        db.session.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name VARCHAR(100) PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """))
+        db.session.commit()
+        applied = {row[0] for row in db.session.execute(text("SELECT name FROM schema_migrations"))}
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error reading schema migrations: {e}")
+        return
+
+    for name, statements in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        try:
+            for statement in statements:
+                db.session.execute(text(statement))
+            db.session.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {'name': name})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error applying data migration {name}: {e}")
@@ -0,0 +1,180 @@
+# Service browse (/services): category tabs, per-category counts and pages
+#
+# Approved services are listed newest first, one category at a time or all
+# together, and paged by keyset on (created_at, id) off
+# idx_service_listings_status_category_created. The tab counts for the
+# current search come from one GROUP BY query. The first page of every
+# category, and the counts, are cached for searches that do not depend on the
+# customer's address, so switching tabs is a cache read; approving or
+# rejecting a service bumps the 'services' version and provider profile edits
+# bump 'providers'. With USE_CATALOGUE_VIEWS the queries read the
+# catalogue_services view (see catalogue_views.py).
+from datetime import datetime
+
+from sqlalchemy import text
+
+from backend.authorization import db
+from backend.cache import cache_get, cache_set, get_version
+from backend.catalogue_views import catalogue_source
+from backend.geo import DEFAULT_ADDRESS_CTE, distance_km_sql, within_radius_conditions
+from backend.images import variant_url
+from backend.weekdays import available_on_condition, day_bit
+
+# category -> tab label, in tab order
+SERVICE_CATEGORIES = {
+    'electrician': 'Electrician',
+    'plumber': 'Plumber',
+    'carpenter': 'Carpenter',
+    'ac_repair': 'AC Repair',
+    'cleaning': 'Cleaning',
+    'packers_movers': 'Packers & Movers',
+    'wifi_installation': 'WiFi Installation',
+    'gas_connection': 'Gas Connection',
+    'laundry': 'Laundry',
+}
+
+SERVICES_PAGE_SIZE = 24
+CATALOGUE_CACHE_TTL = 120
+
+
+def parse_category(value):
+    """The ?category= value if it names a known category, else '' (all categories)"""
+    value = (value or '').strip().lower()
+    return value if value in SERVICE_CATEGORIES else ''
+
+
+def parse_cursor(value):
+    """Decode a services-page cursor ('<iso created_at>_<listing id>'); None when missing or invalid"""
+    if not value:
+        return None
+    created_at, _, listing_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(created_at), int(listing_id)
+    except ValueError:
+        return None
+
+
+def _where(search_query, weekday, customer_id):
+    """(WITH prefix, FROM joins, WHERE conditions, params) shared by the page and count queries"""
+    conditions = ["sl.status = 'approved'"]
+    params = {}
+    prefix = ""
+    joins = ""
+
+    # Only services whose radius covers the customer's default address
+    if customer_id is not None:
+        prefix = DEFAULT_ADDRESS_CTE
+        joins = "CROSS JOIN addr"
+        conditions += within_radius_conditions('sl', 'service_radius')
+        params['customer_id'] = customer_id
+
+    if search_query:
+        conditions.append("LOWER(sl.service_title) LIKE LOWER(:search_query)")
+        params['search_query'] = f"%{search_query}%"
+
+    if weekday is not None:
+        conditions.append(available_on_condition('sl'))
+        params['day_bit'] = day_bit(weekday)
+
+    return prefix, joins, conditions, params
+
+
+def category_counts(search_query='', weekday=None, customer_id=None):
+    """{'all': n, <category>: n} for the current search, from one GROUP BY query"""
+    key = ('service_counts', search_query.lower(), weekday, get_version('services'))
+    if customer_id is None:
+        counts = cache_get(key)
+        if counts is not None:
+            return counts
+
+    prefix, joins, conditions, params = _where(search_query, weekday, customer_id)
+    rows = db.session.execute(text(f"""
+        {prefix}
+        SELECT sl.service_category, COUNT(*)
+        FROM {catalogue_source('service', 'service_listings', 'sl')}
+        {joins}
+        WHERE {' AND '.join(conditions)}
+        GROUP BY sl.service_category
+    """), params).fetchall()
+
+    counts = {category: 0 for category in SERVICE_CATEGORIES}
+    for category, count in rows:
+        counts[category] = count
+    counts['all'] = sum(count for _, count in rows)
+
+    if customer_id is not None:
+        return counts
+    return cache_set(key, counts, ttl=CATALOGUE_CACHE_TTL)
+
+
+def services_page(category='', search_query='', weekday=None, customer_id=None, cursor=None):
+    """One page of approved services, newest first, or nearest first for an address search.
+
+    Returns (listings, next_cursor). Address searches are limited to the
+    services that reach the customer and come back in one page. The first
+    page of a category with no search or address filter is cached.
+    """
+    cacheable = not search_query and customer_id is None and cursor is None
+    key = ('services_page', category, weekday, get_version('services'), get_version('providers'))
+    if cacheable:
+        page = cache_get(key)
+        if page is not None:
+            return page
+
+    prefix, joins, conditions, params = _where(search_query, weekday, customer_id)
+    near = customer_id is not None
+
+    if category:
+        conditions.append("sl.service_category = :category")
+        params['category'] = category
+
+    if near:
+        order_limit = "ORDER BY distance_km ASC"
+    else:
+        if cursor:
+            conditions.append("(sl.created_at, sl.id) < (:cursor_at, :cursor_id)")
+            params['cursor_at'], params['cursor_id'] = cursor
+        order_limit = "ORDER BY sl.created_at DESC, sl.id DESC LIMIT :limit"
+        params['limit'] = SERVICES_PAGE_SIZE + 1
+
+    distance_column = f", {distance_km_sql('sl')} AS distance_km" if near else ""
+
+    rows = db.session.execute(text(f"""
+        {prefix}
+        SELECT sl.id, sl.provider_id, sl.service_category, sl.service_title, sl.description,
+               sl.base_price, sl.service_radius, sl.availability_days, sl.created_at,
+               sl.provider_name AS business_name, sl.provider_status, sl.provider_image
+               {distance_column}
+        FROM {catalogue_source('service', 'service_listings', 'sl')}
+        {joins}
+        WHERE {' AND '.join(conditions)}
+        {order_limit}
+    """), params).mappings().all()
+
+    next_cursor = None
+    if not near and len(rows) > SERVICES_PAGE_SIZE:
+        rows = rows[:SERVICES_PAGE_SIZE]
+        last = rows[-1]
+        next_cursor = f"{last['created_at'].isoformat()}_{last['id']}"
+
+    page = ([_map_service(row, near) for row in rows], next_cursor)
+    if cacheable:
+        return cache_set(key, page, ttl=CATALOGUE_CACHE_TTL)
+    return page
+
+
+def _map_service(row, near):
+    return {
+        'id': row['id'],
+        'provider_id': row['provider_id'],
+        'service_category': row['service_category'],
+        'service_title': row['service_title'],
+        'description': row['description'] or '',
+        'base_price': float(row['base_price']) if row['base_price'] else 0,
+        'service_radius': float(row['service_radius']) if row['service_radius'] else 0,
+        'availability_days': row['availability_days'] or '',
+        'business_name': row['business_name'],
+        'provider_verified': row['provider_status'] == 'verified',
+        'provider_image': variant_url(row['provider_image'], 'card'),
+        'distance_km': round(float(row['distance_km']), 1) if near else None
+    }
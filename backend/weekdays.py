@@ -0,0 +1,35 @@
+# Day-of-week filters on listing working days
+#
+# tiffin_listings.available_days and service_listings.availability_days stay
+# free text for display. The weekday_mask() SQL function (see schema.py)
+# parses them into available_days_mask on every insert or update, bit 0 =
+# Monday ... bit 6 = Sunday, so browse pages filter "open on <day>" with one
+# bitwise AND on that column instead of matching strings.
+from datetime import date
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+ALL_DAYS_MASK = (1 << 7) - 1
+
+
+def parse_day_filter(value, today=None):
+    """Weekday index (0 = Monday) for ?day=today or ?day=<weekday name>; None when missing or invalid"""
+    value = (value or '').strip().lower()
+    if value == 'today':
+        return (today or date.today()).weekday()
+    if value in WEEKDAYS:
+        return WEEKDAYS.index(value)
+    return None
+
+
+def available_on_condition(alias):
+    """SQL condition: the listing works on the day whose bit is bound as :day_bit"""
+    return f"({alias}.available_days_mask & :day_bit) <> 0"
+
+
+def day_bit(weekday):
+    return 1 << weekday
+
+
+def listing_days_mask(listing):
+    """The listing's weekday mask; rows written before the mask existed count as every day"""
+    return listing.available_days_mask or ALL_DAYS_MASK
@@ -47,6 +47,8 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    refreshSavedStatus('apartment', '.save-house-btn');
+
     function openModal(id) {
         modal.show();
         loadingDiv.style.display = 'flex';
@@ -65,8 +67,8 @@ document.addEventListener('DOMContentLoaded', function() {
                     loadingDiv.style.display = 'none';
                     contentDiv.style.display = 'block';
                     
-                    // Check if saved
-                    checkIfSavedMsg(id, modalSaveBtn);
+                    // Saved status comes from the card (see saved_status.js)
+                    updateModalSaveBtn(modalSaveBtn, isCardSaved('.save-house-btn', id));
                     
                     // Attach save handler
                     modalSaveBtn.onclick = function() {
@@ -209,14 +211,6 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
 
-    function checkIfSavedMsg(id, btnElement) {
-        fetch(`/housing/apartment/${id}/is-saved`)
-            .then(res => res.json())
-            .then(data => {
-                updateModalSaveBtn(btnElement, data.saved);
-            });
-    }
-
     function updateModalSaveBtn(btn, isSaved) {
         if (isSaved) {
             btn.innerHTML = '<i class="fas fa-heart me-2"></i>Saved';
@@ -99,4 +99,52 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
+    // --- Dashboard home: recent orders, upcoming bookings, saved counts ---
+    const homeSection = document.getElementById('customerHome');
+    if (homeSection) {
+        loadCustomerHome();
+    }
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        return div.innerHTML;
+    }
+
+    function renderHomeList(elementId, items, emptyText, renderItem) {
+        const list = document.getElementById(elementId);
+        if (!list) return;
+        if (!items || items.length === 0) {
+            list.innerHTML = `<li class="text-muted">${emptyText}</li>`;
+            return;
+        }
+        list.innerHTML = items.map(renderItem).join('');
+    }
+
+    function loadCustomerHome() {
+        fetch('/customer/api/home')
+            .then(res => res.json())
+            .then(data => {
+                if (!data.success) return;
+
+                renderHomeList('homeRecentOrders', data.recent_orders, 'No orders yet.', order => `
+                    <li class="d-flex justify-content-between">
+                        <span>${escapeHtml(order.meal_name)} &times; ${order.quantity} <small class="text-muted d-block">${escapeHtml(order.business_name)}</small></span>
+                        <span class="badge bg-secondary align-self-start">${escapeHtml(order.order_status).replace(/_/g, ' ')}</span>
+                    </li>`);
+
+                renderHomeList('homeUpcomingBookings', data.upcoming_bookings, 'No upcoming bookings.', booking => `
+                    <li>
+                        ${escapeHtml(booking.service_title)}
+                        <small class="text-muted d-block">${escapeHtml(booking.booking_date)} ${escapeHtml(booking.booking_time || '')} &middot; ${escapeHtml(booking.booking_status)}</small>
+                    </li>`);
+
+                const counts = data.saved_counts || {};
+                document.getElementById('homeSavedHouse').textContent = counts.house || 0;
+                document.getElementById('homeSavedKitchen').textContent = counts.kitchen || 0;
+                document.getElementById('homeSavedService').textContent = counts.service || 0;
+            })
+            .catch(err => console.error('Error loading dashboard home:', err));
+    }
+
 });
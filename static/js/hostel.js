@@ -21,6 +21,8 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     });
+
+    refreshSavedStatus('hostel', '.save-house-btn');
 });
 
 // Global state for current listing in modal
@@ -139,22 +141,10 @@ function openHostelDetails(listingId) {
             const badgeEl = document.getElementById('providerBadge');
             badgeEl.style.display = provider.verification_status === 'verified' ? 'inline-flex' : 'none';
             
-            // --- Check saved status (no dedicated endpoint; use house_listing_id in saved_houses) ---
-            fetch(`/housing/hostel/${listingId}/is-saved`)
-                .then(res => res.json())
-                .then(savedData => {
-                    if (savedData.saved) {
-                        updateSaveButtonUI(true);
-                    }
-                    // Show content after both details and saved status are fetched
-                    loadingEl.style.display = 'none';
-                    contentEl.style.display = 'block';
-                })
-                .catch(err => {
-                    console.error("Error checking saved status:", err);
-                    loadingEl.style.display = 'none';
-                    contentEl.style.display = 'block';
-                });
+            // --- Saved status comes from the card (see saved_status.js) ---
+            updateSaveButtonUI(isCardSaved('.save-house-btn', listingId));
+            loadingEl.style.display = 'none';
+            contentEl.style.display = 'block';
         })
         .catch(err => {
             console.error('Error fetching hostel details:', err);
@@ -176,6 +166,7 @@ function toggleSaveHostel(listingId) {
         .then(res => res.json())
         .then(data => {
             if (data.success) {
+                markCardSaved('.save-house-btn', listingId, !isSaved);
                 showToast(data.message || (isSaved ? 'Hostel removed from saved' : 'Hostel saved successfully'));
                 // Ensure UI is synced with server response (optional, but safely handled by optimistic update)
             } else {
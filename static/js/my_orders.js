@@ -46,4 +46,61 @@ document.addEventListener('DOMContentLoaded', function() {
             if (bsModal) bsModal.show();
         });
     });
+
+    // --- Status polling while any order on the page can still change ---
+    const ordersList = document.getElementById('ordersList');
+    const POLL_INTERVAL_MS = 20000;
+
+    if (ordersList) {
+        let since = ordersList.dataset.updatesSince;
+        const activeStatuses = (ordersList.dataset.activeStatuses || '').split(',');
+
+        function hasActiveOrders() {
+            return Array.from(ordersList.querySelectorAll('[data-order-id]'))
+                .some(card => activeStatuses.includes(card.dataset.orderStatus));
+        }
+
+        function applyUpdate(update) {
+            const card = ordersList.querySelector(`[data-order-id="${update.id}"]`);
+            if (!card) return;
+
+            card.dataset.orderStatus = update.order_status;
+            const badge = card.querySelector('.order-status-badge');
+            if (badge) {
+                badge.className = `badge-status badge-${update.order_status} order-status-badge`;
+                badge.textContent = update.order_status.replace(/_/g, ' ').replace(/\b\w/g, c => c.toUpperCase());
+            }
+
+            const detailsBtn = card.querySelector('.view-order-details-btn');
+            if (detailsBtn) {
+                try {
+                    const o = JSON.parse(detailsBtn.getAttribute('data-order') || '{}');
+                    o.order_status = update.order_status;
+                    detailsBtn.setAttribute('data-order', JSON.stringify(o));
+                } catch (err) {
+                    console.error('Failed to parse order JSON:', err);
+                }
+            }
+        }
+
+        function pollUpdates() {
+            if (!hasActiveOrders()) return;
+
+            fetch(`/orders/api/updates?since=${encodeURIComponent(since)}`)
+                .then(res => res.json())
+                .then(data => {
+                    if (!data.success) return;
+                    data.orders.forEach(applyUpdate);
+                    since = data.since;
+                })
+                .catch(err => console.error('Error polling order updates:', err))
+                .finally(() => {
+                    if (hasActiveOrders()) setTimeout(pollUpdates, POLL_INTERVAL_MS);
+                });
+        }
+
+        if (since && hasActiveOrders()) {
+            setTimeout(pollUpdates, POLL_INTERVAL_MS);
+        }
+    }
 });
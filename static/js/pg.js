@@ -21,6 +21,8 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     });
+
+    refreshSavedStatus('pg', '.save-house-btn');
 });
 
 // Global state
@@ -137,21 +139,10 @@ function openPGDetails(listingId) {
             const badgeEl = document.getElementById('providerBadge');
             badgeEl.style.display = provider.verification_status === 'verified' ? 'inline-flex' : 'none';
             
-            // --- Check Is Saved ---
-            fetch(`/housing/pg/${listingId}/is-saved`)
-                .then(res => res.json())
-                .then(savedData => {
-                    if (savedData.saved) {
-                        updateSaveButtonUI(true);
-                    }
-                    loadingEl.style.display = 'none';
-                    contentEl.style.display = 'block';
-                })
-                .catch(err => {
-                    console.error("Error checking saved status:", err);
-                    loadingEl.style.display = 'none';
-                    contentEl.style.display = 'block';
-                });
+            // --- Saved status comes from the card (see saved_status.js) ---
+            updateSaveButtonUI(isCardSaved('.save-house-btn', listingId));
+            loadingEl.style.display = 'none';
+            contentEl.style.display = 'block';
         })
         .catch(err => {
             console.error('Error fetching details:', err);
@@ -172,6 +163,7 @@ function toggleSavePG(listingId) {
         .then(res => res.json())
         .then(data => {
             if (data.success) {
+                markCardSaved('.save-house-btn', listingId, !isSaved);
                 showToast(data.message || (isSaved ? 'PG removed from saved' : 'PG saved successfully'));
             } else {
                 updateSaveButtonUI(isSaved);
@@ -65,4 +65,83 @@ document.addEventListener('DOMContentLoaded', function () {
             saveBtn.textContent = 'Save Changes';
         }
     });
+
+    // Default address and location
+    const addressBtn = document.getElementById('editAddressBtn');
+    const addressModalEl = document.getElementById('editAddressModal');
+    const saveAddressBtn = document.getElementById('saveAddressBtn');
+    const locateBtn = document.getElementById('useMyLocationBtn');
+
+    if (!addressBtn || !addressModalEl) return;
+
+    const addressModal = new bootstrap.Modal(addressModalEl);
+
+    addressBtn.addEventListener('click', function () {
+        addressModal.show();
+    });
+
+    if (locateBtn) {
+        locateBtn.addEventListener('click', function () {
+            if (!navigator.geolocation) {
+                alert('Location is not available in this browser.');
+                return;
+            }
+            locateBtn.disabled = true;
+            navigator.geolocation.getCurrentPosition(function (position) {
+                document.getElementById('editLatitude').value = position.coords.latitude.toFixed(6);
+                document.getElementById('editLongitude').value = position.coords.longitude.toFixed(6);
+                locateBtn.disabled = false;
+            }, function () {
+                alert('Could not get your location. Please enter it manually.');
+                locateBtn.disabled = false;
+            });
+        });
+    }
+
+    saveAddressBtn.addEventListener('click', async function () {
+        const addressLine = document.getElementById('editAddressLine').value.trim();
+        const latitude = document.getElementById('editLatitude').value.trim();
+        const longitude = document.getElementById('editLongitude').value.trim();
+
+        if (!addressLine) {
+            alert('Address is required.');
+            return;
+        }
+
+        saveAddressBtn.disabled = true;
+        saveAddressBtn.textContent = 'Saving...';
+
+        try {
+            const res = await fetch('/profile/address', {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ address_line: addressLine, latitude, longitude })
+            });
+
+            const data = await res.json();
+
+            if (data.success) {
+                const saved = data.address;
+                document.getElementById('profileAddress').textContent = saved.address_line;
+                document.getElementById('profileLocation').textContent = saved.latitude === null
+                    ? 'Not set'
+                    : `${saved.latitude.toFixed(5)}, ${saved.longitude.toFixed(5)}`;
+
+                addressModal.hide();
+
+                if (toast) {
+                    document.getElementById('profileToastMsg').textContent = 'Address updated successfully';
+                    toast.show();
+                }
+            } else {
+                alert(data.message || 'Failed to update address.');
+            }
+        } catch (err) {
+            console.error('Error updating address:', err);
+            alert('Something went wrong. Please try again.');
+        } finally {
+            saveAddressBtn.disabled = false;
+            saveAddressBtn.textContent = 'Save Address';
+        }
+    });
 });
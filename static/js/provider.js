@@ -1285,9 +1285,65 @@ function openViewServiceModal(listing) {
     document.getElementById('svc-view-created').textContent = listing.created_at;
     document.getElementById('svc-view-days').textContent = listing.availability_days;
 
+    currentViewServiceId = listing.id;
+    document.getElementById('svc-slot-minutes').value = String(listing.slot_minutes || 60);
+    document.getElementById('svc-available-from').value = listing.available_from || '09:00';
+    document.getElementById('svc-available-to').value = listing.available_to || '18:00';
+    document.getElementById('svc-latitude').value = listing.latitude ?? '';
+    document.getElementById('svc-longitude').value = listing.longitude ?? '';
+
     new bootstrap.Modal(document.getElementById('viewServiceModal')).show();
 }
 
+let currentViewServiceId = null;
+
+function saveServiceSchedule() {
+    if (!currentViewServiceId) return;
+
+    fetch(`/provider/service/${currentViewServiceId}/schedule`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({
+            slot_minutes: document.getElementById('svc-slot-minutes').value,
+            available_from: document.getElementById('svc-available-from').value,
+            available_to: document.getElementById('svc-available-to').value
+        })
+    })
+        .then(res => res.json())
+        .then(data => {
+            alert(data.message || (data.success ? 'Booking slots updated' : 'Failed to update booking slots'));
+            if (data.success) fetchServiceListings();
+        })
+        .catch(err => {
+            console.error('Error updating booking slots:', err);
+            alert('Failed to update booking slots');
+        });
+}
+
+function saveServiceLocation() {
+    if (!currentViewServiceId) return;
+
+    fetch(`/provider/service/${currentViewServiceId}/location`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({
+            latitude: document.getElementById('svc-latitude').value.trim(),
+            longitude: document.getElementById('svc-longitude').value.trim()
+        })
+    })
+        .then(res => res.json())
+        .then(data => {
+            alert(data.message || (data.success ? 'Service location updated' : 'Failed to update location'));
+            if (data.success) fetchServiceListings();
+        })
+        .catch(err => {
+            console.error('Error updating service location:', err);
+            alert('Failed to update location');
+        });
+}
+
 // --- Food Orders Logic ---
 
 let currentManageTiffinId = null;
@@ -1331,7 +1387,7 @@ function fetchFoodOrdersTiffins() {
                         
                         <div class="d-grid">
                             <button class="btn btn-manage-kitchen btn-sm" 
-                                onclick="openManageKitchen(${listing.id}, '${listing.diet_type} Tiffin', ${listing.kitchen_open})"
+                                onclick="openManageKitchen(${listing.id}, '${listing.diet_type} Tiffin', ${listing.kitchen_open}, ${listing.slot_capacity ?? 'null'}, ${listing.latitude ?? 'null'}, ${listing.longitude ?? 'null'})"
                                 ${!isApproved ? 'disabled' : ''}>
                                 ${!isApproved ? 'Pending Approval' : 'Manage Kitchen'}
                             </button>
@@ -1347,7 +1403,7 @@ function fetchFoodOrdersTiffins() {
         });
 }
 
-function openManageKitchen(id, title, isOpen) {
+function openManageKitchen(id, title, isOpen, slotCapacity, latitude, longitude) {
     currentManageTiffinId = id;
     
     document.getElementById('food-orders-list-view').style.display = 'none';
@@ -1359,10 +1415,68 @@ function openManageKitchen(id, title, isOpen) {
     toggle.checked = isOpen;
     
     updateKitchenStatusUI(isOpen);
+
+    const capacityInput = document.getElementById('kitchen-slot-capacity');
+    if (capacityInput) capacityInput.value = (slotCapacity === null || slotCapacity === undefined) ? '' : slotCapacity;
+
+    document.getElementById('kitchen-latitude').value = latitude ?? '';
+    document.getElementById('kitchen-longitude').value = longitude ?? '';
+
     fetchMeals(id);
     fetchOrders(id);
 }
 
+function saveKitchenCapacity() {
+    if (!currentManageTiffinId) return;
+    const capacityInput = document.getElementById('kitchen-slot-capacity');
+    const value = capacityInput ? capacityInput.value.trim() : '';
+
+    fetch(`/provider/tiffin/${currentManageTiffinId}/capacity`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({ slot_capacity: value === '' ? null : Number(value) })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.slot_capacity === null ? 'Capacity limit removed.' : 'Kitchen capacity updated!');
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(err => {
+        console.error(err);
+        alert('Failed to update kitchen capacity.');
+    });
+}
+
+function saveKitchenLocation() {
+    if (!currentManageTiffinId) return;
+
+    fetch(`/provider/tiffin/${currentManageTiffinId}/location`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({
+            latitude: document.getElementById('kitchen-latitude').value.trim(),
+            longitude: document.getElementById('kitchen-longitude').value.trim()
+        })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.success) {
+            alert('Kitchen location updated!');
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(err => {
+        console.error(err);
+        alert('Failed to update kitchen location.');
+    });
+}
+
 function closeManageKitchen() {
     currentManageTiffinId = null;
     document.getElementById('manage-kitchen-view').style.display = 'none';
@@ -1489,12 +1603,23 @@ function fetchOrders(tiffinId) {
                 return;
             }
 
-            // Create responsive table
+            // Bulk status toolbar (desktop table only)
             let html = `
+                <div class="d-none d-md-flex align-items-center gap-2 mb-3" id="bulk-orders-toolbar">
+                    <span class="text-muted small me-2"><span id="bulk-selected-count">0</span> selected</span>
+                    <button class="btn btn-outline-secondary btn-sm" onclick="bulkUpdateOrderStatus('preparing')">Mark Preparing</button>
+                    <button class="btn btn-outline-secondary btn-sm" onclick="bulkUpdateOrderStatus('out_for_delivery')">Mark Out for Delivery</button>
+                    <button class="btn btn-outline-secondary btn-sm" onclick="bulkUpdateOrderStatus('delivered')">Mark Delivered</button>
+                </div>
+            `;
+
+            // Create responsive table
+            html += `
                 <div class="table-responsive d-none d-md-block">
                     <table class="table table-hover align-middle">
                         <thead class="table-light">
                             <tr>
+                                <th><input type="checkbox" class="form-check-input" id="bulk-select-all" onchange="toggleAllOrderSelection(this.checked)"></th>
                                 <th>Order ID</th>
                                 <th>Customer</th>
                                 <th>Meal</th>
@@ -1515,8 +1640,13 @@ function fetchOrders(tiffinId) {
                     ? '<span class="badge bg-warning text-dark">Fast</span>' 
                     : '<span class="badge bg-light text-muted">Standard</span>';
                 
+                const selectBox = actionBtn
+                    ? `<input type="checkbox" class="form-check-input bulk-order-select" value="${order.id}" onchange="updateBulkSelectedCount()">`
+                    : '';
+                
                 html += `
                     <tr>
+                        <td>${selectBox}</td>
                         <td>#${order.id}</td>
                         <td>${order.customer_name}</td>
                         <td>${order.meal_name}</td>
@@ -1599,6 +1729,56 @@ function getActionButton(order) {
     return `<button class="btn btn-primary btn-sm flex-fill" onclick="updateOrderStatus(${order.id}, '${action.nextStatus}', '${action.confirmMsg}')">${action.label}</button>`;
 }
 
+function selectedOrderIds() {
+    return Array.from(document.querySelectorAll('.bulk-order-select:checked')).map(cb => Number(cb.value));
+}
+
+function updateBulkSelectedCount() {
+    const countEl = document.getElementById('bulk-selected-count');
+    if (countEl) countEl.textContent = selectedOrderIds().length;
+}
+
+function toggleAllOrderSelection(checked) {
+    document.querySelectorAll('.bulk-order-select').forEach(cb => { cb.checked = checked; });
+    updateBulkSelectedCount();
+}
+
+function bulkUpdateOrderStatus(newStatus) {
+    const orderIds = selectedOrderIds();
+    if (orderIds.length === 0) {
+        alert('Select at least one order.');
+        return;
+    }
+    if (!confirm(`Update ${orderIds.length} selected order(s)?`)) return;
+
+    fetch('/provider/orders/bulk-status', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({ order_ids: orderIds, new_status: newStatus })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.success) {
+            let msg = data.message;
+            if (data.skipped && data.skipped.length > 0) {
+                msg += `\nNot in the right status: #${data.skipped.join(', #')}`;
+            }
+            alert(msg);
+            fetchActiveOrdersCount();
+            if (currentManageTiffinId) {
+                fetchOrders(currentManageTiffinId);
+            }
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(err => {
+        console.error(err);
+        alert('Failed to update order status.');
+    });
+}
+
 function viewOrderDetails(order) {
     document.getElementById('od-id').textContent = '#' + order.id;
     document.getElementById('od-customer').textContent = order.customer_name;
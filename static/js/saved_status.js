@@ -0,0 +1,52 @@
+// Saved state of the listing cards on a browse page
+//
+// The page is rendered with each card's data-saved from the server; one
+// POST /saved/status on load brings every card up to date (saves made on
+// another device included). Detail modals read the state from the card
+// instead of asking the server each time they open, and write it back after
+// a save or unsave.
+
+function setCardSaved(btn, isSaved) {
+    btn.setAttribute('data-saved', isSaved ? 'true' : 'false');
+    const icon = btn.querySelector('i');
+    if (icon) {
+        icon.classList.toggle('far', !isSaved);
+        icon.classList.toggle('fas', isSaved);
+        icon.style.color = isSaved ? '#ef4444' : '';
+    }
+}
+
+function cardSaveButton(selector, id) {
+    return document.querySelector(`${selector}[data-id="${id}"]`);
+}
+
+function isCardSaved(selector, id) {
+    const btn = cardSaveButton(selector, id);
+    return !!btn && btn.getAttribute('data-saved') === 'true';
+}
+
+function markCardSaved(selector, id, isSaved) {
+    const btn = cardSaveButton(selector, id);
+    if (btn) setCardSaved(btn, isSaved);
+}
+
+function refreshSavedStatus(kind, selector) {
+    const buttons = Array.from(document.querySelectorAll(selector));
+    if (!buttons.length) return;
+
+    fetch('/saved/status', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ items: buttons.map(btn => ({ kind, id: Number(btn.getAttribute('data-id')) })) })
+    })
+        .then(res => res.json())
+        .then(data => {
+            if (!data.success) return;
+            const saved = new Map(data.items.map(item => [String(item.id), item.saved]));
+            buttons.forEach(btn => {
+                const id = btn.getAttribute('data-id');
+                if (saved.has(id)) setCardSaved(btn, saved.get(id));
+            });
+        })
+        .catch(err => console.error('Error fetching saved status:', err));
+}
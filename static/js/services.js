@@ -29,14 +29,20 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('bookServiceTitle').value = title || '';
             document.getElementById('bookServicePrice').value = price ? '₹' + parseFloat(price).toFixed(0) : '';
             document.getElementById('bookServiceDate').value = '';
-            document.getElementById('bookServiceTime').value = '';
             document.getElementById('bookServiceAddress').value = '';
             document.getElementById('bookServiceNotes').value = '';
+            renderTimeSlots();
 
             if (bookModalBs) bookModalBs.show();
+            loadServiceSlots(serviceId);
         });
     });
 
+    const bookDate = document.getElementById('bookServiceDate');
+    if (bookDate) {
+        bookDate.addEventListener('change', renderTimeSlots);
+    }
+
     // Confirm Booking
     const confirmBtn = document.getElementById('bookServiceConfirm');
     if (confirmBtn) {
@@ -73,6 +79,8 @@ document.addEventListener('DOMContentLoaded', function() {
                         showToast('Service booked successfully');
                     } else {
                         showToast(data.message || 'Booking failed', true);
+                        // the slot may have just been taken: show what is still free
+                        loadServiceSlots(serviceId);
                     }
                 })
                 .catch(err => {
@@ -84,6 +92,63 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Free slots of the service in the booking modal, by date ('YYYY-MM-DD' -> ['HH:MM', ...])
+const SLOT_DAYS_AHEAD = 14;
+let serviceSlots = {};
+
+function isoDate(d) {
+    return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+}
+
+function loadServiceSlots(serviceId) {
+    const today = new Date();
+    const last = new Date(today);
+    last.setDate(today.getDate() + SLOT_DAYS_AHEAD - 1);
+
+    const dateInput = document.getElementById('bookServiceDate');
+    dateInput.min = isoDate(today);
+    dateInput.max = isoDate(last);
+
+    serviceSlots = {};
+    fetch(`/services/${serviceId}/slots?from=${isoDate(today)}&to=${isoDate(last)}`)
+        .then(res => res.json())
+        .then(data => {
+            if (!data.success) {
+                showToast(data.message || 'Could not load time slots', true);
+                return;
+            }
+            data.days.forEach(day => { serviceSlots[day.date] = day.slots; });
+            renderTimeSlots();
+        })
+        .catch(err => {
+            console.error('Error loading slots:', err);
+            showToast('Could not load time slots', true);
+        });
+}
+
+function renderTimeSlots() {
+    const select = document.getElementById('bookServiceTime');
+    const hint = document.getElementById('bookServiceSlotsHint');
+    const date = document.getElementById('bookServiceDate').value;
+    const slots = serviceSlots[date];
+
+    select.innerHTML = '';
+    if (!date) {
+        select.innerHTML = '<option value="">Select a date first</option>';
+        hint.textContent = '';
+    } else if (!slots) {
+        select.innerHTML = '<option value="">Not available</option>';
+        hint.textContent = 'The provider does not work on this day.';
+    } else if (slots.length === 0) {
+        select.innerHTML = '<option value="">Fully booked</option>';
+        hint.textContent = 'Every slot on this day is taken. Please pick another date.';
+    } else {
+        select.innerHTML = '<option value="">Select a time</option>' +
+            slots.map(slot => `<option value="${slot}">${slot}</option>`).join('');
+        hint.textContent = `${slots.length} slot${slots.length === 1 ? '' : 's'} free`;
+    }
+}
+
 function toggleSaveService(serviceId, isSaved, btn) {
     const endpoint = isSaved
         ? `/services/${serviceId}/unsave`
@@ -209,6 +209,9 @@ document.addEventListener('DOMContentLoaded', function() {
         loading.style.display = 'block';
         empty.style.display = 'none';
 
+        // A cart only ever holds meals from one kitchen
+        if (cart.tiffinId !== String(tiffinId)) resetCart(String(tiffinId));
+
         fetch(`/tiffin/${tiffinId}/meals`)
             .then(res => res.json())
             .then(data => {
@@ -252,13 +255,23 @@ document.addEventListener('DOMContentLoaded', function() {
                         <h4 class="meal-title">${meal.meal_name}</h4>
                         <span class="meal-price">${formatInr(meal.price)}</span>
                         <p class="meal-desc text-truncate-3">${meal.description || ''}</p>
-                        <button class="btn btn-primary w-100 order-meal-btn"
-                                data-meal-id="${meal.id}"
-                                data-meal-name="${meal.meal_name}"
-                                data-price="${meal.price}"
-                                data-tiffin-id="${tiffinId}">
-                            Order Now
-                        </button>
+                        <div class="d-flex gap-2">
+                            <button class="btn btn-primary flex-grow-1 order-meal-btn"
+                                    data-meal-id="${meal.id}"
+                                    data-meal-name="${meal.meal_name}"
+                                    data-price="${meal.price}"
+                                    data-tiffin-id="${tiffinId}">
+                                Order Now
+                            </button>
+                            <button class="btn btn-outline-primary add-to-cart-btn"
+                                    title="Add to cart"
+                                    data-meal-id="${meal.id}"
+                                    data-meal-name="${meal.meal_name}"
+                                    data-price="${meal.price}"
+                                    data-tiffin-id="${tiffinId}">
+                                <i class="fas fa-cart-plus"></i>
+                            </button>
+                        </div>
                     </div>
                 </div>
             `;
@@ -267,10 +280,190 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Event delegation: Order Now button click
+    // --- Cart: several meals from one kitchen, placed with one checkout ---
+    const cartBarEl = document.getElementById('cartBar');
+    const cartCountEl = document.getElementById('cartCount');
+    const cartSubtotalEl = document.getElementById('cartSubtotal');
+    const cartModalEl = document.getElementById('cartModal');
+    const cartModal = cartModalEl ? new bootstrap.Modal(cartModalEl) : null;
+    const cartItemsEl = document.getElementById('cartItems');
+    const cartFastWrapperEl = document.getElementById('cartFastDeliveryWrapper');
+    const cartFastEl = document.getElementById('cartFastDelivery');
+    const cartFastChargeEl = document.getElementById('cartFastDeliveryCharge');
+    const cartAddressEl = document.getElementById('cartAddress');
+    const cartTotalEl = document.getElementById('cartTotalPrice');
+    const checkoutBtn = document.getElementById('checkoutBtn');
+    const openCartBtn = document.getElementById('openCartBtn');
+
+    let cart = { tiffinId: null, items: {} };
+
+    function cartLines() {
+        return Object.entries(cart.items).map(([mealId, item]) => ({ mealId, ...item }));
+    }
+
+    function cartSubtotal() {
+        return cartLines().reduce((sum, line) => sum + line.price * line.quantity, 0);
+    }
+
+    function resetCart(tiffinId) {
+        cart = { tiffinId: tiffinId || null, items: {} };
+        renderCartBar();
+    }
+
+    function renderCartBar() {
+        if (!cartBarEl) return;
+        const count = cartLines().reduce((sum, line) => sum + line.quantity, 0);
+        if (count === 0) {
+            cartBarEl.style.setProperty('display', 'none', 'important');
+            return;
+        }
+        cartBarEl.style.removeProperty('display');
+        if (cartCountEl) cartCountEl.textContent = `${count} item${count === 1 ? '' : 's'}`;
+        if (cartSubtotalEl) cartSubtotalEl.textContent = formatInr(cartSubtotal());
+    }
+
+    function renderCartModal() {
+        if (!cartItemsEl) return;
+        cartItemsEl.innerHTML = '';
+        cartLines().forEach(line => {
+            const li = document.createElement('li');
+            li.className = 'd-flex justify-content-between align-items-center mb-2';
+            li.innerHTML = `
+                <span class="fw-semibold cart-item-name"></span>
+                <div class="d-flex align-items-center gap-2">
+                    <input type="number" class="form-control form-control-sm cart-qty" min="1" style="width: 70px;"
+                           value="${line.quantity}" data-meal-id="${line.mealId}">
+                    <button type="button" class="btn btn-sm btn-outline-danger cart-remove" data-meal-id="${line.mealId}">
+                        <i class="fas fa-times"></i>
+                    </button>
+                </div>
+            `;
+            li.querySelector('.cart-item-name').textContent = `${line.name} (${formatInr(line.price)})`;
+            cartItemsEl.appendChild(li);
+        });
+        calculateCartTotal();
+    }
+
+    function calculateCartTotal() {
+        const fastCharge = (cartFastEl && cartFastEl.checked) ? Number(window.FAST_DELIVERY_CHARGE || 20) : 0;
+        if (cartTotalEl) cartTotalEl.value = formatInr(cartSubtotal() + fastCharge);
+    }
+
+    if (cartItemsEl) {
+        cartItemsEl.addEventListener('input', function(e) {
+            const input = e.target.closest('.cart-qty');
+            if (!input) return;
+            const qty = Number(input.value);
+            const item = cart.items[input.getAttribute('data-meal-id')];
+            if (item && Number.isFinite(qty) && qty >= 1) item.quantity = Math.floor(qty);
+            calculateCartTotal();
+            renderCartBar();
+        });
+
+        cartItemsEl.addEventListener('click', function(e) {
+            const btn = e.target.closest('.cart-remove');
+            if (!btn) return;
+            delete cart.items[btn.getAttribute('data-meal-id')];
+            renderCartBar();
+            if (cartLines().length === 0) {
+                if (cartModal) cartModal.hide();
+                return;
+            }
+            renderCartModal();
+        });
+    }
+
+    if (cartFastEl) {
+        cartFastEl.addEventListener('change', calculateCartTotal);
+    }
+
+    if (openCartBtn) {
+        openCartBtn.addEventListener('click', function() {
+            if (!cartModal || cartLines().length === 0) return;
+
+            const fastAvailable = !!(currentKitchen && currentKitchen.fast_delivery_available);
+            if (cartFastWrapperEl) cartFastWrapperEl.style.display = fastAvailable ? 'block' : 'none';
+            if (cartFastEl) cartFastEl.checked = false;
+            if (cartFastChargeEl) {
+                const charge = Number(window.FAST_DELIVERY_CHARGE || 20);
+                cartFastChargeEl.textContent = fastAvailable ? `( + ${formatInr(charge)} )` : '';
+            }
+            if (cartAddressEl && !cartAddressEl.value.trim()) {
+                cartAddressEl.value = (window.DEFAULT_CUSTOMER_ADDRESS || '').trim();
+            }
+
+            renderCartModal();
+            cartModal.show();
+        });
+    }
+
+    if (checkoutBtn) {
+        checkoutBtn.addEventListener('click', function() {
+            const items = cartLines().map(line => ({ meal_id: Number(line.mealId), quantity: line.quantity }));
+            const delivery_address = (cartAddressEl ? cartAddressEl.value : '').trim();
+            const fast_delivery = !!(cartFastEl && cartFastEl.checked);
+
+            if (items.length === 0) {
+                showToast('Your cart is empty.', true);
+                return;
+            }
+            if (!delivery_address) {
+                showToast('Delivery address is required.', true);
+                return;
+            }
+
+            checkoutBtn.disabled = true;
+            fetch(`/tiffin/${cart.tiffinId}/checkout`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ items, fast_delivery, delivery_address })
+            })
+                .then(res => res.json().then(j => ({ ok: res.ok, json: j })))
+                .then(({ ok, json }) => {
+                    if (ok && json.success) {
+                        if (cartModal) cartModal.hide();
+                        resetCart(cart.tiffinId);
+                        showToast('Order placed successfully');
+                    } else {
+                        showToast((json && json.message) ? json.message : 'Failed to place order', true);
+                    }
+                })
+                .catch(err => {
+                    console.error('Error checking out cart:', err);
+                    showToast('Server error. Please try again.', true);
+                })
+                .finally(() => {
+                    checkoutBtn.disabled = false;
+                });
+        });
+    }
+
+    // Event delegation: Order Now / Add to cart button clicks
     const mealsGrid = document.getElementById('mealsGrid');
     if (mealsGrid) {
         mealsGrid.addEventListener('click', function(e) {
+            const cartBtn = e.target.closest('.add-to-cart-btn');
+            if (cartBtn) {
+                e.preventDefault();
+                e.stopPropagation();
+
+                const tiffinId = cartBtn.getAttribute('data-tiffin-id');
+                if (cart.tiffinId !== tiffinId) resetCart(tiffinId);
+
+                const mealId = cartBtn.getAttribute('data-meal-id');
+                const item = cart.items[mealId] || {
+                    name: cartBtn.getAttribute('data-meal-name') || '',
+                    price: Number(cartBtn.getAttribute('data-price') || 0),
+                    quantity: 0
+                };
+                item.quantity += 1;
+                cart.items[mealId] = item;
+
+                renderCartBar();
+                showToast(`${item.name} added to cart`);
+                return;
+            }
+
             const btn = e.target.closest('.order-meal-btn');
             if (!btn) return;
             e.preventDefault();
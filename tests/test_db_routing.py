@@ -0,0 +1,140 @@
+import time
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from backend import db_routing
+from backend.db_routing import READ_YOUR_WRITES_SECONDS, RoutingSession, init_db_routing, on_primary, read_only
+
+
+def make_app(tmp_path, replica_url=None):
+    """An app whose primary and stub replica are SQLite files that each answer with their own name"""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={'replica': replica_url or f"sqlite:///{tmp_path / 'replica.db'}"},
+        REPLICA_MAX_LAG=5,
+    )
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+    app.view_runs = []
+
+    for bind, name in ((None, 'primary'), ('replica', 'replica')):
+        if bind == 'replica' and replica_url:
+            continue
+        with app.app_context():
+            with db.engines[bind].begin() as conn:
+                conn.execute(text("CREATE TABLE source (name TEXT)"))
+                conn.execute(text("INSERT INTO source (name) VALUES (:name)"), {'name': name})
+
+    def source():
+        return db.session.execute(text("SELECT name FROM source")).scalar()
+
+    @app.route('/read')
+    @read_only
+    def read():
+        app.view_runs.append('read')
+        return jsonify(source=source())
+
+    @app.route('/read-guarded')
+    @read_only
+    def read_guarded():
+        # a view that catches its own database errors, like the real routes
+        try:
+            return jsonify(source=source())
+        except Exception:
+            db.session.rollback()
+            return jsonify(source=None), 500
+
+    @app.route('/read-then-write')
+    @read_only
+    def read_then_write():
+        seen = source()
+        with on_primary():
+            written_on = source()
+        return jsonify(source=seen, on_primary=written_on)
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        db.session.execute(text("INSERT INTO source (name) VALUES ('primary')"))
+        db.session.commit()
+        return jsonify(success=True)
+
+    init_db_routing(app, db)
+    return app, db
+
+
+@pytest.fixture(autouse=True)
+def replica_checked_and_usable():
+    """Skip the PostgreSQL lag check: the stub replica counts as checked just now and caught up"""
+    db_routing._replica_state.update(checked_at=time.monotonic(), usable=True)
+    yield
+    db_routing._replica_state.update(checked_at=0.0, usable=False)
+
+
+def test_read_only_route_reads_from_replica(tmp_path):
+    app, _ = make_app(tmp_path)
+    assert app.test_client().get('/read').get_json() == {'source': 'replica'}
+
+
+def test_read_after_write_in_window_goes_to_primary(tmp_path):
+    app, _ = make_app(tmp_path)
+    client = app.test_client()
+
+    assert client.post('/write').status_code == 200
+    assert client.get('/read').get_json() == {'source': 'primary'}
+
+
+def test_read_after_window_goes_back_to_replica(tmp_path):
+    app, _ = make_app(tmp_path)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['last_write_at'] = time.time() - READ_YOUR_WRITES_SECONDS - 1
+
+    assert client.get('/read').get_json() == {'source': 'replica'}
+
+
+def test_read_only_request_does_not_start_write_window(tmp_path):
+    app, _ = make_app(tmp_path)
+    client = app.test_client()
+    client.get('/read')
+
+    with client.session_transaction() as session:
+        assert 'last_write_at' not in session
+
+
+def test_replica_error_reruns_view_on_primary(tmp_path):
+    app, db = make_app(tmp_path)
+    with app.app_context():
+        with db.engines['replica'].begin() as conn:
+            conn.execute(text("DROP TABLE source"))
+    client = app.test_client()
+
+    assert client.get('/read').get_json() == {'source': 'primary'}
+    assert app.view_runs == ['read', 'read']
+    assert client.get('/read-guarded').get_json() == {'source': 'primary'}
+    assert db_routing._replica_state['usable'] is False
+
+
+def test_unreachable_replica_falls_back_to_primary(tmp_path):
+    app, _ = make_app(tmp_path, replica_url=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    assert app.test_client().get('/read').get_json() == {'source': 'primary'}
+    # the failed connect is caught at the first query, so the view is not re-run
+    assert app.view_runs == ['read']
+    assert db_routing._replica_state['usable'] is False
+
+
+def test_replica_marked_down_is_skipped_until_next_check(tmp_path):
+    app, _ = make_app(tmp_path)
+    db_routing._replica_state.update(checked_at=time.monotonic(), usable=False)
+
+    assert app.test_client().get('/read').get_json() == {'source': 'primary'}
+
+
+def test_on_primary_forces_primary_inside_read_only_route(tmp_path):
+    app, _ = make_app(tmp_path)
+
+    assert app.test_client().get('/read-then-write').get_json() == {'source': 'replica', 'on_primary': 'primary'}
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from flask import Flask, g
+
+from backend import cache
+from backend.cache import bump_version, cache_get, cache_set, get_version
+
+
+class LaggingSession:
+    """Stands in for db.session on a replica that is lag seconds behind"""
+
+    def __init__(self, lag):
+        self.lag = lag
+        self.lag_checks = 0
+
+    def execute(self, statement):
+        self.lag_checks += 1
+        return SimpleNamespace(scalar=lambda: self.lag)
+
+
+def make_app(lag):
+    app = Flask(__name__)
+    app.extensions['sqlalchemy'] = SimpleNamespace(session=LaggingSession(lag))
+    return app
+
+
+def listing_key():
+    return ('listing_detail', 42, get_version('house:42'))
+
+
+def setup_function():
+    cache._store.clear()
+    cache._versions.clear()
+
+
+def test_bump_then_lagging_replica_read_is_not_cached():
+    app = make_app(lag=2.5)
+    cache_set(listing_key(), 'old title')
+
+    # the edit commits on the primary and bumps the version ...
+    bump_version('house:42')
+
+    # ... and the next request reads the old row from the replica
+    with app.test_request_context():
+        g.use_replica = True
+        assert cache_set(listing_key(), 'old title') == 'old title'
+
+    assert cache_get(listing_key()) is None
+
+
+def test_caught_up_replica_read_is_cached():
+    app = make_app(lag=0)
+    bump_version('house:42')
+
+    with app.test_request_context():
+        g.use_replica = True
+        cache_set(listing_key(), 'new title')
+
+    assert cache_get(listing_key()) == 'new title'
+
+
+def test_lag_is_measured_once_per_request():
+    app = make_app(lag=2.5)
+    session = app.extensions['sqlalchemy'].session
+
+    with app.test_request_context():
+        g.use_replica = True
+        cache_set(('a',), 1)
+        cache_set(('b',), 2)
+
+    assert session.lag_checks == 1
+
+
+def test_primary_reads_are_cached_without_a_lag_check():
+    app = make_app(lag=2.5)
+    session = app.extensions['sqlalchemy'].session
+
+    with app.test_request_context():
+        g.use_replica = False
+        cache_set(listing_key(), 'new title')
+    cache_set(('outside_request',), 1)
+
+    assert cache_get(listing_key()) == 'new title'
+    assert cache_get(('outside_request',)) == 1
+    assert session.lag_checks == 0